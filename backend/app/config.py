@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Dict, Literal
 
 
 class Settings(BaseSettings):
@@ -20,17 +20,86 @@ class Settings(BaseSettings):
     ]
     
     # Redis settings
+    REDIS_ENABLED: bool = True  # False: always use the in-memory store (single worker only)
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: str | None = None
+    REDIS_MAX_CONNECTIONS: int = 64  # connection pool size per worker
+    REDIS_POOL_TIMEOUT: float = 5.0  # seconds to wait for a free pooled connection under burst load
+    REDIS_SOCKET_TIMEOUT: float = 5.0  # seconds before a connect, read or write gives up
+    REDIS_SOCKET_KEEPALIVE: bool = True
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # seconds idle before a pooled connection is checked with PING
+    MEMORY_EXPIRE_INTERVAL: float = 1.0  # seconds between expired-key sweeps without Redis
     
     # WebSocket settings
-    WS_HEARTBEAT_INTERVAL: int = 30  # seconds
+    WS_HEARTBEAT_INTERVAL: int = 30  # seconds between heartbeats (pings to quiet sockets, room sweeps)
+    WS_HEARTBEAT_TIMEOUT: int = 75  # seconds without any client frame before a socket is evicted
+    WS_RESUME_GRACE: int = 30  # seconds a player whose socket closed keeps their place in the room
+    WS_RESUME_BUFFER_SIZE: int = 128  # recent room events kept per room for replay on reconnect
+    STROKE_LOG_MAX_ENTRIES: int = 1024  # Pictionary stroke batches kept per room (one per tick while drawing)
+    GAME_CLOCK_RESOLUTION: float = 0.1  # seconds per game clock timer wheel tick
+    STATE_KEYFRAME_INTERVAL: int = 60  # state broadcasts between full-state keyframes
+    # Server tick rate (Hz) per game type; state updates are broadcast once per tick
+    TICK_RATES: Dict[str, int] = {
+        "air_hockey": 30,
+        "pictionary": 10,
+        "laser_dodger": 20,
+        "balloon_pop": 15,
+    }
+    DEFAULT_TICK_RATE: int = 20
+    # Simulate Air Hockey on the server; clients then only send paddle input
+    AIR_HOCKEY_AUTHORITATIVE: bool = False
+    # Spawn lasers and compute hits/health for Laser Dodger on the server
+    LASER_DODGER_AUTHORITATIVE: bool = False
+    # Spawn balloons (seeded) and score pops for Balloon Pop on the server
+    BALLOON_POP_AUTHORITATIVE: bool = False
+    WS_SEND_QUEUE_SIZE: int = 64  # outbound messages buffered per connection
+    # What to do when a client's send queue is full:
+    # drop_oldest state update, coalesce state updates, or disconnect the client
+    WS_SLOW_CONSUMER_POLICY: Literal["drop_oldest", "coalesce", "disconnect"] = "coalesce"
+    WS_MAX_MESSAGE_BYTES: int = 64 * 1024  # larger client frames are dropped unparsed
+    # Inbound rate limits per connection: message type -> [messages per second, burst].
+    # Excess state updates are coalesced, anything else over its limit is dropped.
+    WS_RATE_LIMITS: Dict[str, List[float]] = {
+        "game_state_update": [30, 30],
+        "player_input": [120, 60],
+        "game_state_resync": [2, 5],
+        "chat_message": [2, 5],
+        "draw_stroke": [60, 60],
+        "draw_snapshot": [2, 5],
+        "webrtc_offer": [5, 10],
+        "webrtc_answer": [5, 10],
+        "webrtc_ice_candidate": [20, 50],
+        "default": [10, 20],  # every other (or unknown) message type
+    }
+    # Per-game overrides of WS_RATE_LIMITS, sized to each game's client frame rate
+    WS_GAME_RATE_LIMITS: Dict[str, Dict[str, List[float]]] = {
+        "air_hockey": {"game_state_update": [90, 45]},
+        "pictionary": {"game_state_update": [45, 45]},
+        "laser_dodger": {"game_state_update": [45, 30]},
+        "balloon_pop": {"game_state_update": [30, 30]},
+    }
+    
+    # Cross-worker message bus (Redis pub/sub); needed when running several workers
+    MESSAGE_BUS_ENABLED: bool = True
+    ROOM_OWNER_TTL: int = 30  # seconds a dead worker keeps its rooms before another takes over
+    
+    # Prometheus metrics on GET /metrics (per worker: scrape every worker)
+    METRICS_ENABLED: bool = True
     
     # Room settings
     MAX_PLAYERS_PER_ROOM: int = 6
     ROOM_CODE_LENGTH: int = 6
+    ROOM_CODE_SECRET: str = ""  # key for the room code permutation; generated and kept in Redis if empty
+    ROOM_CODE_BLOCK_SIZE: int = 64  # room numbers each worker reserves per counter round trip
+    ROOM_TTL: int = 3600  # seconds
+    ROOM_IDLE_TIMEOUT: int = 600  # seconds without activity or connected players before a room is deleted
+    
+    # In-process room cache (write-behind to Redis)
+    ROOM_CACHE_FLUSH_INTERVAL: float = 1.0  # seconds between game state flushes
+    ROOM_CACHE_IDLE_TTL: int = 300  # seconds before an untouched room is evicted
+    ROOM_CACHE_MAX_ROOMS: int = 10000
     
     class Config:
         env_file = ".env"
@@ -1,27 +1,205 @@
 import redis.asyncio as redis
 from app.config import settings
-import json
-from typing import Optional, Any, Dict
+from app.utils import serialization
+from app.memory_store import MemoryStore, InMemoryPubSub
+from app import metrics
+from typing import Optional, Any, Callable, List, Tuple
+from functools import wraps
+from time import perf_counter
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _timed(operation: str):
+    """Record a RedisDB method's latency under ``operation``"""
+    histogram = metrics.REDIS_SECONDS.labels(operation)
+    
+    def decorate(method):
+        @wraps(method)
+        async def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                histogram.observe(perf_counter() - start)
+        return timed
+    
+    return decorate
+
+
+def _decode_value(value) -> Optional[Any]:
+    """Values come back as JSON when they were stored as JSON, else as the raw string"""
+    if value:
+        try:
+            return serialization.loads(value)
+        except (serialization.JSONDecodeError, TypeError):
+            return value
+    return None
+
+
+class Script:
+    """A Lua script with its in-memory equivalent, see ``RedisDB.register_script``"""
+    
+    def __init__(self, db: "RedisDB", source: str, fallback: Callable[[MemoryStore, list, list], Any]):
+        self.db = db
+        self.source = source
+        self.fallback = fallback
+        self.name = fallback.__name__.strip("_").removesuffix("_fallback")
+        self._histogram = metrics.REDIS_SECONDS.labels(f"script:{self.name}")
+        self._redis_script = None
+    
+    def _registered(self):
+        if self._redis_script is None:
+            self._redis_script = self.db.redis.register_script(self.source)
+        return self._redis_script
+    
+    async def __call__(self, keys: list, args: list):
+        start = perf_counter()
+        try:
+            if self.db.use_memory_fallback:
+                return self.fallback(self.db._memory_store, keys, args)
+            return await self._registered()(keys=keys, args=args)
+        finally:
+            self._histogram.observe(perf_counter() - start)
+    
+    async def queue(self, pipe, keys: list, args: list):
+        """Add a call to a pipeline (the pipeline loads the script first if Redis lacks it)"""
+        await self._registered()(keys=keys, args=args, client=pipe)
+
+
+class Batch:
+    """
+    Commands sent to Redis together, in one pipeline flush.
+
+    Queue commands with the methods below, which mean the same as the
+    RedisDB methods of the same name, then ``await batch.execute()`` for
+    their results in order. The batch is one round trip, not a transaction:
+    use a script where the commands must be atomic. On the in-memory store
+    the commands simply run in order. Latency is recorded as ``batch:<name>``.
+    """
+    
+    def __init__(self, db: "RedisDB", name: str):
+        self._db = db
+        self._histogram = metrics.REDIS_SECONDS.labels(f"batch:{name}")
+        # (queue on a pipeline, run on the memory store, decode the result)
+        self._commands: List[Tuple[Callable, Callable, Optional[Callable]]] = []
+    
+    def __len__(self) -> int:
+        return len(self._commands)
+    
+    def _add(self, pipelined: Callable, in_memory: Callable, decode: Optional[Callable] = None) -> "Batch":
+        self._commands.append((pipelined, in_memory, decode))
+        return self
+    
+    def get(self, key: str) -> "Batch":
+        return self._add(lambda pipe: pipe.get(key), lambda store: store.get(key), _decode_value)
+    
+    def set_nx(self, key: str, value: Any, expire: int = None) -> "Batch":
+        if isinstance(value, (dict, list)):
+            value = serialization.dumps(value)
+        
+        def in_memory(store: MemoryStore) -> bool:
+            if key in store:
+                return False
+            store[key] = str(value)
+            if expire:
+                store.expire(key, expire)
+            return True
+        
+        return self._add(lambda pipe: pipe.set(key, value, ex=expire, nx=True), in_memory, bool)
+    
+    def delete(self, *keys: str) -> "Batch":
+        def in_memory(store: MemoryStore):
+            for key in keys:
+                store.pop(key, None)
+        
+        return self._add(lambda pipe: pipe.delete(*keys), in_memory)
+    
+    def hash_get(self, key: str, *fields: str) -> "Batch":
+        def in_memory(store: MemoryStore) -> list:
+            current = store.get(key, {})
+            return [current.get(field) for field in fields]
+        
+        return self._add(lambda pipe: pipe.hmget(key, fields), in_memory)
+    
+    def script(self, script: Script, keys: list, args: list) -> "Batch":
+        return self._add(
+            lambda pipe: script.queue(pipe, keys, args),
+            lambda store: script.fallback(store, keys, args)
+        )
+    
+    async def execute(self) -> list:
+        """Send every queued command; returns their results in order"""
+        start = perf_counter()
+        try:
+            if self._db.use_memory_fallback:
+                store = self._db._memory_store
+                results = [in_memory(store) for _, in_memory, _ in self._commands]
+            else:
+                async with self._db.redis.pipeline(transaction=False) as pipe:
+                    for pipelined, _, _ in self._commands:
+                        await pipelined(pipe)
+                    results = await pipe.execute()
+            return [
+                decode(result) if decode else result
+                for result, (_, _, decode) in zip(results, self._commands)
+            ]
+        finally:
+            self._histogram.observe(perf_counter() - start)
+
+
+class RedisSubscription:
+    """Redis pub/sub connection with the same interface as MemorySubscription"""
+    
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+    
+    async def subscribe(self, *channels: str):
+        await self._pubsub.subscribe(*channels)
+    
+    async def unsubscribe(self, *channels: str):
+        await self._pubsub.unsubscribe(*channels)
+    
+    async def get_message(self, timeout: float) -> Optional[Tuple[str, str]]:
+        message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message and message["type"] == "message":
+            return message["channel"], message["data"]
+        return None
+    
+    async def close(self):
+        await self._pubsub.aclose()
+
+
 class RedisDB:
     def __init__(self):
         self.redis: Optional[redis.Redis] = None
         self.use_memory_fallback = False
-        self._memory_store: Dict[str, str] = {}  # In-memory fallback
+        self._memory_store = MemoryStore()  # In-memory fallback with native hashes/sets and TTLs
+        self._memory_pubsub = InMemoryPubSub()
     
     async def connect(self):
         """Connect to Redis with fallback to in-memory storage"""
+        if not settings.REDIS_ENABLED:
+            print("⚠️  Redis disabled, using in-memory storage")
+            self._use_memory_store()
+            return
+        
         try:
-            self.redis = await redis.from_url(
+            # A blocking pool makes bursts wait for a free connection instead of failing
+            pool = redis.BlockingConnectionPool.from_url(
                 f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}",
                 password=settings.REDIS_PASSWORD,
                 encoding="utf-8",
-                decode_responses=True
+                decode_responses=True,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_keepalive=settings.REDIS_SOCKET_KEEPALIVE,
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
             )
+            self.redis = redis.Redis(connection_pool=pool)
             # Test connection
             await self.redis.ping()
             print("✅ Connected to Redis")
@@ -29,41 +207,58 @@ class RedisDB:
         except Exception as e:
             print(f"⚠️  Redis connection failed: {e}")
             print("⚠️  Using in-memory storage (data will be lost on restart)")
-            self.use_memory_fallback = True
-            self.redis = None
+            self._use_memory_store()
+    
+    def _use_memory_store(self):
+        self.use_memory_fallback = True
+        self.redis = None
+        self._memory_store.start(settings.MEMORY_EXPIRE_INTERVAL)
     
     async def disconnect(self):
         """Disconnect from Redis"""
         if self.redis and not self.use_memory_fallback:
-            await self.redis.close()
+            await self.redis.aclose(close_connection_pool=True)
             print("❌ Disconnected from Redis")
         else:
             print("❌ Cleared in-memory storage")
+            await self._memory_store.stop()
             self._memory_store.clear()
     
+    @_timed("set")
     async def set(self, key: str, value: Any, expire: int = None):
         """Set a key-value pair"""
         if self.use_memory_fallback:
-            self._memory_store[key] = json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+            self._memory_store[key] = serialization.dumps(value) if isinstance(value, (dict, list)) else str(value)
+            if expire:
+                self._memory_store.expire(key, expire)
         else:
             if isinstance(value, (dict, list)):
-                value = json.dumps(value)
+                value = serialization.dumps(value)
             await self.redis.set(key, value, ex=expire)
     
+    @_timed("get")
     async def get(self, key: str) -> Optional[Any]:
         """Get a value by key"""
         if self.use_memory_fallback:
             value = self._memory_store.get(key)
         else:
             value = await self.redis.get(key)
-        
-        if value:
-            try:
-                return json.loads(value)
-            except (json.JSONDecodeError, TypeError):
-                return value
-        return None
+        return _decode_value(value)
+    
+    @_timed("set_nx")
+    async def set_nx(self, key: str, value: Any, expire: int = None) -> bool:
+        """Set a key only if it does not exist yet; returns whether it was set"""
+        if self.use_memory_fallback:
+            if key in self._memory_store:
+                return False
+            await self.set(key, value, expire)
+            return True
+        else:
+            if isinstance(value, (dict, list)):
+                value = serialization.dumps(value)
+            return bool(await self.redis.set(key, value, ex=expire, nx=True))
     
+    @_timed("delete")
     async def delete(self, key: str):
         """Delete a key"""
         if self.use_memory_fallback:
@@ -71,6 +266,25 @@ class RedisDB:
         else:
             await self.redis.delete(key)
     
+    @_timed("incr")
+    async def incr(self, key: str, amount: int = 1) -> int:
+        """Atomically add to an integer counter; returns the new value"""
+        if self.use_memory_fallback:
+            value = int(self._memory_store.get(key, 0)) + amount
+            self._memory_store[key] = str(value)
+            return value
+        else:
+            return await self.redis.incrby(key, amount)
+    
+    @_timed("expire")
+    async def expire(self, key: str, seconds: int) -> bool:
+        """Set a key's time to live; returns False if the key does not exist"""
+        if self.use_memory_fallback:
+            return self._memory_store.expire(key, seconds)
+        else:
+            return bool(await self.redis.expire(key, seconds))
+    
+    @_timed("exists")
     async def exists(self, key: str) -> bool:
         """Check if key exists"""
         if self.use_memory_fallback:
@@ -78,31 +292,84 @@ class RedisDB:
         else:
             return await self.redis.exists(key) > 0
     
+    @_timed("hash_get")
+    async def hash_get(self, key: str, *fields: str) -> list:
+        """Get values of hash fields (None for missing fields)"""
+        if self.use_memory_fallback:
+            current = self._memory_store.get(key, {})
+            return [current.get(field) for field in fields]
+        else:
+            return await self.redis.hmget(key, fields)
+    
+    @_timed("hash_get_all")
+    async def hash_get_all(self, *keys: str) -> list:
+        """Get every field of each hash, in a single round trip"""
+        if self.use_memory_fallback:
+            return [dict(self._memory_store.get(key, {})) for key in keys]
+        else:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.hgetall(key)
+                return await pipe.execute()
+    
+    def register_script(self, source: str, fallback: Callable[[MemoryStore, list, list], Any]) -> Script:
+        """Register a Lua script together with its in-memory equivalent.
+
+        Returns an async callable ``script(keys, args)``, which can also be
+        queued in a batch. On Redis the script runs atomically in one round
+        trip; with the in-memory fallback ``fallback(store, keys, args)`` is
+        called instead and must return the same shape as the script. Latency
+        is recorded as ``script:<name>``, named after the fallback.
+        """
+        return Script(self, source, fallback)
+    
+    def batch(self, name: str) -> Batch:
+        """Start a batch of commands to send in one round trip; ``name`` labels its latency"""
+        return Batch(self, name)
+    
+    @_timed("publish_many")
+    async def publish_many(self, messages: List[Tuple[str, str]]):
+        """Publish (channel, data) pairs in order, in a single round trip"""
+        if self.use_memory_fallback:
+            for channel, data in messages:
+                self._memory_pubsub.publish(channel, data)
+        else:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for channel, data in messages:
+                    pipe.publish(channel, data)
+                await pipe.execute()
+    
+    def subscription(self):
+        """Open a pub/sub subscription (Redis or in-memory)"""
+        if self.use_memory_fallback:
+            return self._memory_pubsub.subscription()
+        return RedisSubscription(self.redis.pubsub())
+    
+    @_timed("set_add")
     async def set_add(self, key: str, *values):
         """Add values to a set"""
         if self.use_memory_fallback:
-            current = self._memory_store.get(key, '[]')
-            current_set = set(json.loads(current))
-            current_set.update(values)
-            self._memory_store[key] = json.dumps(list(current_set))
+            self._memory_store.setdefault(key, set()).update(values)
         else:
             await self.redis.sadd(key, *values)
     
+    @_timed("set_remove")
     async def set_remove(self, key: str, *values):
         """Remove values from a set"""
         if self.use_memory_fallback:
-            current = self._memory_store.get(key, '[]')
-            current_set = set(json.loads(current))
-            current_set.difference_update(values)
-            self._memory_store[key] = json.dumps(list(current_set))
+            current = self._memory_store.get(key)
+            if current is not None:
+                current.difference_update(values)
+                if not current:
+                    del self._memory_store[key]
         else:
             await self.redis.srem(key, *values)
     
+    @_timed("set_members")
     async def set_members(self, key: str):
         """Get all members of a set"""
         if self.use_memory_fallback:
-            current = self._memory_store.get(key, '[]')
-            return set(json.loads(current))
+            return set(self._memory_store.get(key, ()))
         else:
             return await self.redis.smembers(key)
 
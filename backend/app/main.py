@@ -1,9 +1,17 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.database import db
+from app import metrics
+from app.services.room_cache import room_cache
+from app.services.message_bus import message_bus
+from app.services.tick_scheduler import tick_scheduler
+from app.services.heartbeat import heartbeat
+from app.services.game_clock import game_clock
+from app.services.stroke_stream import stroke_stream
 from app.routers import rooms, websocket
 
 
@@ -13,9 +21,18 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting GestureHub API...")
     await db.connect()
+    room_cache.start()
+    await message_bus.start()
+    heartbeat.start()
     yield
     # Shutdown
     print("🛑 Shutting down GestureHub API...")
+    await heartbeat.stop()
+    await tick_scheduler.stop()
+    await game_clock.stop()
+    await stroke_stream.stop()
+    await room_cache.stop()
+    await message_bus.stop()
     await db.disconnect()
 
 
@@ -58,6 +75,13 @@ async def health_check():
     return {"status": "healthy"}
 
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint():
+        """Prometheus metrics for this worker"""
+        return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,217 @@
+"""
+In-memory backend used by RedisDB when Redis is unreachable.
+
+Mirrors the parts of Redis the app relies on: a keyspace with native values
+(strings, dicts for hashes, sets for sets), key expiry, and pub/sub.
+"""
+import asyncio
+import heapq
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+_MISSING = object()
+
+
+class MemoryStore:
+    """
+    Keyspace with Redis-style TTLs.
+
+    Expiring keys are scheduled on a heap of (deadline, key) holding at most
+    one live entry per key: extending a TTL only updates the deadline, and
+    the sweep re-schedules the key when it finds it was extended. Expired
+    keys disappear on access and are reclaimed by a background sweep, so
+    memory stays bounded like it does on Redis.
+
+    Like Redis, assigning a key clears its TTL while changing a hash or set
+    in place keeps it.
+    """
+    
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}  # key -> deadline
+        self._scheduled: Dict[str, float] = {}  # key -> deadline of its heap entry
+        self._heap: List[Tuple[float, str]] = []
+        self._task: Optional[asyncio.Task] = None
+    
+    def _expired(self, key: str) -> bool:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._remove(key)
+            return True
+        return False
+    
+    def _remove(self, key: str):
+        self._data.pop(key, None)
+        self._expires.pop(key, None)
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._data and not self._expired(key)
+    
+    def __getitem__(self, key: str) -> Any:
+        if self._expired(key):
+            raise KeyError(key)
+        return self._data[key]
+    
+    def __setitem__(self, key: str, value: Any):
+        self._data[key] = value
+        self._expires.pop(key, None)
+    
+    def __delitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        self._remove(key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        if self._expired(key):
+            return default
+        return self._data.get(key, default)
+    
+    def pop(self, key: str, default: Any = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self._remove(key)
+        return value
+    
+    def setdefault(self, key: str, default: Any) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._data[key] = default
+        return value
+    
+    def clear(self):
+        self._data.clear()
+        self._expires.clear()
+        self._scheduled.clear()
+        self._heap.clear()
+    
+    def expire(self, key: str, seconds: float) -> bool:
+        """Set a key's TTL; returns False if the key does not exist"""
+        if key not in self:
+            return False
+        if seconds <= 0:
+            self._remove(key)
+            return True
+        
+        deadline = time.monotonic() + seconds
+        self._expires[key] = deadline
+        scheduled = self._scheduled.get(key)
+        if scheduled is None or deadline < scheduled:
+            self._scheduled[key] = deadline
+            heapq.heappush(self._heap, (deadline, key))
+        return True
+    
+    def persist(self, key: str):
+        """Remove a key's TTL"""
+        self._expires.pop(key, None)
+    
+    def ttl(self, key: str) -> int:
+        """Seconds left to live: -1 without a TTL, -2 if the key does not exist"""
+        if key not in self:
+            return -2
+        deadline = self._expires.get(key)
+        if deadline is None:
+            return -1
+        return max(0, round(deadline - time.monotonic()))
+    
+    def sweep(self) -> int:
+        """Delete every key whose TTL has run out; returns how many were deleted"""
+        now = time.monotonic()
+        removed = 0
+        while self._heap and self._heap[0][0] <= now:
+            deadline, key = heapq.heappop(self._heap)
+            if self._scheduled.get(key) != deadline:
+                continue  # superseded by an earlier deadline
+            
+            actual = self._expires.get(key)
+            if actual is not None and actual > now:
+                # TTL was extended since this entry was pushed
+                self._scheduled[key] = actual
+                heapq.heappush(self._heap, (actual, key))
+                continue
+            
+            del self._scheduled[key]
+            if actual is not None:
+                self._remove(key)
+                removed += 1
+        return removed
+    
+    def start(self, interval: float):
+        """Sweep expired keys every ``interval`` seconds in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep_loop(interval))
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _sweep_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep()
+
+
+class MemorySubscription:
+    """A subscriber of the in-memory pub/sub hub"""
+    
+    def __init__(self, hub: "InMemoryPubSub"):
+        self._hub = hub
+        self._queue: "asyncio.Queue[Tuple[str, str]]" = asyncio.Queue()
+        self.channels: Set[str] = set()
+    
+    async def subscribe(self, *channels: str):
+        self.channels.update(channels)
+        for channel in channels:
+            self._hub.subscribers.setdefault(channel, set()).add(self)
+    
+    async def unsubscribe(self, *channels: str):
+        for channel in channels:
+            self.channels.discard(channel)
+            subscribers = self._hub.subscribers.get(channel)
+            if subscribers:
+                subscribers.discard(self)
+                if not subscribers:
+                    del self._hub.subscribers[channel]
+    
+    def deliver(self, channel: str, data: str):
+        self._queue.put_nowait((channel, data))
+    
+    async def get_message(self, timeout: float) -> Optional[Tuple[str, str]]:
+        """Next (channel, data) pair, or None after ``timeout`` seconds"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+    
+    async def close(self):
+        await self.unsubscribe(*list(self.channels))
+
+
+class InMemoryPubSub:
+    """
+    Process-local stand-in for Redis pub/sub.
+
+    Every subscription made from the same hub sees the others' messages, so
+    several message buses sharing one hub behave like workers sharing a
+    Redis server.
+    """
+    
+    def __init__(self):
+        self.subscribers: Dict[str, Set[MemorySubscription]] = {}
+    
+    def subscription(self) -> MemorySubscription:
+        return MemorySubscription(self)
+    
+    def publish(self, channel: str, data: str) -> int:
+        subscribers = self.subscribers.get(channel, ())
+        for subscriber in subscribers:
+            subscriber.deliver(channel, data)
+        return len(subscribers)
@@ -0,0 +1,258 @@
+"""
+Prometheus metrics for this worker, served by GET /metrics.
+
+Kept deliberately small: counters, gauges and fixed-bucket histograms held
+in plain attributes, rendered in the Prometheus text format on scrape.
+Label sets are created up front and hot paths keep a reference to their
+child, so recording a value is a bisect and two additions with no
+allocation. Gauges for things the app already tracks (rooms, sockets) read
+them through a callback at scrape time instead of being updated in place.
+"""
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.models import WSMessageType
+
+# Seconds: 10µs .. 2.5s
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUEUE_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric(ABC):
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        registry.register(self)
+    
+    def labels(self, *values: str):
+        """Child for a label set, created on first use; hot paths should keep the result"""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+    
+    def preallocate(self, values: Iterable[str]) -> Dict[str, object]:
+        """Create children for every value of a single-label metric, keyed by that value"""
+        return {value: self.labels(value) for value in values}
+    
+    @abstractmethod
+    def _new_child(self):
+        """A child holding the values of one label set"""
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._children.items():
+            lines.extend(self._render_child(_format_labels(self.labelnames, values), values, child))
+        return lines
+    
+    def _render_child(self, labels: str, values: Tuple[str, ...], child) -> List[str]:
+        return [f"{self.name}{labels} {_format_value(child.get())}"]
+
+
+class CounterChild:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0
+    
+    def inc(self, amount: float = 1):
+        self.value += amount
+    
+    def get(self) -> float:
+        return self.value
+
+
+class Counter(Metric):
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        if not labelnames:
+            self._default = self.labels()
+    
+    def _new_child(self):
+        return CounterChild()
+    
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+
+class GaugeChild:
+    __slots__ = ("value", "function")
+    
+    def __init__(self):
+        self.value = 0
+        self.function: Optional[Callable[[], float]] = None
+    
+    def set(self, value: float):
+        self.value = value
+    
+    def inc(self, amount: float = 1):
+        self.value += amount
+    
+    def dec(self, amount: float = 1):
+        self.value -= amount
+    
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from ``function`` at scrape time"""
+        self.function = function
+    
+    def get(self) -> float:
+        return self.function() if self.function else self.value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        if not labelnames:
+            self._default = self.labels()
+    
+    def _new_child(self):
+        return GaugeChild()
+    
+    def set(self, value: float):
+        self._default.set(value)
+    
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+
+class HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # per bucket, not cumulative; last is +Inf
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+        if not labelnames:
+            self._default = self.labels()
+    
+    def _new_child(self):
+        return HistogramChild(self.buckets)
+    
+    def observe(self, value: float):
+        self._default.observe(value)
+    
+    def _render_child(self, labels: str, values: Tuple[str, ...], child: HistogramChild) -> List[str]:
+        lines = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            total += count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {total}")
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {total}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+    
+    def register(self, metric: Metric):
+        self.metrics.append(metric)
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"❌ Failed to render metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+# ============================================
+# Application metrics
+# ============================================
+
+# WebSocket
+WS_MESSAGE_SECONDS = Histogram(
+    "gamifyou_ws_message_seconds", "Time to handle one client WebSocket message, by message type", ["type"]
+)
+WS_MESSAGE_TIMERS = WS_MESSAGE_SECONDS.preallocate([t.value for t in WSMessageType] + ["unknown"])
+
+BROADCAST_SECONDS = Histogram(
+    "gamifyou_broadcast_fanout_seconds",
+    "Time to queue a room broadcast for this worker's sockets (origin: local or bus)", ["origin"]
+)
+BROADCAST_TIMERS = BROADCAST_SECONDS.preallocate(["local", "bus"])
+
+SEND_QUEUE_DEPTH = Histogram(
+    "gamifyou_ws_send_queue_depth", "Messages waiting in a connection's send queue after each enqueue",
+    buckets=QUEUE_BUCKETS
+)
+SLOW_CONSUMER_EVENTS = Counter(
+    "gamifyou_ws_slow_consumer_total", "Messages coalesced or dropped and clients disconnected for full send queues",
+    ["action"]
+)
+SLOW_CONSUMER_COUNTERS = SLOW_CONSUMER_EVENTS.preallocate(["coalesced", "dropped", "disconnected"])
+
+WS_THROTTLED = Counter(
+    "gamifyou_ws_throttled_total", "Client messages over their rate limit, dropped or coalesced, by message type",
+    ["type", "action"]
+)
+WS_THROTTLE_COUNTERS = {
+    (message_type, action): WS_THROTTLED.labels(message_type, action)
+    for message_type in [t.value for t in WSMessageType] + ["unknown"]
+    for action in ("dropped", "coalesced")
+}
+
+WS_REJECTED = Counter(
+    "gamifyou_ws_rejected_total", "Client messages rejected before handling (oversized frames, invalid state updates)",
+    ["reason"]
+)
+WS_REJECT_COUNTERS = WS_REJECTED.preallocate(["oversized", "invalid_state"])
+
+HEARTBEAT_EVICTIONS = Counter(
+    "gamifyou_heartbeat_evictions_total", "Sockets closed for not sending anything within WS_HEARTBEAT_TIMEOUT"
+)
+ROOMS_SWEPT = Counter("gamifyou_rooms_swept_total", "Rooms deleted after ROOM_IDLE_TIMEOUT without activity")
+
+ACTIVE_ROOMS = Gauge("gamifyou_rooms", "Rooms with sockets connected to this worker")
+ACTIVE_CONNECTIONS = Gauge("gamifyou_connections", "WebSockets connected to this worker")
+OWNED_ROOMS = Gauge("gamifyou_owned_rooms", "Rooms whose game logic runs on this worker")
+CACHED_ROOMS = Gauge("gamifyou_cached_rooms", "Rooms held in this worker's room cache")
+
+# Redis
+REDIS_SECONDS = Histogram(
+    "gamifyou_redis_operation_seconds", "Latency of RedisDB operations (in-memory store when Redis is down)",
+    ["operation"]
+)
+
+# Room codes
+ROOM_CODES = Gauge("gamifyou_room_codes", "Room code allocator counters since start", ["stat"])
@@ -38,6 +38,19 @@ class Room(BaseModel):
     is_active: bool = True
 
 
+class RoomSummary(BaseModel):
+    room_code: str
+    player_count: int
+    max_players: int
+    current_game: Optional[GameType] = None
+    last_activity: datetime
+
+
+class RoomListPage(BaseModel):
+    rooms: List[RoomSummary]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
+
+
 class CreateRoomRequest(BaseModel):
     username: str
     max_players: int = Field(default=6, ge=2, le=6)
@@ -66,6 +79,8 @@ class WSMessageType(str, Enum):
     # Connection
     CONNECT = "connect"
     DISCONNECT = "disconnect"
+    PING = "ping"  # heartbeat; either side answers with PONG
+    PONG = "pong"
     
     # Room events
     PLAYER_JOINED = "player_joined"
@@ -76,8 +91,15 @@ class WSMessageType(str, Enum):
     GAME_SELECTED = "game_selected"
     GAME_START = "game_start"
     GAME_STATE_UPDATE = "game_state_update"
+    GAME_STATE_DELTA = "game_state_delta"
+    GAME_STATE_RESYNC = "game_state_resync"
+    PLAYER_INPUT = "player_input"
     GAME_END = "game_end"
     
+    # Pictionary drawing
+    DRAW_STROKE = "draw_stroke"
+    DRAW_SNAPSHOT = "draw_snapshot"
+    
     # WebRTC signaling
     WEBRTC_OFFER = "webrtc_offer"
     WEBRTC_ANSWER = "webrtc_answer"
@@ -0,0 +1,81 @@
+"""
+Rooms and players as the service layer holds them.
+
+The Pydantic models in app.models describe the REST API; validating and
+dumping them on every room mutation and WebSocket message is most of the
+CPU those paths spend. Internally rooms are slotted dataclasses built
+straight from the decoded Redis hashes: values are trusted (we wrote
+them), timestamps stay ISO strings, and ``to_dict`` returns what the
+Pydantic models would dump in JSON mode.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.models import GameType, PlayerStatus
+
+
+@dataclass(slots=True)
+class PlayerRecord:
+    player_id: str
+    username: str
+    status: str = PlayerStatus.CONNECTED.value
+    score: int = 0
+    ready: bool = False
+    joined_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PlayerRecord":
+        return cls(
+            data["player_id"], data["username"], data.get("status", PlayerStatus.CONNECTED.value),
+            data.get("score", 0), data.get("ready", False), data["joined_at"]
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "player_id": self.player_id,
+            "username": self.username,
+            "status": self.status,
+            "score": self.score,
+            "ready": self.ready,
+            "joined_at": self.joined_at,
+        }
+
+
+@dataclass(slots=True)
+class RoomRecord:
+    room_code: str
+    host_id: str
+    players: List[PlayerRecord] = field(default_factory=list)  # by joined_at
+    max_players: int = 6
+    current_game: Optional[GameType] = None
+    game_state: Dict[str, Any] = field(default_factory=dict)
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    is_active: bool = True
+    
+    @classmethod
+    def from_fields(cls, meta: Dict[str, Any], players: List[PlayerRecord], game_state: Dict[str, Any]) -> "RoomRecord":
+        """Build a room from its decoded meta hash"""
+        game = meta.get("current_game")
+        return cls(
+            meta["room_code"], meta["host_id"], players, meta.get("max_players", 6),
+            GameType(game) if game else None, game_state,
+            meta.get("created_at", ""), meta.get("is_active", True)
+        )
+    
+    def meta(self) -> Dict[str, Any]:
+        """Scalar fields, as stored in the room's meta hash"""
+        return {
+            "room_code": self.room_code,
+            "host_id": self.host_id,
+            "max_players": self.max_players,
+            "current_game": self.current_game.value if self.current_game else None,
+            "created_at": self.created_at,
+            "is_active": self.is_active,
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready dict matching the ``Room`` API model"""
+        room = self.meta()
+        room["players"] = [player.to_dict() for player in self.players]
+        room["game_state"] = self.game_state
+        return room
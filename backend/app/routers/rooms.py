@@ -1,11 +1,30 @@
-from fastapi import APIRouter, HTTPException, status
-from app.models import CreateRoomRequest, JoinRoomRequest, Room
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import Optional
+from app.models import CreateRoomRequest, JoinRoomRequest, Room, RoomListPage, GameType
 from app.services.room_service import RoomService
+from app.services.room_cache import room_cache
+from app.services.message_bus import message_bus
 import uuid
 
 router = APIRouter(prefix="/api/rooms", tags=["rooms"])
 
 
+async def _change_room(room_code: str, player_id: str, mutation):
+    """Run a membership change through the room cache on the room's owner.
+
+    Any other worker writes to Redis directly, without caching the room, and
+    asks the owner (if there is one yet) to reload its cached copy.
+    """
+    owner = await message_bus.owner(room_code, claim=False)
+    if owner == message_bus.worker_id:
+        return await room_cache.apply(room_code, mutation)
+    
+    room = await mutation(None)
+    if owner:
+        message_bus.forward(owner, room_code, player_id, "reload")
+    return room
+
+
 @router.post("/create", response_model=Room, status_code=status.HTTP_201_CREATED)
 async def create_room(request: CreateRoomRequest):
     """Create a new game room"""
@@ -17,7 +36,8 @@ async def create_room(request: CreateRoomRequest):
         max_players=request.max_players
     )
     
-    return room
+    # Validated against the response model here, and only here
+    return room.to_dict()
 
 
 @router.post("/join", response_model=Room)
@@ -25,11 +45,12 @@ async def join_room(request: JoinRoomRequest):
     """Join an existing room"""
     player_id = str(uuid.uuid4())
     
-    room = await RoomService.join_room(
+    room = await _change_room(request.room_code, player_id, lambda pending: RoomService.join_room(
         room_code=request.room_code,
         player_id=player_id,
-        username=request.username
-    )
+        username=request.username,
+        pending_state=pending
+    ))
     
     if not room:
         raise HTTPException(
@@ -37,13 +58,15 @@ async def join_room(request: JoinRoomRequest):
             detail="Room not found or full"
         )
     
-    return room
+    return room.to_dict()
 
 
 @router.get("/{room_code}", response_model=Room)
 async def get_room(room_code: str):
     """Get room details"""
-    room = await RoomService.get_room(room_code)
+    # The owner's cached room may have state not yet flushed to Redis; any other
+    # worker's copy may be stale
+    room = (message_bus.owns(room_code) and room_cache.peek(room_code)) or await RoomService.get_room(room_code)
     
     if not room:
         raise HTTPException(
@@ -51,19 +74,31 @@ async def get_room(room_code: str):
             detail="Room not found"
         )
     
-    return room
+    return room.to_dict()
 
 
-@router.get("/", response_model=list[str])
-async def get_active_rooms():
-    """Get all active room codes"""
-    rooms = await RoomService.get_active_rooms()
-    return rooms
+@router.get("/", response_model=RoomListPage)
+async def get_active_rooms(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    has_free_slots: bool = False,
+    current_game: Optional[GameType] = None,
+):
+    """List active rooms, most recently active first (pass next_cursor back for more)"""
+    try:
+        rooms, next_cursor = await RoomService.list_rooms(cursor, limit, has_free_slots, current_game)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    return RoomListPage(rooms=rooms, next_cursor=next_cursor)
 
 
 @router.delete("/{room_code}/{player_id}")
 async def leave_room(room_code: str, player_id: str):
     """Leave a room"""
-    room = await RoomService.leave_room(room_code, player_id)
+    room = await _change_room(room_code, player_id, lambda pending: RoomService.leave_room(room_code, player_id, pending))
     
-    return {"message": "Left room successfully", "room": room}
\ No newline at end of file
+    return {"message": "Left room successfully", "room": room.to_dict() if room else None}
\ No newline at end of file
@@ -1,251 +1,487 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, Set
-import json
 from app.models import WSMessageType, GameType
 from app.services.room_service import RoomService
-from app.services.game_service import GameService
+from app.services.game_service import GameService, PICTIONARY_ROUND_SECONDS
+from app.services.game_schemas import validate_update, validate_stroke
+from app.services.room_cache import room_cache
+from app.services.state_sync import state_sync
+from app.services.tick_scheduler import tick_scheduler
+from app.services.game_clock import game_clock
+from app.services.stroke_stream import stroke_stream
+from app.simulation import air_hockey
+from app.simulation.air_hockey import air_hockey_world
+from app.simulation import laser_dodger
+from app.simulation.laser_dodger import laser_dodger_world
+from app.simulation import balloon_pop
+from app.simulation.balloon_pop import balloon_pop_world
+from app.config import settings
+from app.services.connection_manager import manager, OutboundMessage, PlayerConnection
+from app.services.heartbeat import heartbeat
+from app.services.message_bus import message_bus
+from app.services.session_service import SessionService
+from app.utils import serialization, framing
+from app import metrics
+from time import perf_counter, monotonic
 import asyncio
 
 router = APIRouter()
 
-# Store active WebSocket connections
-# Format: {room_code: {player_id: websocket}}
-active_connections: Dict[str, Dict[str, WebSocket]] = {}
 
+# Handled by whichever worker holds the sender's socket; everything else
+# runs on the worker that owns the room
+LOCAL_MESSAGE_TYPES = {
+    WSMessageType.GAME_START,
+    WSMessageType.WEBRTC_OFFER,
+    WSMessageType.WEBRTC_ANSWER,
+    WSMessageType.WEBRTC_ICE_CANDIDATE,
+    WSMessageType.CHAT_MESSAGE,
+    WSMessageType.DRAW_SNAPSHOT,  # read from the stroke log, which every worker can see
+}
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
-    
-    async def connect(self, websocket: WebSocket, room_code: str, player_id: str):
-        """Connect a player to a room"""
-        await websocket.accept()
-        
-        if room_code not in self.active_connections:
-            self.active_connections[room_code] = {}
-        
-        self.active_connections[room_code][player_id] = websocket
-        print(f"✅ Player {player_id} connected to room {room_code}")
-    
-    def disconnect(self, room_code: str, player_id: str):
-        """Disconnect a player from a room"""
-        if room_code in self.active_connections:
-            if player_id in self.active_connections[room_code]:
-                del self.active_connections[room_code][player_id]
-                print(f"❌ Player {player_id} disconnected from room {room_code}")
-            
-            # Clean up empty rooms
-            if not self.active_connections[room_code]:
-                del self.active_connections[room_code]
-    
-    async def send_personal_message(self, message: dict, room_code: str, player_id: str):
-        """Send message to a specific player"""
-        if room_code in self.active_connections:
-            if player_id in self.active_connections[room_code]:
-                websocket = self.active_connections[room_code][player_id]
-                await websocket.send_json(message)
-    
-    async def broadcast_to_room(self, message: dict, room_code: str, exclude_player: str = None):
-        """Broadcast message to all players in a room"""
-        if room_code in self.active_connections:
-            disconnected = []
-            
-            for player_id, websocket in self.active_connections[room_code].items():
-                if player_id != exclude_player:
-                    try:
-                        await websocket.send_json(message)
-                    except Exception as e:
-                        print(f"Error sending to {player_id}: {e}")
-                        disconnected.append(player_id)
-            
-            # Clean up disconnected players
-            for player_id in disconnected:
-                self.disconnect(room_code, player_id)
-
+_UNKNOWN_MESSAGE_TIMER = metrics.WS_MESSAGE_TIMERS["unknown"]
+_REJECTED_OVERSIZED = metrics.WS_REJECT_COUNTERS["oversized"]
+_REJECTED_INVALID = metrics.WS_REJECT_COUNTERS["invalid_state"]
 
-manager = ConnectionManager()
+# Disconnected players waiting out WS_RESUME_GRACE
+_grace_periods = set()
 
 
 @router.websocket("/ws/{room_code}/{player_id}")
 async def websocket_endpoint(websocket: WebSocket, room_code: str, player_id: str):
-    """WebSocket endpoint for real-time communication"""
+    """WebSocket endpoint for real-time communication (JSON text, or binary frames if negotiated).
+
+    A client reconnecting after a dropped socket passes the ``session_token``
+    from its CONNECT message and the ``last_event_seq`` it saw as query
+    parameters to get the room events it missed instead of starting over.
+    """
+    
+    subprotocol = framing.negotiate(websocket.scope.get("subprotocols", []))
+    connection = await manager.connect(websocket, room_code, player_id, subprotocol)
+    limiter = connection.limiter
+    room = room_cache.peek(room_code)
+    if room and room.current_game:
+        connection.set_game(room.current_game.value)
+    
+    async def process(message: dict, data: str = None):
+        """Handle a client message here, or forward it to the room's owner"""
+        if message.get("type") in LOCAL_MESSAGE_TYPES:
+            await handle_message(room_code, player_id, message)
+            return
+        
+        owner = await message_bus.owner(room_code)
+        if owner == message_bus.worker_id:
+            await handle_message(room_code, player_id, message)
+        else:
+            if data is None:
+                data = serialization.dumps(message)
+            message_bus.forward(owner, room_code, player_id, "message", data)
     
-    await manager.connect(websocket, room_code, player_id)
+    # Open or resume the player's session; a resumed client only gets what it missed
+    params = websocket.query_params
+    last_seq = params.get("last_event_seq", "")
+    token, missed = await SessionService.open(
+        room_code, player_id, connection.connection_id, params.get("session_token"),
+        int(last_seq) if last_seq.isdigit() else None
+    )
+    resumed = token == params.get("session_token")
     
-    # Send connection confirmation
-    await manager.send_personal_message({
+    # Send connection confirmation, then the missed events
+    connection.start([OutboundMessage({
         "type": WSMessageType.CONNECT,
         "data": {
             "player_id": player_id,
             "room_code": room_code,
+            "session_token": token,
+            "resumed": missed is not None,  # False: fetch the room again
             "message": "Connected successfully"
         }
-    }, room_code, player_id)
+    })] + [OutboundMessage(event) for event in missed or ()])
+    if room and room.current_game == GameType.PICTIONARY:
+        # Joining mid-round: the drawing so far (clients elsewhere ask with DRAW_SNAPSHOT)
+        connection.enqueue(OutboundMessage(await stroke_stream.snapshot(room_code)))
     
-    # Notify other players
-    await manager.broadcast_to_room({
-        "type": WSMessageType.PLAYER_JOINED,
-        "data": {
-            "player_id": player_id,
-            "room_code": room_code
-        }
-    }, room_code, exclude_player=player_id)
+    # Notify other players (a player resuming within the grace period never left)
+    if not resumed:
+        await manager.broadcast_to_room({
+            "type": WSMessageType.PLAYER_JOINED,
+            "data": {
+                "player_id": player_id,
+                "room_code": room_code
+            }
+        }, room_code, exclude_player=player_id)
     
     try:
         while True:
             # Receive message from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            connection.last_seen = monotonic()
+            data = frame.get("text")
+            if len(data if data is not None else frame["bytes"]) > settings.WS_MAX_MESSAGE_BYTES:
+                _REJECTED_OVERSIZED.inc()
+                continue
+            if data is not None:
+                message = serialization.loads(data)
+            else:
+                message = framing.decode(frame["bytes"])
             
+            # Rate limit per message type; excess state updates are merged and sent later.
+            # State updates are checked against the game's schema first, before any I/O.
             message_type = message.get("type")
-            message_data = message.get("data", {})
-            
-            # Handle different message types
-            if message_type == WSMessageType.PLAYER_READY:
-                # Update player ready status
-                ready = message_data.get("ready", False)
-                room = await RoomService.set_player_ready(room_code, player_id, ready)
-                
-                # Broadcast to all players
-                await manager.broadcast_to_room({
-                    "type": WSMessageType.PLAYER_READY,
-                    "data": {
-                        "player_id": player_id,
-                        "ready": ready,
-                        "room": room.model_dump(mode='json') if room else None
-                    }
-                }, room_code)
-            
-            elif message_type == WSMessageType.GAME_SELECTED:
-                # Host selects a game
-                game_type = GameType(message_data.get("game_type"))
-                room = await RoomService.select_game(room_code, game_type)
-                
-                if room:
-                    # Initialize game state
-                    player_ids = [p.player_id for p in room.players]
-                    initial_state = GameService.initialize_game_state(game_type, player_ids)
-                    await RoomService.update_game_state(room_code, initial_state)
-                    
-                    # Broadcast game selection
-                    await manager.broadcast_to_room({
-                        "type": WSMessageType.GAME_SELECTED,
-                        "data": {
-                            "game_type": game_type.value,
-                            "initial_state": initial_state
-                        }
-                    }, room_code)
-            
-            elif message_type == WSMessageType.GAME_START:
-                # Start the game
-                await manager.broadcast_to_room({
-                    "type": WSMessageType.GAME_START,
-                    "data": message_data
-                }, room_code)
-            
-            elif message_type == WSMessageType.GAME_STATE_UPDATE:
-                # Update game state
-                state_update = message_data.get("state", {})
-                
-                # Validate update
-                room = await RoomService.get_room(room_code)
-                if room and room.current_game:
-                    is_valid = GameService.validate_game_update(
-                        room.current_game,
-                        room.game_state,
-                        state_update
-                    )
-                    
-                    if is_valid:
-                        # Merge state update
-                        new_state = {**room.game_state, **state_update}
-                        await RoomService.update_game_state(room_code, new_state)
-                        
-                        # Check if game ended
-                        game_ended, winner = GameService.check_game_end(room.current_game, new_state)
-                        
-                        if game_ended:
-                            await manager.broadcast_to_room({
-                                "type": WSMessageType.GAME_END,
-                                "data": {
-                                    "winner": winner,
-                                    "final_state": new_state
-                                }
-                            }, room_code)
-                        else:
-                            # Broadcast state update
-                            await manager.broadcast_to_room({
-                                "type": WSMessageType.GAME_STATE_UPDATE,
-                                "data": {
-                                    "player_id": player_id,
-                                    "state": new_state
-                                }
-                            }, room_code, exclude_player=player_id)
+            if message_type == WSMessageType.PONG:
+                continue  # heartbeat answer; receiving it was the point
+            if message_type == WSMessageType.PING:
+                if limiter.allow(message_type):
+                    connection.enqueue(OutboundMessage({"type": WSMessageType.PONG, "data": message.get("data")}))
+                continue
+            if message_type == WSMessageType.GAME_STATE_UPDATE:
+                if connection.game_type and not validate_update(connection.game_type, _state_of(message)):
+                    _REJECTED_INVALID.inc()
+                    continue
+                admitted = limiter.admit_state(message, process)
+                if admitted is None:
+                    continue
+                if admitted is not message:
+                    message, data = admitted, None
+            elif not limiter.allow(message_type):
+                continue
             
-            elif message_type == WSMessageType.WEBRTC_OFFER:
-                # Forward WebRTC offer to specific player
-                target_player = message_data.get("target_player_id")
-                if target_player:
-                    await manager.send_personal_message({
-                        "type": WSMessageType.WEBRTC_OFFER,
-                        "data": {
-                            "from_player_id": player_id,
-                            "offer": message_data.get("offer")
-                        }
-                    }, room_code, target_player)
-            
-            elif message_type == WSMessageType.WEBRTC_ANSWER:
-                # Forward WebRTC answer to specific player
-                target_player = message_data.get("target_player_id")
-                if target_player:
-                    await manager.send_personal_message({
-                        "type": WSMessageType.WEBRTC_ANSWER,
-                        "data": {
-                            "from_player_id": player_id,
-                            "answer": message_data.get("answer")
-                        }
-                    }, room_code, target_player)
+            await process(message, data)
+    
+    except WebSocketDisconnect:
+        print(f"🔌 WebSocket disconnected: {player_id} from {room_code}")
+    
+    except Exception as e:
+        print(f"❌ WebSocket error: {e}")
+    
+    # The only place a socket is unregistered and its player leaves (the heartbeat
+    # evicts on its own); a stale socket of a player who has reconnected leaves the room alone
+    if not connection.evicted and manager.drop(connection):
+        await socket_closed(connection)
+
+
+async def socket_closed(connection: PlayerConnection):
+    """Give the player WS_RESUME_GRACE seconds to reconnect before they leave the room"""
+    if settings.WS_RESUME_GRACE > 0:
+        task = asyncio.create_task(_leave_after_grace(connection))
+        _grace_periods.add(task)
+        task.add_done_callback(_grace_periods.discard)
+    else:
+        await _leave(connection.room_code, connection.player_id)
+
+
+async def _leave_after_grace(connection: PlayerConnection):
+    await asyncio.sleep(settings.WS_RESUME_GRACE)
+    try:
+        # Any newer socket, on any worker, has replaced this one in the session
+        if await SessionService.is_current(connection.room_code, connection.player_id, connection.connection_id):
+            await _leave(connection.room_code, connection.player_id)
+    except Exception as e:
+        print(f"❌ Failed to remove disconnected player {connection.player_id}: {e}")
+
+
+async def _leave(room_code: str, player_id: str):
+    """Run the disconnect handling for a player on the room's owner"""
+    owner = await message_bus.owner(room_code)
+    if owner == message_bus.worker_id:
+        await handle_disconnect(room_code, player_id)
+    else:
+        message_bus.forward(owner, room_code, player_id, "disconnect")
+
+
+def _state_of(message: dict):
+    data = message.get("data")
+    return data.get("state") if type(data) is dict else None
+
+
+async def handle_message(room_code: str, player_id: str, message: dict):
+    """Handle one client message (on the room's owner unless in LOCAL_MESSAGE_TYPES)"""
+    timer = metrics.WS_MESSAGE_TIMERS.get(message.get("type"), _UNKNOWN_MESSAGE_TIMER)
+    start = perf_counter()
+    try:
+        await _dispatch_message(room_code, player_id, message)
+    finally:
+        timer.observe(perf_counter() - start)
+
+
+async def _dispatch_message(room_code: str, player_id: str, message: dict):
+    message_type = message.get("type")
+    message_data = message.get("data", {})
+    
+    # Handle different message types
+    if message_type == WSMessageType.PLAYER_READY:
+        # Update player ready status
+        ready = message_data.get("ready", False)
+        room = await room_cache.apply(
+            room_code, lambda pending: RoomService.set_player_ready(room_code, player_id, ready, pending)
+        )
+        
+        # Broadcast to all players
+        await manager.broadcast_to_room({
+            "type": WSMessageType.PLAYER_READY,
+            "data": {
+                "player_id": player_id,
+                "ready": ready,
+                "room": room.to_dict() if room else None
+            }
+        }, room_code)
+    
+    elif message_type == WSMessageType.GAME_SELECTED:
+        # Host selects a game
+        game_type = GameType(message_data.get("game_type"))
+        room = await room_cache.apply(room_code, lambda pending: RoomService.select_game(room_code, game_type, pending))
+        
+        if room:
+            # Initialize game state
+            player_ids = [p.player_id for p in room.players]
+            initial_state = GameService.initialize_game_state(game_type, player_ids)
+            tick_scheduler.discard(room_code)
             
-            elif message_type == WSMessageType.WEBRTC_ICE_CANDIDATE:
-                # Forward ICE candidate to specific player
-                target_player = message_data.get("target_player_id")
-                if target_player:
-                    await manager.send_personal_message({
-                        "type": WSMessageType.WEBRTC_ICE_CANDIDATE,
-                        "data": {
-                            "from_player_id": player_id,
-                            "candidate": message_data.get("candidate")
-                        }
-                    }, room_code, target_player)
+            if (game_type == GameType.AIR_HOCKEY and settings.AIR_HOCKEY_AUTHORITATIVE
+                    and len(player_ids) >= 2):
+                # Server owns the puck; clients only send PLAYER_INPUT
+                air_hockey_world.add_match(room_code, player_ids[0], player_ids[1])
+                tick_scheduler.add_simulation(GameType.AIR_HOCKEY, air_hockey_world)
+                initial_state["authoritative"] = True
+            elif game_type == GameType.LASER_DODGER and settings.LASER_DODGER_AUTHORITATIVE:
+                # Server spawns lasers and decides hits; clients send hitbox landmarks as PLAYER_INPUT
+                laser_dodger_world.add_match(room_code, player_ids)
+                tick_scheduler.add_simulation(GameType.LASER_DODGER, laser_dodger_world)
+                initial_state["authoritative"] = True
+            elif game_type == GameType.BALLOON_POP and settings.BALLOON_POP_AUTHORITATIVE:
+                # Server spawns balloons and scores pops; clients send pop claims as PLAYER_INPUT
+                seed = balloon_pop_world.add_match(room_code, player_ids)
+                tick_scheduler.add_simulation(GameType.BALLOON_POP, balloon_pop_world)
+                initial_state["authoritative"] = True
+                print(f"🎈 Balloon Pop in room {room_code} seeded {seed}")
+            await room_cache.apply(
+                room_code, lambda pending: RoomService.update_game_state(room_code, initial_state, pending)
+            )
+            state_sync.reset(room_code, initial_state)
+            if game_type == GameType.PICTIONARY:
+                await stroke_stream.reset(room_code)
+            if "time_remaining" in initial_state:
+                # Countdown kept by the server; clients get time_remaining ticks
+                game_clock.start(room_code, game_type, initial_state["time_remaining"])
             
-            elif message_type == WSMessageType.CHAT_MESSAGE:
-                # Broadcast chat message
-                await manager.broadcast_to_room({
-                    "type": WSMessageType.CHAT_MESSAGE,
-                    "data": {
-                        "player_id": player_id,
-                        "message": message_data.get("message", ""),
-                        "username": message_data.get("username", "Unknown")
-                    }
-                }, room_code)
+            # Broadcast game selection (starts state sequence at 0)
+            await manager.broadcast_to_room({
+                "type": WSMessageType.GAME_SELECTED,
+                "data": {
+                    "game_type": game_type.value,
+                    "initial_state": initial_state,
+                    "seq": 0
+                }
+            }, room_code)
+    
+    elif message_type == WSMessageType.GAME_START:
+        # Start the game
+        await manager.broadcast_to_room({
+            "type": WSMessageType.GAME_START,
+            "data": message_data
+        }, room_code)
+    
+    elif message_type == WSMessageType.GAME_STATE_UPDATE:
+        # Update game state
+        state_update = message_data.get("state", {})
+        if air_hockey_world.has_match(room_code):
+            state_update = {
+                key: value for key, value in state_update.items()
+                if key not in air_hockey.SERVER_OWNED_KEYS
+            }
+        elif laser_dodger_world.has_match(room_code):
+            state_update = {
+                key: value for key, value in state_update.items()
+                if key not in laser_dodger.SERVER_OWNED_KEYS
+            }
+        elif balloon_pop_world.has_match(room_code):
+            state_update = {
+                key: value for key, value in state_update.items()
+                if key not in balloon_pop.SERVER_OWNED_KEYS
+            }
+        if game_clock.running(room_code):
+            state_update = {key: value for key, value in state_update.items() if key != "time_remaining"}
+        
+        # Validate update (served from memory once the room is cached)
+        room = await room_cache.get(room_code)
+        if room and room.current_game and state_update:
+            is_valid = GameService.validate_game_update(
+                room.current_game,
+                room.game_state,
+                state_update
+            )
             
-    except WebSocketDisconnect:
-        manager.disconnect(room_code, player_id)
+            if is_valid:
+                if "round" in state_update and game_clock.running(room_code):
+                    # Clients ended the round early (everyone guessed): restart its countdown
+                    game_clock.start(room_code, room.current_game, PICTIONARY_ROUND_SECONDS)
+                    state_update = {**state_update, "time_remaining": PICTIONARY_ROUND_SECONDS}
+                    await stroke_stream.reset(room_code)
+                # Applied and broadcast with everything else received this tick
+                tick_scheduler.submit(room_code, room.current_game, player_id, state_update)
+            else:
+                _REJECTED_INVALID.inc()
+    
+    elif message_type == WSMessageType.PLAYER_INPUT:
+        if laser_dodger_world.has_match(room_code):
+            # Landmark points (or a single x/y) the player's hitbox is built from
+            laser_dodger_world.set_hitbox(room_code, player_id, message_data.get("points", message_data))
+            return
         
-        # Remove player from room
-        await RoomService.leave_room(room_code, player_id)
+        if balloon_pop_world.has_match(room_code):
+            # Pop claim: the balloon's id and where the player's hand was
+            try:
+                x, y = float(message_data["x"]), float(message_data["y"])
+            except (KeyError, TypeError, ValueError):
+                return
+            balloon_pop_world.claim(room_code, player_id, message_data.get("pop"), x, y)
+            return
         
-        # Notify other players
+        # Paddle position for the server-side Air Hockey simulation
+        try:
+            x, y = float(message_data["x"]), float(message_data["y"])
+        except (KeyError, TypeError, ValueError):
+            return
+        air_hockey_world.set_paddle(room_code, player_id, x, y)
+    
+    elif message_type == WSMessageType.DRAW_STROKE:
+        # Only the current drawer draws; points are batched and sent once per tick
+        room = await room_cache.get(room_code)
+        if (room and room.current_game == GameType.PICTIONARY
+                and room.game_state.get("current_drawer") == player_id):
+            if validate_stroke(message_data):
+                stroke_stream.add(room_code, player_id, message_data)
+            else:
+                _REJECTED_INVALID.inc()
+    
+    elif message_type == WSMessageType.DRAW_SNAPSHOT:
+        # Client joined late or missed a DRAW_STROKE seq
+        await manager.send_personal_message(await stroke_stream.snapshot(room_code), room_code, player_id)
+    
+    elif message_type == WSMessageType.GAME_STATE_RESYNC:
+        # Client missed a delta - send it the full state
+        room = await room_cache.get(room_code)
+        if room:
+            await manager.send_personal_message(
+                state_sync.keyframe(room_code, room.game_state), room_code, player_id
+            )
+    
+    elif message_type == WSMessageType.WEBRTC_OFFER:
+        # Forward WebRTC offer to specific player
+        target_player = message_data.get("target_player_id")
+        if target_player:
+            await manager.send_personal_message({
+                "type": WSMessageType.WEBRTC_OFFER,
+                "data": {
+                    "from_player_id": player_id,
+                    "offer": message_data.get("offer")
+                }
+            }, room_code, target_player)
+    
+    elif message_type == WSMessageType.WEBRTC_ANSWER:
+        # Forward WebRTC answer to specific player
+        target_player = message_data.get("target_player_id")
+        if target_player:
+            await manager.send_personal_message({
+                "type": WSMessageType.WEBRTC_ANSWER,
+                "data": {
+                    "from_player_id": player_id,
+                    "answer": message_data.get("answer")
+                }
+            }, room_code, target_player)
+    
+    elif message_type == WSMessageType.WEBRTC_ICE_CANDIDATE:
+        # Forward ICE candidate to specific player
+        target_player = message_data.get("target_player_id")
+        if target_player:
+            await manager.send_personal_message({
+                "type": WSMessageType.WEBRTC_ICE_CANDIDATE,
+                "data": {
+                    "from_player_id": player_id,
+                    "candidate": message_data.get("candidate")
+                }
+            }, room_code, target_player)
+    
+    elif message_type == WSMessageType.CHAT_MESSAGE:
+        # Broadcast chat message
         await manager.broadcast_to_room({
-            "type": WSMessageType.PLAYER_LEFT,
+            "type": WSMessageType.CHAT_MESSAGE,
             "data": {
                 "player_id": player_id,
-                "room_code": room_code
+                "message": message_data.get("message", ""),
+                "username": message_data.get("username", "Unknown")
             }
         }, room_code)
-        
-        print(f"🔌 WebSocket disconnected: {player_id} from {room_code}")
+
+
+async def handle_disconnect(room_code: str, player_id: str):
+    """Remove a disconnected player from the room and notify the others"""
+    # Remove player from room (flushes pending game state first)
+    room = await room_cache.apply(room_code, lambda pending: RoomService.leave_room(room_code, player_id, pending))
+    if not room:
+        tick_scheduler.discard(room_code)
+        state_sync.discard(room_code)
+        await message_bus.release(room_code)
     
-    except Exception as e:
-        print(f"❌ WebSocket error: {e}")
-        manager.disconnect(room_code, player_id)
\ No newline at end of file
+    # Notify other players
+    await manager.broadcast_to_room({
+        "type": WSMessageType.PLAYER_LEFT,
+        "data": {
+            "player_id": player_id,
+            "room_code": room_code
+        }
+    }, room_code)
+
+
+async def _handle_forwarded(room_code: str, player_id: str, kind: str, data: str):
+    """Frames received by other workers for rooms this worker owns"""
+    if kind == "disconnect":
+        await handle_disconnect(room_code, player_id)
+    elif kind == "reload":
+        # Another worker changed the room in Redis (REST join/leave)
+        await room_cache.reload(room_code)
+    else:
+        await handle_message(room_code, player_id, serialization.loads(data))
+
+
+def _reset_room(room_code: str):
+    """Forget local game state for a room whose owner changed; the owner reloads it from Redis"""
+    room_cache.discard(room_code)
+    tick_scheduler.discard(room_code)
+    state_sync.discard(room_code)
+    stroke_stream.discard(room_code)
+
+
+async def _room_swept(room_code: str):
+    """Forget a room the heartbeat deleted for being idle"""
+    _reset_room(room_code)
+    await message_bus.release(room_code)
+
+
+message_bus.forward_handler = _handle_forwarded
+message_bus.ownership_handler = _reset_room
+
+
+def _clock_tick(room_code: str, game_type: GameType, seconds_left: int):
+    """A second of the room's countdown passed; sent with the room's next state tick"""
+    tick_scheduler.submit(room_code, game_type, None, {"time_remaining": seconds_left})
+
+
+async def _clock_expired(room_code: str, game_type: GameType):
+    """The room's countdown ran out: apply it right away, so check_game_end sees it now"""
+    room = await room_cache.get(room_code)
+    if not room or room.current_game != game_type:
+        return
+    update = GameService.clock_expired(game_type, room.game_state, [p.player_id for p in room.players])
+    ended = await tick_scheduler.apply_now(room_code, game_type, update)
+    if not ended and update["time_remaining"] > 0:
+        # Next round, on a clean canvas
+        game_clock.start(room_code, game_type, update["time_remaining"])
+        await stroke_stream.reset(room_code)
+
+
+heartbeat.disconnect_handler = socket_closed
+heartbeat.room_removed_handler = _room_swept
+game_clock.tick_handler = _clock_tick
+game_clock.expiry_handler = _clock_expired
@@ -0,0 +1,323 @@
+from fastapi import WebSocket
+from collections import deque
+from typing import Dict, Deque, Optional, List, Tuple
+from app.services.state_sync import STATE_MESSAGE_TYPES, coalesce
+from app.services.session_service import SessionService, RESUMABLE_EVENT_TYPES
+from app.services.message_bus import MessageBus, message_bus
+from app.services.rate_limiter import ConnectionRateLimiter
+from app.models import WSMessageType, GameType
+from app.utils import serialization, framing
+from app.config import settings
+from app import metrics
+from time import perf_counter, monotonic
+import asyncio
+import secrets
+
+_QUEUE_DEPTH = metrics.SEND_QUEUE_DEPTH.labels()
+_COALESCED = metrics.SLOW_CONSUMER_COUNTERS["coalesced"]
+_DROPPED = metrics.SLOW_CONSUMER_COUNTERS["dropped"]
+_DISCONNECTED = metrics.SLOW_CONSUMER_COUNTERS["disconnected"]
+_LOCAL_FAN_OUT = metrics.BROADCAST_TIMERS["local"]
+_BUS_FAN_OUT = metrics.BROADCAST_TIMERS["bus"]
+
+
+class OutboundMessage:
+    """
+    A message queued for one or more players.
+
+    The same instance is shared by every recipient of a broadcast and encoded
+    at most once per wire format, the first time a writer needs it.
+    """
+    __slots__ = ("type", "_message", "_text", "_binary")
+    
+    def __init__(self, message: dict):
+        self.type = message["type"]
+        self._message = message
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+    
+    @classmethod
+    def from_text(cls, message_type: str, text: str) -> "OutboundMessage":
+        """Wrap a message that was already encoded, e.g. by another worker"""
+        outbound = cls.__new__(cls)
+        outbound.type = message_type
+        outbound._message = None
+        outbound._text = text
+        outbound._binary = None
+        return outbound
+    
+    @property
+    def message(self) -> dict:
+        if self._message is None:
+            self._message = serialization.loads(self._text)
+        return self._message
+    
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = serialization.dumps(self._message)
+        return self._text
+    
+    @property
+    def binary(self) -> bytes:
+        """Binary frame for connections that negotiated framing.MSGPACK_SUBPROTOCOL"""
+        if self._binary is None:
+            self._binary = framing.encode(self.message)
+        return self._binary
+
+
+class PlayerConnection:
+    """
+    A player's socket plus its outbound queue.
+
+    Messages are queued without blocking and written by a dedicated writer
+    task, so one slow client never holds up the rest of the room. When the
+    queue is full the WS_SLOW_CONSUMER_POLICY decides what happens:
+    ``drop_oldest`` drops the oldest queued state update, ``coalesce`` folds
+    consecutive state updates into one while they wait, ``disconnect`` closes the socket.
+    """
+    
+    def __init__(self, websocket: WebSocket, room_code: str, player_id: str, binary: bool = False):
+        self.websocket = websocket
+        self.room_code = room_code
+        self.player_id = player_id
+        self.connection_id = secrets.token_hex(8)  # tells this socket apart from the player's later ones
+        self.binary = binary  # send binary frames instead of JSON text
+        self.game_type: Optional[GameType] = None  # the room's game, as last announced to this socket
+        self.limiter = ConnectionRateLimiter(room_code, player_id)
+        self.last_seen = monotonic()  # when the client last sent anything
+        self.evicted = False  # closed by the heartbeat, which already ran the disconnect handling
+        self._queue: Deque[OutboundMessage] = deque()
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self.closed = False
+    
+    def start(self, first: List[OutboundMessage] = ()):
+        """Start writing; ``first`` goes out ahead of anything queued since the socket connected"""
+        if first:
+            replayed = max((m.message.get("event_seq") or 0 for m in first if m.type in RESUMABLE_EVENT_TYPES),
+                           default=0)
+            # Events broadcast while the replay was read may be in both
+            live = [
+                m for m in self._queue
+                if m.type not in RESUMABLE_EVENT_TYPES or (m.message.get("event_seq") or 0) > replayed
+            ]
+            self._queue = deque(first)
+            self._queue.extend(live)
+            self._wakeup.set()
+        self._writer = asyncio.create_task(self._write_loop())
+    
+    def set_game(self, game_type: Optional[str]):
+        """Track the room's game, which picks the inbound rate limits and update schema"""
+        try:
+            self.game_type = GameType(game_type) if game_type else None
+        except ValueError:
+            self.game_type = None
+        self.limiter.set_game(self.game_type.value if self.game_type else None)
+    
+    def stop(self):
+        """Stop writing; anything still queued is dropped"""
+        self.closed = True
+        self._queue.clear()
+        self.limiter.close()
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+    
+    def enqueue(self, message: OutboundMessage):
+        """Queue a message for this player without waiting for the network"""
+        if self.closed:
+            return
+        
+        if message.type == WSMessageType.GAME_SELECTED:
+            self.set_game(message.message["data"].get("game_type"))
+        
+        if settings.WS_SLOW_CONSUMER_POLICY == "coalesce" and message.type in STATE_MESSAGE_TYPES:
+            # Fold into the state update still waiting at the back of the queue
+            if self._queue and self._queue[-1].type in STATE_MESSAGE_TYPES:
+                self._queue[-1] = OutboundMessage(coalesce(self._queue[-1].message, message.message))
+                _COALESCED.inc()
+                return
+        
+        if len(self._queue) >= settings.WS_SEND_QUEUE_SIZE and not self._make_room():
+            print(f"🐢 Player {self.player_id} too slow, disconnecting from room {self.room_code}")
+            _DISCONNECTED.inc()
+            self.stop()
+            asyncio.create_task(self.close(1013))  # Try again later
+            return
+        
+        self._queue.append(message)
+        self._wakeup.set()
+        _QUEUE_DEPTH.observe(len(self._queue))
+    
+    def _make_room(self) -> bool:
+        """Free one queue slot according to the slow consumer policy"""
+        if settings.WS_SLOW_CONSUMER_POLICY == "disconnect":
+            return False
+        
+        for index, queued in enumerate(self._queue):
+            if queued.type in STATE_MESSAGE_TYPES:
+                del self._queue[index]
+                _DROPPED.inc()
+                return True
+        return False
+    
+    async def close(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+    
+    async def _write_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            
+            while self._queue:
+                message = self._queue.popleft()
+                try:
+                    if self.binary:
+                        await self.websocket.send_bytes(message.binary)
+                    else:
+                        await self.websocket.send_text(message.text)
+                except Exception as e:
+                    # The receive loop sees the socket close and runs the disconnect handling
+                    print(f"Error sending to {self.player_id}: {e}")
+                    self.stop()
+                    await self.close(1011)
+                    return
+
+
+class ConnectionManager:
+    """
+    Sockets connected to this worker, by room.
+    
+    Broadcasts reach local sockets directly and sockets on other workers
+    through the message bus, which hands their messages back to
+    ``deliver_local``.
+    """
+    
+    def __init__(self, bus: MessageBus):
+        self.active_connections: Dict[str, Dict[str, PlayerConnection]] = {}
+        self.bus = bus
+        bus.room_handler = self.deliver_local
+        # room -> resumable events waiting for an event_seq: (message, excluded player, sent)
+        self._events: Dict[str, List[Tuple[dict, Optional[str], asyncio.Future]]] = {}
+        self._event_writers: Dict[str, asyncio.Task] = {}  # room -> task numbering and sending them
+    
+    async def connect(self, websocket: WebSocket, room_code: str, player_id: str,
+                      subprotocol: Optional[str] = None) -> PlayerConnection:
+        """Connect a player to a room, accepting the negotiated subprotocol if any.
+
+        Messages for the player queue up until the caller starts the connection.
+        """
+        await websocket.accept(subprotocol=subprotocol)
+        
+        if room_code not in self.active_connections:
+            self.active_connections[room_code] = {}
+            self.bus.watch_room(room_code)
+        
+        previous = self.active_connections[room_code].get(player_id)
+        if previous:
+            previous.stop()
+        
+        connection = PlayerConnection(
+            websocket, room_code, player_id, binary=subprotocol == framing.MSGPACK_SUBPROTOCOL
+        )
+        self.active_connections[room_code][player_id] = connection
+        print(f"✅ Player {player_id} connected to room {room_code}")
+        return connection
+    
+    def disconnect(self, room_code: str, player_id: str):
+        """Disconnect a player from a room"""
+        if room_code in self.active_connections:
+            if player_id in self.active_connections[room_code]:
+                self.active_connections[room_code].pop(player_id).stop()
+                print(f"❌ Player {player_id} disconnected from room {room_code}")
+            
+            # Clean up empty rooms
+            if not self.active_connections[room_code]:
+                del self.active_connections[room_code]
+                self.bus.unwatch_room(room_code)
+    
+    def drop(self, connection: PlayerConnection) -> bool:
+        """Disconnect a specific connection; returns False if the player had already reconnected"""
+        if self.active_connections.get(connection.room_code, {}).get(connection.player_id) is connection:
+            self.disconnect(connection.room_code, connection.player_id)
+            return True
+        connection.stop()
+        return False
+    
+    async def send_personal_message(self, message: dict, room_code: str, player_id: str):
+        """Send message to a specific player, wherever they are connected"""
+        connection = self.active_connections.get(room_code, {}).get(player_id)
+        outbound = OutboundMessage(message)
+        if connection:
+            connection.enqueue(outbound)
+        elif self.bus.running:
+            self.bus.publish(room_code, outbound.type, outbound.text, target=player_id)
+    
+    async def broadcast_to_room(self, message: dict, room_code: str, exclude_player: str = None):
+        """Broadcast message to all players in a room (queued per player, never blocks)"""
+        if message["type"] in RESUMABLE_EVENT_TYPES:
+            # Numbered and kept for players who reconnect: queued for the room's event
+            # writer, which sends in event_seq order; returns once it has been sent
+            sent = asyncio.get_running_loop().create_future()
+            self._events.setdefault(room_code, []).append((message, exclude_player, sent))
+            if room_code not in self._event_writers:
+                self._event_writers[room_code] = asyncio.create_task(self._write_events(room_code))
+            await sent
+            return
+        self._send(message, room_code, exclude_player)
+    
+    async def _write_events(self, room_code: str):
+        """Number the room's queued events (one round trip per batch) and send them in that order"""
+        try:
+            while self._events.get(room_code):
+                events = self._events.pop(room_code)
+                try:
+                    seqs = await SessionService.record_events(room_code, [message for message, _, _ in events])
+                except Exception as e:
+                    for _, _, sent in events:
+                        if not sent.done():
+                            sent.set_exception(e)
+                    continue
+                
+                for (message, exclude_player, sent), seq in zip(events, seqs):
+                    message["event_seq"] = seq
+                    self._send(message, room_code, exclude_player)
+                    if not sent.done():
+                        sent.set_result(None)
+        finally:
+            del self._event_writers[room_code]
+    
+    def _send(self, message: dict, room_code: str, exclude_player: Optional[str]):
+        # Encoded once, lazily, and shared by every recipient on every worker
+        start = perf_counter()
+        outbound = OutboundMessage(message)
+        self._fan_out(outbound, room_code, exclude_player)
+        if self.bus.running:
+            self.bus.publish(room_code, outbound.type, outbound.text, exclude=exclude_player)
+        _LOCAL_FAN_OUT.observe(perf_counter() - start)
+    
+    def deliver_local(self, room_code: str, message_type: str, text: str,
+                      exclude_player: Optional[str] = None, target_player: Optional[str] = None):
+        """Deliver a message published by another worker to this worker's sockets"""
+        outbound = OutboundMessage.from_text(message_type, text)
+        if target_player:
+            connection = self.active_connections.get(room_code, {}).get(target_player)
+            if connection:
+                connection.enqueue(outbound)
+        else:
+            start = perf_counter()
+            self._fan_out(outbound, room_code, exclude_player)
+            _BUS_FAN_OUT.observe(perf_counter() - start)
+    
+    def _fan_out(self, outbound: OutboundMessage, room_code: str, exclude_player: Optional[str]):
+        for player_id, connection in list(self.active_connections.get(room_code, {}).items()):
+            if player_id != exclude_player:
+                connection.enqueue(outbound)
+
+
+manager = ConnectionManager(message_bus)
+metrics.ACTIVE_ROOMS.set_function(lambda: len(manager.active_connections))
+metrics.ACTIVE_CONNECTIONS.set_function(lambda: sum(map(len, manager.active_connections.values())))
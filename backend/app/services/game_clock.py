@@ -0,0 +1,106 @@
+import asyncio
+from typing import Dict, Optional, Callable, Awaitable
+from app.models import GameType
+from app.utils.timer_wheel import TimerWheel, Timer
+from app.config import settings
+
+
+class _Clock:
+    __slots__ = ("game_type", "deadline", "remaining", "timer")
+    
+    def __init__(self, game_type: GameType, deadline: float, remaining: int):
+        self.game_type = game_type
+        self.deadline = deadline  # loop time the countdown reaches zero
+        self.remaining = remaining  # whole seconds left, as last sent to clients
+        self.timer: Optional[Timer] = None
+
+
+class GameClock:
+    """
+    Server-side countdowns (``time_remaining``) for every room on this worker.
+
+    Each running clock has one timer in a shared hierarchical timer wheel,
+    due at its next whole second; a single task advances the wheel every
+    GAME_CLOCK_RESOLUTION seconds while any clock runs. On each second the
+    tick handler gets the seconds left; at zero the expiry handler decides
+    what happens (end the game, start the next round).
+    """
+    
+    def __init__(self):
+        self.tick_handler: Optional[Callable[[str, GameType, int], None]] = None  # room, game, seconds left
+        self.expiry_handler: Optional[Callable[[str, GameType], Awaitable[None]]] = None  # room, game
+        self._clocks: Dict[str, _Clock] = {}
+        self._wheel: Optional[TimerWheel] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+    
+    def running(self, room_code: str) -> bool:
+        return room_code in self._clocks
+    
+    def start(self, room_code: str, game_type: GameType, seconds: int):
+        """(Re)start the room's countdown from ``seconds``"""
+        self.cancel(room_code)
+        loop = asyncio.get_running_loop()
+        if self._wheel is None:
+            self._wheel = TimerWheel(settings.GAME_CLOCK_RESOLUTION, now=loop.time())
+        elif not len(self._wheel):
+            # Nothing ran while the wheel sat idle: skip its idle ticks in one step
+            self._wheel.advance(loop.time())
+        
+        clock = self._clocks[room_code] = _Clock(game_type, loop.time() + seconds, seconds)
+        self._schedule(room_code, clock)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        self._wake.set()
+    
+    def cancel(self, room_code: str):
+        clock = self._clocks.pop(room_code, None)
+        if clock and clock.timer:
+            self._wheel.cancel(clock.timer)
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._clocks.clear()
+        self._wheel = None
+    
+    def _schedule(self, room_code: str, clock: _Clock):
+        """Timer for the clock's next whole second"""
+        clock.timer = self._wheel.schedule(clock.deadline - (clock.remaining - 1), (room_code, clock))
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._wheel:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            await asyncio.sleep(max(0.0, self._wheel.next_tick_time - loop.time()))
+            for room_code, clock in self._wheel.advance(loop.time()):
+                try:
+                    await self._fire(room_code, clock)
+                except Exception as e:
+                    print(f"❌ Game clock error in room {room_code}: {e}")
+    
+    async def _fire(self, room_code: str, clock: _Clock):
+        if self._clocks.get(room_code) is not clock:
+            return  # cancelled or restarted by an earlier handler in this batch
+        clock.remaining -= 1
+        if clock.remaining > 0:
+            self._schedule(room_code, clock)
+            if self.tick_handler:
+                self.tick_handler(room_code, clock.game_type, clock.remaining)
+            return
+        
+        del self._clocks[room_code]
+        if self.expiry_handler:
+            await self.expiry_handler(room_code, clock.game_type)
+
+
+# Global game clock for this worker's rooms
+game_clock = GameClock()
@@ -0,0 +1,229 @@
+"""
+Schemas for client game state updates, one per GameType.
+
+Each schema lists the keys a client may set and what their values may
+look like. Schemas are compiled into plain closures when this module is
+imported: per-key checks live in a dict, types are compared exactly and
+every list, map and string has a size cap. Validating an update is then
+one dict lookup and a few comparisons per key, and no update can grow a
+room's state beyond what the game needs.
+"""
+from typing import Any, Callable, Dict, Optional
+from app.models import GameType
+from app.config import settings
+
+Check = Callable[[Any], bool]
+
+MAX_UPDATE_KEYS = 32
+MAX_STRING = 64
+MAX_COORDINATE = 10_000
+MAX_PLAYERS = settings.MAX_PLAYERS_PER_ROOM
+
+
+# ============================================
+# Checks
+# ============================================
+
+def integer(minimum: int = -2 ** 31, maximum: int = 2 ** 31) -> Check:
+    def check(value) -> bool:
+        return type(value) is int and minimum <= value <= maximum
+    return check
+
+
+def number(minimum: float = -1e9, maximum: float = 1e9) -> Check:
+    # The bounds also reject NaN, which fails every comparison
+    def check(value) -> bool:
+        return (type(value) is int or type(value) is float) and minimum <= value <= maximum
+    return check
+
+
+def boolean() -> Check:
+    def check(value) -> bool:
+        return type(value) is bool
+    return check
+
+
+def string(max_length: int = MAX_STRING) -> Check:
+    def check(value) -> bool:
+        return type(value) is str and len(value) <= max_length
+    return check
+
+
+def optional(inner: Check) -> Check:
+    def check(value) -> bool:
+        return value is None or inner(value)
+    return check
+
+
+def list_of(item: Check, max_items: int) -> Check:
+    def check(value) -> bool:
+        return type(value) is list and len(value) <= max_items and all(map(item, value))
+    return check
+
+
+def map_of(item: Check, max_items: int, max_key_length: int = MAX_STRING) -> Check:
+    """Dict with arbitrary string keys (e.g. player ids)"""
+    def check(value) -> bool:
+        return (
+            type(value) is dict and len(value) <= max_items
+            and all(type(key) is str and len(key) <= max_key_length for key in value)
+            and all(map(item, value.values()))
+        )
+    return check
+
+
+def record(required: Optional[Dict[str, Check]] = None, **fields: Check) -> Check:
+    """Dict with known keys: all of ``required`` and any of ``fields``"""
+    required = required or {}
+    checks = {**fields, **required}
+    required_keys = frozenset(required)
+    
+    def check(value) -> bool:
+        if type(value) is not dict or len(value) > len(checks) or not required_keys <= value.keys():
+            return False
+        for key, field_value in value.items():
+            field_check = checks.get(key)
+            if field_check is None or not field_check(field_value):
+                return False
+        return True
+    return check
+
+
+def pair(minimum: float = -MAX_COORDINATE, maximum: float = MAX_COORDINATE) -> Check:
+    """[x, y]"""
+    coordinate = number(minimum, maximum)
+    
+    def check(value) -> bool:
+        return type(value) is list and len(value) == 2 and coordinate(value[0]) and coordinate(value[1])
+    return check
+
+
+def point() -> Check:
+    coordinate = number(-MAX_COORDINATE, MAX_COORDINATE)
+    return record(required={"x": coordinate, "y": coordinate})
+
+
+# ============================================
+# Update schemas
+# ============================================
+
+class UpdateSchema:
+    """Keys a client may send for one game; ``prefixes`` match per-player keys like ``position_<id>``"""
+    
+    def __init__(self, fields: Dict[str, Check], prefixes: Optional[Dict[str, Check]] = None):
+        self.fields = fields
+        self.prefixes = tuple((prefixes or {}).items())
+    
+    def validate(self, update: Any) -> bool:
+        if type(update) is not dict or not update or len(update) > MAX_UPDATE_KEYS:
+            return False
+        fields = self.fields
+        for key, value in update.items():
+            check = fields.get(key)
+            if check is None:
+                check = self._prefixed(key)
+                if check is None:
+                    return False
+            if not check(value):
+                return False
+        return True
+    
+    def _prefixed(self, key: Any) -> Optional[Check]:
+        if type(key) is str and len(key) <= MAX_STRING:
+            for prefix, check in self.prefixes:
+                if key.startswith(prefix):
+                    return check
+        return None
+
+
+# Keys every game accepts
+_COMMON = {
+    "game_started": boolean(),
+    "winner": optional(string()),
+    "sent_at": number(0, 1e13),  # client clock at send, for interpolation and latency measurement
+}
+
+_player_id = string()
+_scores = map_of(number(0, 1e6), MAX_PLAYERS)
+
+SCHEMAS: Dict[GameType, UpdateSchema] = {
+    GameType.AIR_HOCKEY: UpdateSchema({
+        **_COMMON,
+        "player1_score": integer(0, 1000),
+        "player2_score": integer(0, 1000),
+        "player1_id": optional(_player_id),
+        "player2_id": optional(_player_id),
+        "puck_position": point(),
+        "puck_velocity": point(),
+        "player1_paddle": point(),
+        "player2_paddle": point(),
+    }),
+    GameType.PICTIONARY: UpdateSchema({
+        **_COMMON,
+        "current_drawer": optional(_player_id),
+        "drawer_index": integer(0, MAX_PLAYERS),
+        "current_word": optional(string()),
+        "guessed_players": list_of(_player_id, MAX_PLAYERS),
+        "round": integer(0, 100),
+        "max_rounds": integer(0, 100),
+        "time_remaining": number(0, 3600),
+        "scores": _scores,
+        "strokes": list_of(record(
+            required={"points": list_of(pair(), 256)},
+            color=string(16),
+            width=number(0, 100),
+        ), 32),
+        "clear_canvas": boolean(),
+    }),
+    GameType.LASER_DODGER: UpdateSchema({
+        **_COMMON,
+        "alive_players": list_of(_player_id, MAX_PLAYERS),
+        "player_health": map_of(number(0, 100), MAX_PLAYERS),
+        "lasers": list_of(record(
+            x=number(-MAX_COORDINATE, MAX_COORDINATE),
+            y=number(-MAX_COORDINATE, MAX_COORDINATE),
+            angle=number(-360, 360),
+            speed=number(0, 1000),
+            width=number(0, 1000),
+            length=number(0, MAX_COORDINATE),
+        ), 64),
+        "game_speed": number(0, 100),
+    }, prefixes={
+        "position_": point(),
+    }),
+    GameType.BALLOON_POP: UpdateSchema({
+        **_COMMON,
+        "scores": _scores,
+        "time_remaining": number(0, 3600),
+        "balloons": list_of(record(
+            id=optional(string()),
+            x=number(-MAX_COORDINATE, MAX_COORDINATE),
+            y=number(-MAX_COORDINATE, MAX_COORDINATE),
+            radius=number(0, 1000),
+            speed=number(0, 1000),
+            color=string(16),
+            popped=boolean(),
+        ), 100),
+    }),
+}
+
+
+# DRAW_STROKE data (see stroke_stream): new points of a stroke, or a clear
+_stroke = record(
+    stroke=integer(0, 2 ** 31),
+    points=list_of(pair(), 256),
+    color=string(16),
+    width=number(0, 100),
+    clear=boolean(),
+)
+
+
+def validate_stroke(data: Any) -> bool:
+    """Whether ``data`` is a well-formed DRAW_STROKE payload"""
+    return _stroke(data) and (data.get("clear") is True or ("stroke" in data and bool(data.get("points"))))
+
+
+def validate_update(game_type: GameType, update: Any) -> bool:
+    """Whether ``update`` is a well-formed state update for the game"""
+    schema = SCHEMAS.get(game_type)
+    return schema is not None and schema.validate(update)
@@ -1,11 +1,23 @@
 from typing import Dict, Any
 from app.models import GameType
+from app.services.game_schemas import validate_update
+
+PICTIONARY_ROUND_SECONDS = 45
+BALLOON_POP_SECONDS = 60
+
+# State that only counts up during a game: clients may raise it, never lower it
+_COUNTERS = ("player1_score", "player2_score", "round")
 
 
 class GameService:
     """
-    Game logic is primarily handled on the frontend for better performance.
-    Backend only validates and broadcasts state updates.
+    Game rules that live on the server: each game's initial state, checks on
+    client state updates, countdown expiry and the end condition.
+
+    Clients still run most of the gameplay and send state updates, which are
+    validated here and broadcast. The server simulations in app.simulation
+    own some keys outright when enabled, and the countdowns are the game
+    clock's.
     """
     
     @staticmethod
@@ -31,7 +43,7 @@ class GameService:
                 "guessed_players": [],
                 "round": 1,
                 "max_rounds": len(players),
-                "time_remaining": 45,
+                "time_remaining": PICTIONARY_ROUND_SECONDS,
                 "scores": {p: 0 for p in players}
             }
         
@@ -48,7 +60,7 @@ class GameService:
         elif game_type == GameType.BALLOON_POP:
             return {
                 "scores": {p: 0 for p in players},
-                "time_remaining": 60,
+                "time_remaining": BALLOON_POP_SECONDS,
                 "balloons": [],
                 "game_started": False,
                 "winner": None
@@ -58,24 +70,38 @@ class GameService:
     
     @staticmethod
     def validate_game_update(game_type: GameType, current_state: Dict[str, Any], update: Dict[str, Any]) -> bool:
-        """Validate game state update (basic validation)"""
+        """Validate a client state update: it must match the game's schema (see game_schemas)
+        and may not lower a score or go back a round"""
+        if not validate_update(game_type, update):
+            return False
         
-        # Basic validation - can be expanded
-        if game_type == GameType.AIR_HOCKEY:
-            if "player1_score" in update and "player2_score" in update:
-                return (
-                    isinstance(update["player1_score"], int) and 
-                    isinstance(update["player2_score"], int) and
-                    update["player1_score"] >= 0 and
-                    update["player2_score"] >= 0
-                )
+        for key in _COUNTERS:
+            if key in update and update[key] < (current_state.get(key) or 0):
+                return False
+        scores = update.get("scores")
+        if scores:
+            current = current_state.get("scores") or {}
+            if any(score < (current.get(player_id) or 0) for player_id, score in scores.items()):
+                return False
+        return True
+    
+    @staticmethod
+    def clock_expired(game_type: GameType, game_state: Dict[str, Any], players: list) -> Dict[str, Any]:
+        """State update for when the game's countdown (see game_clock) runs out"""
         
-        elif game_type == GameType.BALLOON_POP:
-            if "scores" in update:
-                return all(isinstance(v, (int, float)) and v >= 0 for v in update["scores"].values())
+        if game_type == GameType.PICTIONARY:
+            # Round over: the next player draws (past max_rounds, check_game_end ends the game)
+            drawer_index = (game_state.get("drawer_index", 0) + 1) % max(len(players), 1)
+            return {
+                "round": game_state.get("round", 1) + 1,
+                "drawer_index": drawer_index,
+                "current_drawer": players[drawer_index] if players else None,
+                "current_word": None,
+                "guessed_players": [],
+                "time_remaining": PICTIONARY_ROUND_SECONDS
+            }
         
-        # Add more validation as needed
-        return True
+        return {"time_remaining": 0}
     
     @staticmethod
     def check_game_end(game_type: GameType, game_state: Dict[str, Any]) -> tuple[bool, Any]:
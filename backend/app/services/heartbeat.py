@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import Optional, Callable, Awaitable
+from app.models import WSMessageType
+from app.services.connection_manager import ConnectionManager, PlayerConnection, OutboundMessage, manager
+from app.services.room_service import RoomService
+from app import metrics
+from app.config import settings
+
+
+class Heartbeat:
+    """
+    Keeps sockets and rooms tied to players who are actually there.
+
+    Every WS_HEARTBEAT_INTERVAL seconds this worker:
+    - pings sockets that have been quiet for a whole interval (clients answer
+      PONG; any frame from the client counts as a sign of life),
+    - evicts sockets that sent nothing for WS_HEARTBEAT_TIMEOUT seconds: the
+      socket is closed and handled like any other that disconnected,
+    - marks the rooms it has sockets for as active, refreshing their TTL,
+    - deletes rooms with no activity for ROOM_IDLE_TIMEOUT seconds, e.g.
+      rooms whose players never connected or whose worker died.
+    """
+    
+    def __init__(self, connections: ConnectionManager):
+        self.connections = connections
+        self.disconnect_handler: Optional[Callable[[PlayerConnection], Awaitable[None]]] = None
+        self.room_removed_handler: Optional[Callable[[str], Awaitable[None]]] = None  # room_code
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the background heartbeat loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_INTERVAL)
+            try:
+                await self.beat()
+            except Exception as e:
+                print(f"❌ Heartbeat error: {e}")
+    
+    async def beat(self):
+        """Run one heartbeat: ping, evict, refresh rooms, sweep idle rooms"""
+        now = time.monotonic()
+        ping = OutboundMessage({"type": WSMessageType.PING, "data": {"time": time.time()}})
+        for room_connections in list(self.connections.active_connections.values()):
+            for connection in list(room_connections.values()):
+                silent = now - connection.last_seen
+                if silent > settings.WS_HEARTBEAT_TIMEOUT:
+                    await self._evict(connection)
+                elif silent >= settings.WS_HEARTBEAT_INTERVAL:
+                    connection.enqueue(ping)
+        
+        rooms = list(self.connections.active_connections)
+        for room_code in await RoomService.touch_and_sweep_rooms(rooms, settings.ROOM_IDLE_TIMEOUT):
+            metrics.ROOMS_SWEPT.inc()
+            print(f"🧹 Deleted idle room {room_code}")
+            if self.room_removed_handler:
+                await self.room_removed_handler(room_code)
+    
+    async def _evict(self, connection: PlayerConnection):
+        print(f"💀 Player {connection.player_id} timed out in room {connection.room_code}")
+        metrics.HEARTBEAT_EVICTIONS.inc()
+        connection.evicted = True
+        current = self.connections.drop(connection)
+        asyncio.create_task(connection.close(1001))  # Going away
+        if current and self.disconnect_handler:
+            try:
+                await self.disconnect_handler(connection)
+            except Exception as e:
+                print(f"❌ Failed to remove timed out player {connection.player_id}: {e}")
+
+
+# Global heartbeat for this worker's sockets
+heartbeat = Heartbeat(manager)
@@ -0,0 +1,291 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from typing import Dict, Deque, Optional, Set, Tuple, Callable, Awaitable
+from app.database import db, RedisDB
+from app.memory_store import MemoryStore
+from app.utils import serialization
+from app import metrics
+from app.config import settings
+
+# Channel/key layout
+ROOM_CHANNEL = "room:{}:events"  # room broadcasts and targeted messages
+WORKER_CHANNEL = "worker:{}:inbox"  # client frames forwarded to the room's owner
+OWNER_KEY = "room:{}:owner"  # worker that runs the room's game logic
+
+# Extend ownership only while we still hold it
+_RENEW_OWNER = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_OWNER = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _renew_owner(store: MemoryStore, keys: list, args: list):
+    if store.get(keys[0]) == args[0]:
+        return int(store.expire(keys[0], int(args[1])))
+    return 0
+
+
+def _release_owner(store: MemoryStore, keys: list, args: list):
+    if store.get(keys[0]) == args[0]:
+        del store[keys[0]]
+        return 1
+    return 0
+
+
+# room_code, message type, encoded message, excluded player, target player
+RoomHandler = Callable[[str, str, str, Optional[str], Optional[str]], None]
+# room_code, player_id, kind ("message", "disconnect" or "reload"), raw client frame
+ForwardHandler = Callable[[str, str, str, str], Awaitable[None]]
+
+
+def _envelope(header: dict, body: str) -> str:
+    # JSON never contains a raw newline, so the body can follow the header as-is
+    return serialization.dumps(header) + "\n" + body
+
+
+class MessageBus:
+    """
+    Connects the WebSocket workers of one deployment through pub/sub.
+
+    Every room has one owning worker (``room:{code}:owner``, a short lease
+    renewed while the worker is alive) that runs its game logic: room cache,
+    tick loop and state sequence. Workers holding sockets for a room
+    subscribe to the room's channel; broadcasts are delivered to local
+    sockets directly and published once, already encoded, for the other
+    workers to fan out to theirs. Messages for a single player (WebRTC
+    signaling, resyncs) travel the same channel with a target, and client
+    frames received by a worker that does not own the room are forwarded to
+    the owner's inbox channel.
+
+    Publishing never waits for Redis: messages are queued and written in
+    pipelined batches by a background task.
+    """
+    
+    def __init__(self, database: RedisDB = db):
+        self.db = database
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.room_handler: Optional[RoomHandler] = None
+        self.forward_handler: Optional[ForwardHandler] = None
+        self.ownership_handler: Optional[Callable[[str], None]] = None  # ownership gained or lost
+        
+        self._subscription = None
+        self._rooms: Set[str] = set()  # rooms this worker has sockets for
+        self._owned: Set[str] = set()
+        self._owners: Dict[str, Tuple[str, float]] = {}  # room_code -> (owner, resolved at)
+        self._outbox: Deque[Tuple[str, str]] = deque()
+        self._wakeup = asyncio.Event()
+        self._tasks: list = []
+        self._renew_script = database.register_script(_RENEW_OWNER, _renew_owner)
+        self._release_script = database.register_script(_RELEASE_OWNER, _release_owner)
+    
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+    
+    async def start(self):
+        """Subscribe to this worker's inbox and start the listener, publisher and lease tasks"""
+        if not settings.MESSAGE_BUS_ENABLED or self.running:
+            return
+        
+        self._subscription = self.db.subscription()
+        await self._subscription.subscribe(WORKER_CHANNEL.format(self.worker_id))
+        if self._rooms:
+            await self._subscription.subscribe(*(ROOM_CHANNEL.format(room) for room in self._rooms))
+        self._tasks = [
+            asyncio.create_task(self._listen_loop()),
+            asyncio.create_task(self._publish_loop()),
+            asyncio.create_task(self._renew_loop()),
+        ]
+        print(f"📡 Message bus started (worker {self.worker_id})")
+    
+    async def stop(self):
+        """Publish what is queued, release owned rooms and close the subscription"""
+        if not self.running:
+            return
+        
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        
+        try:
+            await self._flush_outbox()
+            for room_code in list(self._owned):
+                await self.release(room_code)
+            await self._subscription.close()
+        except Exception as e:
+            print(f"❌ Message bus shutdown error: {e}")
+        self._subscription = None
+    
+    # Room channels
+    
+    def watch_room(self, room_code: str):
+        """Receive a room's broadcasts (called for the first local socket)"""
+        if room_code in self._rooms:
+            return
+        self._rooms.add(room_code)
+        if self.running:
+            asyncio.create_task(self._subscription.subscribe(ROOM_CHANNEL.format(room_code)))
+    
+    def unwatch_room(self, room_code: str):
+        """Stop receiving a room's broadcasts (called when its last local socket closes)"""
+        if room_code not in self._rooms:
+            return
+        self._rooms.discard(room_code)
+        if self.running:
+            asyncio.create_task(self._subscription.unsubscribe(ROOM_CHANNEL.format(room_code)))
+    
+    def publish(self, room_code: str, message_type: str, text: str,
+                exclude: Optional[str] = None, target: Optional[str] = None):
+        """Send an encoded message to the room's sockets on the other workers"""
+        if not self.running:
+            return
+        header = {"o": self.worker_id, "k": message_type, "x": exclude, "t": target}
+        self._enqueue(ROOM_CHANNEL.format(room_code), _envelope(header, text))
+    
+    def forward(self, owner: str, room_code: str, player_id: str, kind: str, data: str = ""):
+        """Hand a client frame (or a disconnect, or a reload after a REST change) to the worker that owns the room"""
+        header = {"o": self.worker_id, "r": room_code, "p": player_id, "k": kind}
+        self._enqueue(WORKER_CHANNEL.format(owner), _envelope(header, data))
+    
+    # Room ownership
+    
+    async def owner(self, room_code: str, claim: bool = True) -> Optional[str]:
+        """Worker id of the room's owner, claiming the room if nobody owns it
+        (with ``claim=False``, None if nobody does)"""
+        if not self.running or room_code in self._owned:
+            return self.worker_id
+        
+        now = time.monotonic()
+        cached = self._owners.get(room_code)
+        if cached and now - cached[1] < settings.ROOM_OWNER_TTL / 3:
+            return cached[0]
+        
+        key = OWNER_KEY.format(room_code)
+        if not claim:
+            owner = await self.db.get(key)
+            if owner:
+                self._owners[room_code] = (owner, now)
+            return owner
+        for _ in range(2):
+            # Claim and read back in one round trip
+            claimed, owner = await self.db.batch("claim_room").set_nx(
+                key, self.worker_id, expire=settings.ROOM_OWNER_TTL
+            ).get(key).execute()
+            if claimed:
+                self._owners.pop(room_code, None)
+                self._owned.add(room_code)
+                self._ownership_changed(room_code)
+                return self.worker_id
+            if owner == self.worker_id:
+                self._owned.add(room_code)
+                return owner
+            if owner:  # otherwise the lease expired in between: try to claim again
+                self._owners[room_code] = (owner, now)
+                return owner
+        return self.worker_id
+    
+    async def is_owner(self, room_code: str) -> bool:
+        return await self.owner(room_code) == self.worker_id
+    
+    def owns(self, room_code: str) -> bool:
+        """Whether this worker holds the room's lease right now (never claims it)"""
+        return not self.running or room_code in self._owned
+    
+    async def release(self, room_code: str):
+        """Give up a room, e.g. once it has been deleted"""
+        self._owners.pop(room_code, None)
+        if room_code in self._owned:
+            self._owned.discard(room_code)
+            await self._release_script([OWNER_KEY.format(room_code)], [self.worker_id])
+    
+    def _ownership_changed(self, room_code: str):
+        if self.ownership_handler:
+            try:
+                self.ownership_handler(room_code)
+            except Exception as e:
+                print(f"❌ Ownership handler error in room {room_code}: {e}")
+    
+    # Background tasks
+    
+    def _enqueue(self, channel: str, data: str):
+        self._outbox.append((channel, data))
+        self._wakeup.set()
+    
+    async def _flush_outbox(self):
+        while self._outbox:
+            batch = [self._outbox.popleft() for _ in range(len(self._outbox))]
+            await self.db.publish_many(batch)
+    
+    async def _publish_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self._flush_outbox()
+            except Exception as e:
+                print(f"❌ Message bus publish error: {e}")
+    
+    async def _listen_loop(self):
+        while True:
+            try:
+                received = await self._subscription.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Message bus receive error: {e}")
+                await asyncio.sleep(1)
+                continue
+            
+            if received:
+                try:
+                    await self._dispatch(*received)
+                except Exception as e:
+                    print(f"❌ Message bus dispatch error: {e}")
+    
+    async def _dispatch(self, channel: str, data: str):
+        header, _, body = data.partition("\n")
+        header = serialization.loads(header)
+        if header["o"] == self.worker_id:
+            return  # already delivered locally
+        
+        if channel.startswith("worker:"):
+            if self.forward_handler:
+                await self.forward_handler(header["r"], header["p"], header["k"], body)
+        elif self.room_handler:
+            room_code = channel[len("room:"):-len(":events")]
+            self.room_handler(room_code, header["k"], body, header["x"], header["t"])
+    
+    async def _renew_loop(self):
+        while True:
+            await asyncio.sleep(settings.ROOM_OWNER_TTL / 3)
+            for room_code in list(self._owned):
+                try:
+                    renewed = await self._renew_script(
+                        [OWNER_KEY.format(room_code)], [self.worker_id, settings.ROOM_OWNER_TTL]
+                    )
+                except Exception as e:
+                    print(f"❌ Failed to renew room {room_code}: {e}")
+                    continue
+                if not renewed and room_code in self._owned:
+                    # Lease lapsed and another worker may have taken over
+                    self._owned.discard(room_code)
+                    self._ownership_changed(room_code)
+
+
+# Global message bus for this worker
+message_bus = MessageBus()
+metrics.OWNED_ROOMS.set_function(lambda: len(message_bus._owned))
@@ -0,0 +1,154 @@
+import asyncio
+import time
+from typing import Dict, Optional, Callable, Awaitable, Tuple
+from app.models import WSMessageType
+from app.services.game_schemas import MAX_UPDATE_KEYS, MAX_PLAYERS
+from app import metrics
+from app.config import settings
+
+# Message types a client may send; anything else shares the "default" bucket
+_KNOWN_TYPES = frozenset(t.value for t in WSMessageType)
+# State keys one connection may have waiting for a token: one valid update's worth,
+# plus room for per-player keys (position_<id>) that differ between updates
+MAX_HELD_KEYS = MAX_UPDATE_KEYS + MAX_PLAYERS
+
+
+def _limits(game_type: Optional[str]) -> Dict[str, Tuple[float, float]]:
+    """Message type -> (rate, burst) for a game, with the game's overrides applied"""
+    limits = dict(settings.WS_RATE_LIMITS)
+    if game_type:
+        limits.update(settings.WS_GAME_RATE_LIMITS.get(game_type, {}))
+    return {message_type: (float(rate), float(burst)) for message_type, (rate, burst) in limits.items()}
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def take(self) -> bool:
+        """Spend a token if one is available"""
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+    
+    def wait_time(self) -> float:
+        """Seconds until a token is available"""
+        self._refill(time.monotonic())
+        return max(0.0, (1 - self.tokens) / self.rate) if self.rate > 0 else float("inf")
+
+
+class ConnectionRateLimiter:
+    """
+    Inbound rate limits for one WebSocket connection.
+
+    Every message type has a token bucket sized by WS_RATE_LIMITS, with the
+    overrides in WS_GAME_RATE_LIMITS once the room's game is known. Messages
+    over the limit are dropped, except game state updates: those are merged
+    into one held update that goes out as soon as the next token is free,
+    so a client sending faster than allowed loses intermediate frames but
+    never the latest state. Throttling is counted in the
+    ``gamifyou_ws_throttled_total`` metric.
+    """
+    
+    def __init__(self, room_code: str, player_id: str):
+        self.room_code = room_code
+        self.player_id = player_id
+        self.game_type: Optional[str] = None
+        self._limits = _limits(None)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._held: Optional[dict] = None  # merged state updates waiting for a token
+        self._release_task: Optional[asyncio.Task] = None
+        self._warned = False
+    
+    def set_game(self, game_type: Optional[str]):
+        """Switch to a game's limits (called when the room selects a game)"""
+        if game_type != self.game_type:
+            self.game_type = game_type
+            self._limits = _limits(game_type)
+            self._buckets.clear()
+    
+    def _bucket(self, message_type: str) -> TokenBucket:
+        bucket = self._buckets.get(message_type)
+        if bucket is None:
+            rate, burst = self._limits.get(message_type) or self._limits["default"]
+            bucket = self._buckets[message_type] = TokenBucket(rate, burst)
+        return bucket
+    
+    def _throttled(self, message_type: str, action: str):
+        metrics.WS_THROTTLE_COUNTERS[message_type, action].inc()
+        if not self._warned:
+            self._warned = True
+            print(f"🚦 Throttling player {self.player_id} in room {self.room_code} ({message_type})")
+    
+    def allow(self, message_type: str) -> bool:
+        """Whether a message may be handled now; counts it as dropped otherwise"""
+        if type(message_type) is not str or message_type not in _KNOWN_TYPES:
+            message_type = "default"
+        if self._bucket(message_type).take():
+            return True
+        self._throttled(message_type if message_type != "default" else "unknown", "dropped")
+        return False
+    
+    def admit_state(self, message: dict, release: Callable[[dict], Awaitable[None]]) -> Optional[dict]:
+        """Pass a state update through, or hold it until a token is free.
+
+        Returns the message to handle now, which includes any held updates,
+        or None if it was held; held updates are later handed to ``release``.
+        """
+        state = (message.get("data") or {}).get("state")
+        if not isinstance(state, dict):
+            return message  # rejected by validation
+        
+        allowed = self._bucket(WSMessageType.GAME_STATE_UPDATE.value).take()
+        if self._held is None:
+            if allowed:
+                return message
+            self._held = {}
+            self._release_task = asyncio.create_task(self._release_later(release))
+        elif len(self._held.keys() | state.keys()) > MAX_HELD_KEYS:
+            self._throttled(WSMessageType.GAME_STATE_UPDATE.value, "dropped")
+            return None
+        
+        self._held.update(state)
+        if not allowed:
+            self._throttled(WSMessageType.GAME_STATE_UPDATE.value, "coalesced")
+            return None
+        
+        # A token came free before the release task ran: send everything now, in order
+        self._release_task.cancel()
+        return self._take_held()
+    
+    def _take_held(self) -> dict:
+        held, self._held, self._release_task = self._held, None, None
+        return {"type": WSMessageType.GAME_STATE_UPDATE.value, "data": {"state": held}}
+    
+    async def _release_later(self, release: Callable[[dict], Awaitable[None]]):
+        bucket = self._bucket(WSMessageType.GAME_STATE_UPDATE.value)
+        while True:
+            await asyncio.sleep(bucket.wait_time())
+            if bucket.take():
+                break
+        
+        message = self._take_held()
+        try:
+            await release(message)
+        except Exception as e:
+            print(f"❌ Error handling held update from {self.player_id}: {e}")
+    
+    def close(self):
+        """Drop held updates"""
+        if self._release_task:
+            self._release_task.cancel()
+        self._held = self._release_task = None
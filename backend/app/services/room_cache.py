@@ -0,0 +1,188 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Set, Callable, Awaitable
+from app.records import RoomRecord
+from app.services.room_service import RoomService
+from app.config import settings
+from app import metrics
+
+
+class CachedRoom:
+    def __init__(self, room: RoomRecord):
+        self.room = room
+        self.dirty: Set[str] = set()  # game_state keys not yet written to Redis
+        self.last_access = time.monotonic()
+        self.lock = asyncio.Lock()  # serialises flushes with write-through mutations
+
+
+class RoomCache:
+    """
+    Write-behind cache for rooms played on this worker.
+
+    Game state updates are merged in memory and flushed to Redis every
+    ROOM_CACHE_FLUSH_INTERVAL seconds, or right away on significant events
+    (membership changes, game end). Idle rooms are flushed and evicted after
+    ROOM_CACHE_IDLE_TTL seconds, least recently used first once the cache
+    holds more than ROOM_CACHE_MAX_ROOMS.
+    """
+    
+    def __init__(self):
+        self._rooms: "OrderedDict[str, CachedRoom]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the background flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+    
+    async def stop(self):
+        """Stop the flush loop and write out everything pending"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush_all()
+    
+    def _touch(self, room_code: str) -> Optional[CachedRoom]:
+        entry = self._rooms.get(room_code)
+        if entry:
+            entry.last_access = time.monotonic()
+            self._rooms.move_to_end(room_code)
+        return entry
+    
+    def peek(self, room_code: str) -> Optional[RoomRecord]:
+        """Return the cached room without loading it"""
+        entry = self._rooms.get(room_code)
+        return entry.room if entry else None
+    
+    async def get(self, room_code: str) -> Optional[RoomRecord]:
+        """Get a room, loading it from Redis on a miss"""
+        entry = self._touch(room_code)
+        if entry:
+            return entry.room
+        
+        room = await RoomService.get_room(room_code)
+        if not room:
+            return None
+        
+        # Another coroutine may have loaded it while we waited
+        entry = self._touch(room_code)
+        if entry:
+            return entry.room
+        self._rooms[room_code] = CachedRoom(room)
+        return room
+    
+    def merge_game_state(self, room_code: str, state_update: Dict[str, Any]) -> Optional[RoomRecord]:
+        """Merge an update into a cached room's state; written to Redis on the next flush"""
+        entry = self._touch(room_code)
+        if not entry:
+            return None
+        
+        entry.room.game_state = {**entry.room.game_state, **state_update}
+        entry.dirty.update(state_update)
+        return entry.room
+    
+    async def apply(self, room_code: str,
+                    mutation: Callable[[Optional[Dict[str, Any]]], Awaitable[Optional[RoomRecord]]]) -> Optional[RoomRecord]:
+        """Run a RoomService mutation write-through and cache its result.
+
+        The mutation is handed the room's pending state (or None), which it
+        writes ahead of its own change in the same round trip, so it sees
+        current data; a None result (room deleted or missing) drops the room
+        from the cache.
+        """
+        entry = self._touch(room_code)
+        if not entry:
+            room = await mutation(None)
+            if room and room_code not in self._rooms:
+                self._rooms[room_code] = CachedRoom(room)
+            return room
+        
+        async with entry.lock:
+            keys, entry.dirty = entry.dirty, set()
+            state = entry.room.game_state
+            try:
+                room = await mutation({key: state[key] for key in keys} or None)
+            except Exception:
+                entry.dirty |= keys
+                raise
+            
+            if not room:
+                self._rooms.pop(room_code, None)
+                return None
+            
+            # Keep updates merged while the mutation was in flight
+            room.game_state.update({key: entry.room.game_state[key] for key in entry.dirty})
+            entry.room = room
+            return room
+    
+    async def reload(self, room_code: str):
+        """Re-read a cached room that another worker changed in Redis, pending state written first"""
+        if room_code in self._rooms:
+            await self.apply(room_code, lambda pending: RoomService.merge_game_state(room_code, pending or {}))
+    
+    def discard(self, room_code: str):
+        """Drop a room without flushing it, e.g. when another worker takes it over"""
+        self._rooms.pop(room_code, None)
+    
+    async def flush(self, room_code: str):
+        """Write a room's pending game state to Redis"""
+        entry = self._rooms.get(room_code)
+        if entry:
+            async with entry.lock:
+                await self._flush_entry(room_code, entry)
+    
+    async def flush_all(self):
+        """Write every room's pending game state to Redis"""
+        for room_code, entry in list(self._rooms.items()):
+            try:
+                async with entry.lock:
+                    await self._flush_entry(room_code, entry)
+            except Exception as e:
+                print(f"❌ Failed to flush room {room_code}: {e}")
+    
+    async def _flush_entry(self, room_code: str, entry: CachedRoom):
+        if not entry.dirty:
+            return
+        
+        keys, entry.dirty = entry.dirty, set()
+        state = entry.room.game_state
+        try:
+            room = await RoomService.merge_game_state(room_code, {key: state[key] for key in keys})
+        except Exception:
+            entry.dirty |= keys
+            raise
+        
+        # Room expired or was deleted behind our back
+        if not room:
+            self._rooms.pop(room_code, None)
+    
+    async def _evict_idle(self):
+        """Flush and drop idle rooms, then trim to the size limit (LRU first)"""
+        cutoff = time.monotonic() - settings.ROOM_CACHE_IDLE_TTL
+        for room_code, entry in list(self._rooms.items()):
+            # Oldest first: stop at the first room that is neither idle nor over the limit
+            if entry.last_access > cutoff and len(self._rooms) <= settings.ROOM_CACHE_MAX_ROOMS:
+                break
+            async with entry.lock:
+                await self._flush_entry(room_code, entry)
+            if self._rooms.get(room_code) is entry and not entry.dirty:
+                del self._rooms[room_code]
+    
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.ROOM_CACHE_FLUSH_INTERVAL)
+            try:
+                await self.flush_all()
+                await self._evict_idle()
+            except Exception as e:
+                print(f"❌ Room cache flush error: {e}")
+
+
+# Global room cache instance
+room_cache = RoomCache()
+metrics.CACHED_ROOMS.set_function(lambda: len(room_cache._rooms))
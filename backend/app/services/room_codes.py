@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import secrets
+import string
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from app.database import db, RedisDB
+from app.config import settings
+from app import metrics
+
+COUNTER_KEY = "rooms:code_counter"
+SECRET_KEY = "rooms:code_secret"
+ALPHABET = string.ascii_uppercase + string.digits
+FEISTEL_ROUNDS = 4
+MAX_ATTEMPTS = 10
+
+T = TypeVar("T")
+
+
+class RoomCodeAllocator:
+    """
+    Hands out room codes in constant time.
+
+    A shared Redis counter numbers every room ever created; each number is
+    mapped to a code by a keyed permutation of the code space (a Feistel
+    network with cycle walking), so consecutive rooms get unrelated-looking
+    codes and no two numbers share a code until the counter wraps. Workers
+    reserve counter values in blocks of ROOM_CODE_BLOCK_SIZE, so most codes
+    cost no round trip at all. The permutation key is ROOM_CODE_SECRET, or a
+    random key stored in Redis on first use so every worker agrees on it.
+
+    Codes are still claimed atomically by the create script, which refuses a
+    code in use (possible only after a wrap); ``allocate`` then moves on to
+    the next number and counts the collision.
+    """
+    
+    def __init__(self, database: RedisDB = db):
+        self.db = database
+        self._lock = asyncio.Lock()
+        self._key: Optional[bytes] = None
+        self._next = self._end = 0  # reserved counter block [next, end)
+        
+        # Metrics
+        self.allocated = 0
+        self.attempts = 0
+        self.collisions = 0
+        self.blocks_reserved = 0
+        self.attempt_counts: Dict[int, int] = {}  # attempts per allocation -> allocations
+    
+    @property
+    def space(self) -> int:
+        return len(ALPHABET) ** settings.ROOM_CODE_LENGTH
+    
+    async def allocate(self, claim: Callable[[str], Awaitable[Optional[T]]]) -> T:
+        """Call ``claim(code)`` with fresh codes until it returns something other than None"""
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            code = await self.next_code()
+            self.attempts += 1
+            result = await claim(code)
+            if result is not None:
+                self.allocated += 1
+                self.attempt_counts[attempt] = self.attempt_counts.get(attempt, 0) + 1
+                return result
+            self.collisions += 1
+        raise RuntimeError(f"No free room code after {MAX_ATTEMPTS} attempts")
+    
+    async def next_code(self) -> str:
+        """The code for the next counter value (not yet claimed)"""
+        if self._next >= self._end:
+            async with self._lock:
+                if self._key is None:
+                    self._key = await self._load_key()
+                if self._next >= self._end:
+                    block = settings.ROOM_CODE_BLOCK_SIZE
+                    end = await self.db.incr(COUNTER_KEY, block)
+                    self._next, self._end = end - block, end
+                    self.blocks_reserved += 1
+        
+        number = self._next
+        self._next += 1
+        return self.encode(self.permute(number % self.space))
+    
+    async def _load_key(self) -> bytes:
+        secret = settings.ROOM_CODE_SECRET
+        if not secret:
+            _, secret = await self.db.batch("room_code_key").set_nx(
+                SECRET_KEY, f"key-{secrets.token_hex(16)}"
+            ).get(SECRET_KEY).execute()
+            secret = str(secret)
+        return hashlib.blake2b(secret.encode(), digest_size=32).digest()
+    
+    def permute(self, number: int) -> int:
+        """Keyed bijection of [0, space)"""
+        space = self.space
+        bits = space.bit_length()
+        half = (bits + 1) // 2
+        mask = (1 << half) - 1
+        
+        # Cycle walking: the Feistel network permutes [0, 2 ** (2 * half)),
+        # so re-apply it until the value falls back inside the code space
+        while True:
+            left, right = number >> half, number & mask
+            for round_index in range(FEISTEL_ROUNDS):
+                left, right = right, left ^ (self._round(round_index, right) & mask)
+            number = (left << half) | right
+            if number < space:
+                return number
+    
+    def _round(self, round_index: int, value: int) -> int:
+        digest = hashlib.blake2b(
+            value.to_bytes(8, "big"), key=self._key or b"", digest_size=8, salt=bytes([round_index]) * 16
+        ).digest()
+        return int.from_bytes(digest, "big")
+    
+    @staticmethod
+    def encode(number: int) -> str:
+        """Fixed-length code for a number in [0, space)"""
+        chars = []
+        for _ in range(settings.ROOM_CODE_LENGTH):
+            number, digit = divmod(number, len(ALPHABET))
+            chars.append(ALPHABET[digit])
+        return "".join(reversed(chars))
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "allocated": self.allocated,
+            "attempts": self.attempts,
+            "collisions": self.collisions,
+            "blocks_reserved": self.blocks_reserved,
+            "max_attempts": max(self.attempt_counts, default=0),
+        }
+
+
+# Global room code allocator
+room_code_allocator = RoomCodeAllocator()
+for _stat in ("allocated", "attempts", "collisions", "blocks_reserved"):
+    metrics.ROOM_CODES.labels(_stat).set_function(lambda stat=_stat: getattr(room_code_allocator, stat))
@@ -1,175 +1,599 @@
-import random
-import string
-from typing import Optional, List
-from app.models import Room, Player, PlayerStatus, GameType
-from app.database import db
+import time
+from typing import Optional, List, Dict, Any, Tuple
+from app.models import RoomSummary, PlayerStatus, GameType
+from app.records import RoomRecord, PlayerRecord
+from app.database import db, Script
+from app.services.session_service import SessionService
+from app.services.room_codes import room_code_allocator
+from app.memory_store import MemoryStore
 from app.config import settings
+from app.utils import serialization
 from datetime import datetime
 
 
+# ============================================
+# Storage layout
+# ============================================
+# room:{code}:meta     hash of Room scalar fields (host_id, max_players, ...)
+# room:{code}:players  hash of player_id -> Player JSON
+# room:{code}:state    hash of game_state key -> JSON value
+#
+# Every hash value is JSON-encoded, so a game state update only rewrites the
+# fields that changed. Mutations run as Lua scripts: atomic and one round trip,
+# each returning the fresh room as [meta, players, state] field/value lists.
+# Scripts take KEYS = (meta, players, state, room index, open room index) and
+# ARGV = (TTL, now, room_code, ...).
+#
+# Listing indexes, sorted sets of room codes scored by last activity (the
+# last mutation, which is also when the room's TTL was last refreshed):
+# rooms:active         every room
+# rooms:open           rooms with a free slot
+# rooms:game:{game}    rooms playing that game
+# A room whose score is older than ROOM_TTL has expired; listings skip it and
+# remove such entries as they go.
+
+ROOM_INDEX = "rooms:active"
+OPEN_ROOM_INDEX = "rooms:open"
+GAME_INDEX = "rooms:game:{}"
+ALL_INDEXES = [ROOM_INDEX, OPEN_ROOM_INDEX] + [GAME_INDEX.format(game.value) for game in GameType]
+
+_ROOM_SNAPSHOT = """
+for i = 1, 3 do redis.call('EXPIRE', KEYS[i], ARGV[1]) end
+redis.call('ZADD', KEYS[4], ARGV[2], ARGV[3])
+if redis.call('HLEN', KEYS[2]) < tonumber(redis.call('HGET', KEYS[1], 'max_players')) then
+    redis.call('ZADD', KEYS[5], ARGV[2], ARGV[3])
+else
+    redis.call('ZREM', KEYS[5], ARGV[3])
+end
+local game = redis.call('HGET', KEYS[1], 'current_game')
+if game and game ~= 'null' then
+    redis.call('ZADD', 'rooms:game:' .. cjson.decode(game), ARGV[2], ARGV[3])
+end
+return {redis.call('HGETALL', KEYS[1]), redis.call('HGETALL', KEYS[2]), redis.call('HGETALL', KEYS[3])}
+"""
+
+# ARGV: ttl, now, room_code, host_id, host_json, meta field/value pairs...
+_CREATE_ROOM = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return false end
+redis.call('HSET', KEYS[1], unpack(ARGV, 6))
+redis.call('HSET', KEYS[2], ARGV[4], ARGV[5])
+""" + _ROOM_SNAPSHOT
+
+# ARGV: ttl, now, room_code, player_id, player_json
+_JOIN_ROOM = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return false end
+if redis.call('HEXISTS', KEYS[2], ARGV[4]) == 0 then
+    local max_players = tonumber(redis.call('HGET', KEYS[1], 'max_players'))
+    if redis.call('HLEN', KEYS[2]) >= max_players then return false end
+    redis.call('HSET', KEYS[2], ARGV[4], ARGV[5])
+end
+""" + _ROOM_SNAPSHOT
+
+# ARGV: ttl, now, room_code, player_id
+_LEAVE_ROOM = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return false end
+redis.call('HDEL', KEYS[2], ARGV[4])
+if redis.call('HLEN', KEYS[2]) == 0 then
+    local game = redis.call('HGET', KEYS[1], 'current_game')
+    if game and game ~= 'null' then
+        redis.call('ZREM', 'rooms:game:' .. cjson.decode(game), ARGV[3])
+    end
+    redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+    redis.call('ZREM', KEYS[4], ARGV[3])
+    redis.call('ZREM', KEYS[5], ARGV[3])
+    return false
+end
+if cjson.decode(redis.call('HGET', KEYS[1], 'host_id')) == ARGV[4] then
+    local players = redis.call('HGETALL', KEYS[2])
+    local host_id, joined_at
+    for i = 1, #players, 2 do
+        local player = cjson.decode(players[i + 1])
+        if not joined_at or player.joined_at < joined_at then
+            host_id, joined_at = players[i], player.joined_at
+        end
+    end
+    redis.call('HSET', KEYS[1], 'host_id', cjson.encode(host_id))
+end
+""" + _ROOM_SNAPSHOT
+
+# ARGV: ttl, now, room_code, player_id, field, json_value
+_UPDATE_PLAYER = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return false end
+local raw = redis.call('HGET', KEYS[2], ARGV[4])
+if raw then
+    local player = cjson.decode(raw)
+    player[ARGV[5]] = cjson.decode(ARGV[6])
+    redis.call('HSET', KEYS[2], ARGV[4], cjson.encode(player))
+end
+""" + _ROOM_SNAPSHOT
+
+# ARGV: ttl, now, room_code, clear_state ('1' or '0'), meta_arg_count, meta pairs..., state pairs...
+_UPDATE_ROOM = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return false end
+if ARGV[4] == '1' then redis.call('DEL', KEYS[3]) end
+local meta_end = 5 + tonumber(ARGV[5])
+if meta_end > 5 then
+    local old_game = redis.call('HGET', KEYS[1], 'current_game')
+    redis.call('HSET', KEYS[1], unpack(ARGV, 6, meta_end))
+    if old_game and old_game ~= 'null' and old_game ~= redis.call('HGET', KEYS[1], 'current_game') then
+        redis.call('ZREM', 'rooms:game:' .. cjson.decode(old_game), ARGV[3])
+    end
+end
+if #ARGV > meta_end then redis.call('HSET', KEYS[3], unpack(ARGV, meta_end + 1)) end
+""" + _ROOM_SNAPSHOT
+
+# KEYS[1] = index to page through, KEYS[2] = open room index, KEYS[3...] = every
+# index (pruned of expired rooms first).
+# ARGV: now, ttl, cursor score, cursor room_code, limit, free slots only ('1' or '0'), scan budget
+# Returns {next score, next room_code, room_code, score, player_count, max_players, current_game, ...};
+# the cursor is false once the index is exhausted.
+_LIST_ROOMS = """
+local cutoff = tonumber(ARGV[1]) - tonumber(ARGV[2])
+for i = 3, #KEYS do redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', cutoff) end
+
+local max_score, after = ARGV[3], ARGV[4]
+local limit, budget = tonumber(ARGV[5]), tonumber(ARGV[7])
+local rooms, scanned = {}, 0
+local last_score, last_code = false, false
+
+while scanned < budget do
+    local batch = redis.call('ZREVRANGEBYSCORE', KEYS[1], max_score, '(' .. cutoff, 'WITHSCORES', 'LIMIT', 0, limit + 1)
+    local progressed = false
+    for i = 1, #batch, 2 do
+        local code, score = batch[i], batch[i + 1]
+        -- Ties on the cursor score come in descending code order; skip those already returned
+        if not (score == max_score and after ~= '' and code >= after) then
+            progressed = true
+            scanned = scanned + 1
+            last_score, last_code = score, code
+            if ARGV[6] ~= '1' or KEYS[1] == KEYS[2] or redis.call('ZSCORE', KEYS[2], code) then
+                local meta = redis.call('HMGET', 'room:' .. code .. ':meta', 'max_players', 'current_game')
+                table.insert(rooms, code)
+                table.insert(rooms, score)
+                table.insert(rooms, redis.call('HLEN', 'room:' .. code .. ':players'))
+                table.insert(rooms, meta[1] or 'null')
+                table.insert(rooms, meta[2] or 'null')
+                if #rooms / 5 >= limit then
+                    return {last_score, last_code, unpack(rooms)}
+                end
+            end
+            if scanned >= budget then break end
+        end
+    end
+    if scanned >= budget then break end
+    if not progressed or #batch < 2 * (limit + 1) then
+        -- Index exhausted
+        return {false, false, unpack(rooms)}
+    end
+    max_score, after = last_score, last_code
+end
+return {last_score, last_code, unpack(rooms)}
+"""
+
+# Refresh rooms that have connected players, so idle sweeps and TTLs spare them.
+# KEYS = (room index, open room index); ARGV: ttl, now, room codes...
+_TOUCH_ROOMS = """
+local touched = 0
+for i = 3, #ARGV do
+    local code = ARGV[i]
+    local prefix = 'room:' .. code
+    if redis.call('EXISTS', prefix .. ':meta') == 1 then
+        for _, suffix in ipairs({':meta', ':players', ':state'}) do redis.call('EXPIRE', prefix .. suffix, ARGV[1]) end
+        redis.call('ZADD', KEYS[1], ARGV[2], code)
+        redis.call('ZADD', KEYS[2], 'XX', ARGV[2], code)
+        local game = redis.call('HGET', prefix .. ':meta', 'current_game')
+        if game and game ~= 'null' then
+            redis.call('ZADD', 'rooms:game:' .. cjson.decode(game), 'XX', ARGV[2], code)
+        end
+        touched = touched + 1
+    end
+end
+return touched
+"""
+
+# Delete rooms without activity since a cutoff. KEYS = every index (room index first);
+# ARGV: cutoff, limit. Returns the deleted room codes.
+_SWEEP_ROOMS = """
+local codes = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, code in ipairs(codes) do
+    local prefix = 'room:' .. code
+    redis.call('DEL', prefix .. ':meta', prefix .. ':players', prefix .. ':state')
+    for i = 1, #KEYS do redis.call('ZREM', KEYS[i], code) end
+end
+return codes
+"""
+
+
+def _pairs(args: list) -> Dict[str, Any]:
+    return dict(zip(args[::2], args[1::2]))
+
+
+def _flatten(mapping: dict) -> list:
+    return [item for pair in mapping.items() for item in pair]
+
+
+def _current_game(meta: dict) -> Optional[str]:
+    game = meta.get("current_game")
+    return serialization.loads(game) if game and game != "null" else None
+
+
+def _snapshot(store: MemoryStore, keys: list, args: list) -> list:
+    ttl, now, room_code = int(args[0]), float(args[1]), args[2]
+    for key in keys[:3]:
+        store.expire(key, ttl)
+    
+    meta, players = store.get(keys[0], {}), store.get(keys[1], {})
+    store.setdefault(keys[3], {})[room_code] = now
+    if len(players) < int(meta["max_players"]):
+        store.setdefault(keys[4], {})[room_code] = now
+    else:
+        store.get(keys[4], {}).pop(room_code, None)
+    game = _current_game(meta)
+    if game:
+        store.setdefault(GAME_INDEX.format(game), {})[room_code] = now
+    return [_flatten(store.get(key, {})) for key in keys[:3]]
+
+
+def _create_room_fallback(store: MemoryStore, keys: list, args: list):
+    if keys[0] in store:
+        return None
+    store[keys[0]] = _pairs(args[5:])
+    store[keys[1]] = {args[3]: args[4]}
+    return _snapshot(store, keys, args)
+
+
+def _join_room_fallback(store: MemoryStore, keys: list, args: list):
+    meta = store.get(keys[0])
+    if meta is None:
+        return None
+    players = store.setdefault(keys[1], {})
+    if args[3] not in players:
+        if len(players) >= int(meta["max_players"]):
+            return None
+        players[args[3]] = args[4]
+    return _snapshot(store, keys, args)
+
+
+def _leave_room_fallback(store: MemoryStore, keys: list, args: list):
+    meta = store.get(keys[0])
+    if meta is None:
+        return None
+    players = store.setdefault(keys[1], {})
+    players.pop(args[3], None)
+    if not players:
+        game = _current_game(meta)
+        index_keys = keys[3:5] + ([GAME_INDEX.format(game)] if game else [])
+        for key in keys[:3]:
+            store.pop(key, None)
+        for key in index_keys:
+            store.get(key, {}).pop(args[2], None)
+        return None
+    if serialization.loads(meta["host_id"]) == args[3]:
+        host_id = min(players, key=lambda p: serialization.loads(players[p])["joined_at"])
+        meta["host_id"] = serialization.dumps(host_id)
+    return _snapshot(store, keys, args)
+
+
+def _update_player_fallback(store: MemoryStore, keys: list, args: list):
+    if keys[0] not in store:
+        return None
+    players = store.setdefault(keys[1], {})
+    if args[3] in players:
+        player = serialization.loads(players[args[3]])
+        player[args[4]] = serialization.loads(args[5])
+        players[args[3]] = serialization.dumps(player)
+    return _snapshot(store, keys, args)
+
+
+def _update_room_fallback(store: MemoryStore, keys: list, args: list):
+    meta = store.get(keys[0])
+    if meta is None:
+        return None
+    if args[3] == '1':
+        store.pop(keys[2], None)
+    meta_end = 5 + int(args[4])
+    old_game = _current_game(meta)
+    meta.update(_pairs(args[5:meta_end]))
+    if old_game and old_game != _current_game(meta):
+        store.get(GAME_INDEX.format(old_game), {}).pop(args[2], None)
+    store.setdefault(keys[2], {}).update(_pairs(args[meta_end:]))
+    return _snapshot(store, keys, args)
+
+
+def _list_rooms_fallback(store: MemoryStore, keys: list, args: list):
+    now, ttl, max_score, after = float(args[0]), int(args[1]), args[2], args[3]
+    limit, free_only, budget = int(args[4]), args[5] == '1', int(args[6])
+    cutoff = now - ttl
+    for key in keys[2:]:
+        index = store.get(key)
+        if index:
+            for code in [code for code, score in index.items() if score <= cutoff]:
+                del index[code]
+    
+    index, open_rooms = store.get(keys[0], {}), store.get(keys[1], {})
+    ceiling = float(max_score)
+    candidates = sorted(
+        ((score, code) for code, score in index.items()
+         if score < ceiling or (score == ceiling and (not after or code < after))),
+        reverse=True
+    )
+    rooms, scanned = [], 0
+    for score, code in candidates:
+        scanned += 1
+        if not free_only or code in open_rooms:
+            meta = store.get(f"room:{code}:meta", {})
+            rooms += [code, repr(score), len(store.get(f"room:{code}:players", {})),
+                      meta.get("max_players", "null"), meta.get("current_game", "null")]
+            if len(rooms) // 5 >= limit:
+                return [repr(score), code] + rooms
+        if scanned >= budget:
+            return [repr(score), code] + rooms
+    return [None, None] + rooms
+
+
+def _touch_rooms_fallback(store: MemoryStore, keys: list, args: list):
+    ttl, now = int(args[0]), float(args[1])
+    touched = 0
+    for code in args[2:]:
+        meta = store.get(f"room:{code}:meta")
+        if meta is None:
+            continue
+        for suffix in ("meta", "players", "state"):
+            store.expire(f"room:{code}:{suffix}", ttl)
+        store.setdefault(keys[0], {})[code] = now
+        game = _current_game(meta)
+        for key in [keys[1]] + ([GAME_INDEX.format(game)] if game else []):
+            index = store.get(key)
+            if index and code in index:
+                index[code] = now
+        touched += 1
+    return touched
+
+
+def _sweep_rooms_fallback(store: MemoryStore, keys: list, args: list):
+    cutoff, limit = float(args[0]), int(args[1])
+    index = store.get(keys[0], {})
+    codes = sorted((code for code, score in index.items() if score <= cutoff), key=index.get)[:limit]
+    for code in codes:
+        for suffix in ("meta", "players", "state"):
+            store.pop(f"room:{code}:{suffix}", None)
+        for key in keys:
+            store.get(key, {}).pop(code, None)
+    return codes
+
+
+_create_room_script = db.register_script(_CREATE_ROOM, _create_room_fallback)
+_join_room_script = db.register_script(_JOIN_ROOM, _join_room_fallback)
+_leave_room_script = db.register_script(_LEAVE_ROOM, _leave_room_fallback)
+_update_player_script = db.register_script(_UPDATE_PLAYER, _update_player_fallback)
+_update_room_script = db.register_script(_UPDATE_ROOM, _update_room_fallback)
+_list_rooms_script = db.register_script(_LIST_ROOMS, _list_rooms_fallback)
+_touch_rooms_script = db.register_script(_TOUCH_ROOMS, _touch_rooms_fallback)
+_sweep_rooms_script = db.register_script(_SWEEP_ROOMS, _sweep_rooms_fallback)
+
+
 class RoomService:
     @staticmethod
-    def generate_room_code() -> str:
-        """Generate a unique 6-character room code"""
-        return ''.join(random.choices(string.ascii_uppercase + string.digits, k=settings.ROOM_CODE_LENGTH))
+    def _room_keys(room_code: str) -> List[str]:
+        return [f"room:{room_code}:meta", f"room:{room_code}:players", f"room:{room_code}:state"]
+    
+    @staticmethod
+    def _script_keys(room_code: str) -> List[str]:
+        return RoomService._room_keys(room_code) + [ROOM_INDEX, OPEN_ROOM_INDEX]
+    
+    @staticmethod
+    def _script_args(room_code: str) -> list:
+        return [settings.ROOM_TTL, time.time(), room_code]
+    
+    @staticmethod
+    def _encode_fields(fields: Dict[str, Any]) -> list:
+        """Flatten a dict into HSET field/value arguments with JSON-encoded values"""
+        return [item for key, value in fields.items() for item in (key, serialization.dumps(value))]
     
     @staticmethod
-    async def create_room(host_id: str, username: str, max_players: int = 6) -> Room:
+    def _decode_fields(fields) -> Dict[str, Any]:
+        """Decode HGETALL output (dict or flat field/value list)"""
+        if isinstance(fields, list):
+            fields = _pairs(fields)
+        return {key: serialization.loads(value) for key, value in fields.items()}
+    
+    @staticmethod
+    def _build_room(meta, players, state) -> Optional[RoomRecord]:
+        """Assemble a room from its three hashes"""
+        meta = RoomService._decode_fields(meta)
+        if not meta:
+            return None
+        # ISO timestamps sort chronologically as strings
+        players = sorted(
+            map(PlayerRecord.from_dict, RoomService._decode_fields(players).values()),
+            key=lambda p: p.joined_at
+        )
+        return RoomRecord.from_fields(meta, players, RoomService._decode_fields(state))
+    
+    @staticmethod
+    async def create_room(host_id: str, username: str, max_players: int = 6) -> RoomRecord:
         """Create a new game room"""
-        # Generate unique room code
-        while True:
-            room_code = RoomService.generate_room_code()
-            if not await db.exists(f"room:{room_code}"):
-                break
-        
         # Create host player
-        host = Player(
-            player_id=host_id,
-            username=username,
-            status=PlayerStatus.CONNECTED
-        )
+        host = serialization.dumps(PlayerRecord(player_id=host_id, username=username).to_dict())
         
-        # Create room
-        room = Room(
-            room_code=room_code,
-            host_id=host_id,
-            players=[host],
-            max_players=max_players
-        )
-        
-        # Save to Redis
-        await db.set(f"room:{room_code}", room.model_dump(mode='json'), expire=3600)  # 1 hour expiry
-        await db.set_add("active_rooms", room_code)
-        await db.set_add(f"room:{room_code}:players", host_id)
+        async def claim(room_code: str) -> Optional[RoomRecord]:
+            # The script refuses codes that are already in use
+            room = RoomRecord(room_code=room_code, host_id=host_id, max_players=max_players)
+            
+            snapshot = await _create_room_script(
+                keys=RoomService._script_keys(room_code),
+                args=RoomService._script_args(room_code) + [host_id, host]
+                + RoomService._encode_fields(room.meta())
+            )
+            return RoomService._build_room(*snapshot) if snapshot else None
         
-        return room
+        return await room_code_allocator.allocate(claim)
     
     @staticmethod
-    async def get_room(room_code: str) -> Optional[Room]:
+    async def get_room(room_code: str) -> Optional[RoomRecord]:
         """Get room by code"""
-        room_data = await db.get(f"room:{room_code}")
-        if room_data:
-            return Room(**room_data)
-        return None
+        meta, players, state = await db.hash_get_all(*RoomService._room_keys(room_code))
+        return RoomService._build_room(meta, players, state)
     
     @staticmethod
-    async def join_room(room_code: str, player_id: str, username: str) -> Optional[Room]:
+    async def get_player(room_code: str, player_id: str) -> Optional[PlayerRecord]:
+        """Read a single player without loading the rest of the room"""
+        value, = await db.hash_get(f"room:{room_code}:players", player_id)
+        return PlayerRecord.from_dict(serialization.loads(value)) if value else None
+    
+    @staticmethod
+    async def get_game_state(room_code: str, *fields: str) -> Dict[str, Any]:
+        """Read the game state, or only the given fields of it"""
+        if not fields:
+            state, = await db.hash_get_all(f"room:{room_code}:state")
+            return RoomService._decode_fields(state)
+        values = await db.hash_get(f"room:{room_code}:state", *fields)
+        return {field: serialization.loads(value) for field, value in zip(fields, values) if value is not None}
+    
+    @staticmethod
+    def _update_room_args(room_code: str, meta: Dict[str, Any] = None,
+                          state: Dict[str, Any] = None, clear_state: bool = False) -> list:
+        meta_args = RoomService._encode_fields(meta or {})
+        return (RoomService._script_args(room_code) + ['1' if clear_state else '0', len(meta_args)]
+                + meta_args + RoomService._encode_fields(state or {}))
+    
+    @staticmethod
+    async def _mutate(script: Script, room_code: str, args: list, pending_state: Optional[Dict[str, Any]] = None,
+                      also_delete: Tuple[str, ...] = ()) -> Optional[RoomRecord]:
+        """Run a room script, in one round trip whatever else has to go with it.
+
+        ``pending_state`` (game state the room cache has not written yet) is
+        merged before the script runs and the ``also_delete`` keys are
+        deleted after it, in the same pipeline flush.
+        """
+        keys = RoomService._script_keys(room_code)
+        if not pending_state and not also_delete:
+            snapshot = await script(keys=keys, args=args)
+        else:
+            batch = db.batch(script.name)
+            if pending_state:
+                batch.script(_update_room_script, keys, RoomService._update_room_args(room_code, state=pending_state))
+            batch.script(script, keys, args)
+            if also_delete:
+                batch.delete(*also_delete)
+            snapshot = (await batch.execute())[1 if pending_state else 0]
+        return RoomService._build_room(*snapshot) if snapshot else None
+    
+    @staticmethod
+    async def join_room(room_code: str, player_id: str, username: str,
+                        pending_state: Optional[Dict[str, Any]] = None) -> Optional[RoomRecord]:
         """Add a player to a room"""
-        room = await RoomService.get_room(room_code)
-        
-        if not room:
-            return None
+        new_player = PlayerRecord(player_id=player_id, username=username)
         
-        if len(room.players) >= room.max_players:
-            return None
-        
-        # Check if player already in room
-        if any(p.player_id == player_id for p in room.players):
-            return room
-        
-        # Add new player
-        new_player = Player(
-            player_id=player_id,
-            username=username,
-            status=PlayerStatus.CONNECTED
+        # Returns nothing if the room is missing or full
+        return await RoomService._mutate(
+            _join_room_script, room_code,
+            RoomService._script_args(room_code) + [player_id, serialization.dumps(new_player.to_dict())],
+            pending_state
         )
-        room.players.append(new_player)
-        
-        # Update Redis
-        await db.set(f"room:{room_code}", room.model_dump(mode='json'), expire=3600)
-        await db.set_add(f"room:{room_code}:players", player_id)
-        
-        return room
     
     @staticmethod
-    async def leave_room(room_code: str, player_id: str) -> Optional[Room]:
-        """Remove a player from a room"""
-        room = await RoomService.get_room(room_code)
-        
-        if not room:
-            return None
-        
-        # Remove player
-        room.players = [p for p in room.players if p.player_id != player_id]
-        
-        # If room is empty, delete it
-        if not room.players:
-            await db.delete(f"room:{room_code}")
-            await db.set_remove("active_rooms", room_code)
-            await db.delete(f"room:{room_code}:players")
-            return None
-        
-        # If host left, assign new host
-        if room.host_id == player_id and room.players:
-            room.host_id = room.players[0].player_id
-        
-        # Update Redis
-        await db.set(f"room:{room_code}", room.model_dump(mode='json'), expire=3600)
-        await db.set_remove(f"room:{room_code}:players", player_id)
-        
-        return room
+    async def leave_room(room_code: str, player_id: str,
+                         pending_state: Optional[Dict[str, Any]] = None) -> Optional[RoomRecord]:
+        """Remove a player from a room, ending their session"""
+        # Deletes the room once empty and hands host to the longest-joined player
+        return await RoomService._mutate(
+            _leave_room_script, room_code, RoomService._script_args(room_code) + [player_id], pending_state,
+            also_delete=(SessionService.session_key(room_code, player_id),)
+        )
+    
+    @staticmethod
+    async def _update_player(room_code: str, player_id: str, field: str, value: Any,
+                             pending_state: Optional[Dict[str, Any]] = None) -> Optional[RoomRecord]:
+        return await RoomService._mutate(
+            _update_player_script, room_code,
+            RoomService._script_args(room_code) + [player_id, field, serialization.dumps(value)],
+            pending_state
+        )
     
     @staticmethod
-    async def update_player_status(room_code: str, player_id: str, status: PlayerStatus) -> Optional[Room]:
+    async def _update_room(room_code: str, meta: Dict[str, Any] = None, state: Dict[str, Any] = None,
+                           clear_state: bool = False, pending_state: Optional[Dict[str, Any]] = None) -> Optional[RoomRecord]:
+        return await RoomService._mutate(
+            _update_room_script, room_code,
+            RoomService._update_room_args(room_code, meta, state, clear_state), pending_state
+        )
+    
+    @staticmethod
+    async def update_player_status(room_code: str, player_id: str, status: PlayerStatus,
+                                   pending_state: Optional[Dict[str, Any]] = None) -> Optional[RoomRecord]:
         """Update a player's status"""
-        room = await RoomService.get_room(room_code)
-        
-        if not room:
-            return None
-        
-        for player in room.players:
-            if player.player_id == player_id:
-                player.status = status
-                break
-        
-        await db.set(f"room:{room_code}", room.model_dump(mode='json'), expire=3600)
-        return room
+        return await RoomService._update_player(room_code, player_id, "status", status.value, pending_state)
     
     @staticmethod
-    async def set_player_ready(room_code: str, player_id: str, ready: bool) -> Optional[Room]:
+    async def set_player_ready(room_code: str, player_id: str, ready: bool,
+                               pending_state: Optional[Dict[str, Any]] = None) -> Optional[RoomRecord]:
         """Set player ready status"""
-        room = await RoomService.get_room(room_code)
-        
-        if not room:
-            return None
-        
-        for player in room.players:
-            if player.player_id == player_id:
-                player.ready = ready
-                break
-        
-        await db.set(f"room:{room_code}", room.model_dump(mode='json'), expire=3600)
-        return room
+        return await RoomService._update_player(room_code, player_id, "ready", ready, pending_state)
     
     @staticmethod
-    async def select_game(room_code: str, game_type: GameType) -> Optional[Room]:
-        """Select a game for the room"""
-        room = await RoomService.get_room(room_code)
-        
-        if not room:
-            return None
-        
-        room.current_game = game_type
-        room.game_state = {}
-        
-        await db.set(f"room:{room_code}", room.model_dump(mode='json'), expire=3600)
-        return room
+    async def select_game(room_code: str, game_type: GameType,
+                          pending_state: Optional[Dict[str, Any]] = None) -> Optional[RoomRecord]:
+        """Select a game for the room (the old game's state is dropped, so pending state is not written)"""
+        return await RoomService._update_room(room_code, meta={"current_game": game_type.value}, clear_state=True)
+    
+    @staticmethod
+    async def update_game_state(room_code: str, game_state: dict,
+                                pending_state: Optional[Dict[str, Any]] = None) -> Optional[RoomRecord]:
+        """Replace the whole game state (pending state is superseded, so it is not written)"""
+        return await RoomService._update_room(room_code, state=game_state, clear_state=True)
+    
+    @staticmethod
+    async def merge_game_state(room_code: str, state_update: dict) -> Optional[RoomRecord]:
+        """Merge a partial update into the game state, writing only the changed fields"""
+        return await RoomService._update_room(room_code, state=state_update)
     
     @staticmethod
-    async def update_game_state(room_code: str, game_state: dict) -> Optional[Room]:
-        """Update game state"""
-        room = await RoomService.get_room(room_code)
+    async def list_rooms(cursor: Optional[str] = None, limit: int = 50, has_free_slots: bool = False,
+                         current_game: Optional[GameType] = None) -> Tuple[List[RoomSummary], Optional[str]]:
+        """List rooms by most recent activity, one page at a time.
         
-        if not room:
-            return None
+        Returns the page and the cursor of the next one (None at the end).
+        Raises ValueError for a malformed cursor.
+        """
+        max_score, after = "+inf", ""
+        if cursor:
+            max_score, _, after = cursor.partition(":")
+            float(max_score)  # ValueError if the cursor was tampered with
         
-        room.game_state = game_state
+        index = GAME_INDEX.format(current_game.value) if current_game else (
+            OPEN_ROOM_INDEX if has_free_slots else ROOM_INDEX
+        )
+        result = await _list_rooms_script(
+            keys=[index, OPEN_ROOM_INDEX] + ALL_INDEXES,
+            args=[time.time(), settings.ROOM_TTL, max_score, after, limit,
+                  '1' if has_free_slots else '0', max(limit * 20, 1000)]
+        )
         
-        await db.set(f"room:{room_code}", room.model_dump(mode='json'), expire=3600)
-        return room
+        next_score, next_code, rows = result[0], result[1], result[2:]
+        rooms = [
+            RoomSummary(
+                room_code=code,
+                player_count=int(player_count),
+                max_players=serialization.loads(max_players) or 0,
+                current_game=serialization.loads(game),
+                last_activity=datetime.fromtimestamp(float(score)),
+            )
+            for code, score, player_count, max_players, game in zip(*[iter(rows)] * 5)
+        ]
+        return rooms, f"{next_score}:{next_code}" if next_code else None
     
     @staticmethod
-    async def get_active_rooms() -> List[str]:
-        """Get all active room codes"""
-        rooms = await db.set_members("active_rooms")
-        return list(rooms) if rooms else []
\ No newline at end of file
+    async def touch_and_sweep_rooms(room_codes: List[str], idle_seconds: float, limit: int = 100) -> List[str]:
+        """Keep rooms alive and delete idle ones, in one round trip.
+
+        Rooms in ``room_codes`` (those with connected players) are marked as
+        active and get their TTL refreshed; then up to ``limit`` rooms
+        without activity for ``idle_seconds`` are deleted. Returns their codes.
+        """
+        now = time.time()
+        batch = db.batch("touch_and_sweep_rooms")
+        if room_codes:
+            batch.script(_touch_rooms_script, [ROOM_INDEX, OPEN_ROOM_INDEX], [settings.ROOM_TTL, now] + list(room_codes))
+        batch.script(_sweep_rooms_script, ALL_INDEXES, [now - idle_seconds, limit])
+        return (await batch.execute())[-1]
@@ -0,0 +1,167 @@
+import secrets
+from typing import Optional, List, Tuple
+from app.models import WSMessageType
+from app.database import db
+from app.memory_store import MemoryStore
+from app.config import settings
+from app.utils import serialization
+
+
+# ============================================
+# Storage layout
+# ============================================
+# session:{code}:{player_id}  hash of token (what a client resumes with) and
+#                             connection (the id of the player's newest socket)
+# room:{code}:events          recent room events as "<event_seq>:<message JSON>",
+#                             oldest first, at most WS_RESUME_BUFFER_SIZE
+# room:{code}:event_seq       last event sequence number handed out
+#
+# Everything expires ROOM_TTL seconds after its last write.
+
+# Room events clients can miss while reconnecting; they carry an ``event_seq``
+# and are replayed on resume. Game state has its own sequence (see state_sync).
+RESUMABLE_EVENT_TYPES = frozenset({
+    WSMessageType.PLAYER_JOINED,
+    WSMessageType.PLAYER_LEFT,
+    WSMessageType.PLAYER_READY,
+    WSMessageType.GAME_SELECTED,
+    WSMessageType.GAME_START,
+    WSMessageType.GAME_END,
+    WSMessageType.CHAT_MESSAGE,
+})
+
+# KEYS: session; ARGV: ttl, offered token, new token, connection id
+# Returns {token, 1 if the offered token resumed the session else 0}
+_OPEN_SESSION = """
+local token = redis.call('HGET', KEYS[1], 'token')
+local resumed = token and token == ARGV[2]
+if not resumed then token = ARGV[3] end
+redis.call('HSET', KEYS[1], 'token', token, 'connection', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return {token, resumed and 1 or 0}
+"""
+
+# KEYS: events, event_seq; ARGV: ttl, buffer size, message JSON
+_RECORD_EVENT = """
+local seq = redis.call('INCR', KEYS[2])
+redis.call('RPUSH', KEYS[1], seq .. ':' .. ARGV[3])
+redis.call('LTRIM', KEYS[1], -tonumber(ARGV[2]), -1)
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return seq
+"""
+
+# KEYS: events, event_seq; returns {last event_seq, buffered events...}
+_RECENT_EVENTS = """
+local events = redis.call('LRANGE', KEYS[1], 0, -1)
+table.insert(events, 1, redis.call('GET', KEYS[2]) or '0')
+return events
+"""
+
+
+def _open_session_fallback(store: MemoryStore, keys: list, args: list):
+    session = store.get(keys[0])
+    resumed = session is not None and session["token"] == args[1]
+    token = session["token"] if resumed else args[2]
+    store[keys[0]] = {"token": token, "connection": args[3]}
+    store.expire(keys[0], int(args[0]))
+    return [token, 1 if resumed else 0]
+
+
+def _record_event_fallback(store: MemoryStore, keys: list, args: list):
+    seq = int(store.get(keys[1], 0)) + 1
+    store[keys[1]] = str(seq)
+    events = store.setdefault(keys[0], [])
+    events.append(f"{seq}:{args[2]}")
+    del events[:-int(args[1])]
+    store.expire(keys[0], int(args[0]))
+    store.expire(keys[1], int(args[0]))
+    return seq
+
+
+def _recent_events_fallback(store: MemoryStore, keys: list, args: list):
+    return [store.get(keys[1], "0")] + list(store.get(keys[0], ()))
+
+
+_open_session_script = db.register_script(_OPEN_SESSION, _open_session_fallback)
+_record_event_script = db.register_script(_RECORD_EVENT, _record_event_fallback)
+_recent_events_script = db.register_script(_RECENT_EVENTS, _recent_events_fallback)
+
+
+class SessionService:
+    """
+    Resumable player sessions.
+
+    Every socket opens (or resumes) the player's session, which hands the
+    client a token. A client that lost its socket reconnects with that token
+    and the ``event_seq`` of the last room event it saw, and gets only the
+    events it missed. The player keeps their place in the room for
+    WS_RESUME_GRACE seconds after a socket closes; only if no newer socket
+    has opened the session by then do they leave it.
+    """
+    
+    @staticmethod
+    def session_key(room_code: str, player_id: str) -> str:
+        return f"session:{room_code}:{player_id}"
+    
+    @staticmethod
+    def _event_keys(room_code: str) -> List[str]:
+        return [f"room:{room_code}:events", f"room:{room_code}:event_seq"]
+    
+    @staticmethod
+    async def open(room_code: str, player_id: str, connection_id: str, token: Optional[str] = None,
+                   last_seq: Optional[int] = None) -> Tuple[str, Optional[List[dict]]]:
+        """Make ``connection_id`` the player's current socket.
+
+        Returns the session token and, if ``token`` resumed the session, the
+        room events after ``last_seq`` (None when not resuming or if some
+        were no longer buffered). One round trip either way.
+        """
+        batch = db.batch("open_session").script(
+            _open_session_script,
+            [SessionService.session_key(room_code, player_id)],
+            [settings.ROOM_TTL, token or "", secrets.token_urlsafe(16), connection_id]
+        )
+        if token and last_seq is not None:
+            batch.script(_recent_events_script, SessionService._event_keys(room_code), [])
+        (token, resumed), *events = await batch.execute()
+        if not resumed or not events:
+            return token, None
+        return token, SessionService._missed_events(events[0], last_seq)
+    
+    @staticmethod
+    async def is_current(room_code: str, player_id: str, connection_id: str) -> bool:
+        """Whether ``connection_id`` is still the player's newest socket"""
+        connection, = await db.hash_get(SessionService.session_key(room_code, player_id), "connection")
+        return connection == connection_id
+    
+    @staticmethod
+    async def record_events(room_code: str, messages: List[dict]) -> List[int]:
+        """Append room events to the replay buffer, in order and in one round trip; returns their event_seqs"""
+        batch = db.batch("record_events")
+        for message in messages:
+            batch.script(
+                _record_event_script, SessionService._event_keys(room_code),
+                [settings.ROOM_TTL, settings.WS_RESUME_BUFFER_SIZE, serialization.dumps(message)]
+            )
+        return [int(seq) for seq in await batch.execute()]
+    
+    @staticmethod
+    def _missed_events(recent: list, last_seq: int) -> Optional[List[dict]]:
+        """Room events after ``last_seq``, oldest first, or None if some are no longer buffered"""
+        latest, *events = recent
+        latest = int(latest)
+        if last_seq > latest:
+            return None  # not a sequence number of this room
+        
+        missed = []
+        for event in events:
+            seq, _, text = event.partition(":")
+            seq = int(seq)
+            if seq > last_seq:
+                message = serialization.loads(text)
+                message["event_seq"] = seq
+                missed.append(message)
+        
+        first_missed = missed[0]["event_seq"] if missed else latest + 1
+        return missed if first_missed == last_seq + 1 else None
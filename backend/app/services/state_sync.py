@@ -0,0 +1,130 @@
+from typing import Dict, Any, Optional
+from app.models import WSMessageType
+from app.config import settings
+
+
+class RoomStateSync:
+    def __init__(self, state: Dict[str, Any]):
+        self.seq = 0
+        self.snapshot = dict(state)  # state as of the last broadcast
+        self.since_keyframe = 0
+
+
+class StateSync:
+    """
+    Turns game state broadcasts into sequenced deltas.
+
+    Each broadcast carries a per-room ``seq``. Usually only the keys that
+    changed since the previous broadcast are sent (GAME_STATE_DELTA); every
+    STATE_KEYFRAME_INTERVAL broadcasts, and whenever a client asks with
+    GAME_STATE_RESYNC, the full state goes out as a GAME_STATE_UPDATE
+    keyframe. Clients that see a gap in ``seq`` should request a resync.
+    """
+    
+    def __init__(self):
+        self._rooms: Dict[str, RoomStateSync] = {}
+    
+    def reset(self, room_code: str, state: Dict[str, Any]):
+        """Start a new sequence, e.g. when a game is selected"""
+        self._rooms[room_code] = RoomStateSync(state)
+    
+    def discard(self, room_code: str):
+        """Forget a room's sequence"""
+        self._rooms.pop(room_code, None)
+    
+    def keyframe(self, room_code: str, state: Dict[str, Any], player_id: str = None) -> dict:
+        """Full-state message at the current sequence number (for resyncs)"""
+        sync = self._rooms.get(room_code)
+        if sync is None:
+            sync = self._rooms[room_code] = RoomStateSync(state)
+        return {
+            "type": WSMessageType.GAME_STATE_UPDATE,
+            "data": {
+                "player_id": player_id,
+                "seq": sync.seq,
+                "keyframe": True,
+                "state": state
+            }
+        }
+    
+    def next_message(self, room_code: str, state: Dict[str, Any], player_id: str) -> Optional[dict]:
+        """Build the next broadcast for ``state``: a delta, a keyframe, or None if nothing changed"""
+        sync = self._rooms.get(room_code)
+        if sync is None:
+            sync = self._rooms[room_code] = RoomStateSync({})
+            sync.since_keyframe = settings.STATE_KEYFRAME_INTERVAL
+        
+        previous = sync.snapshot
+        changed = {
+            key: value for key, value in state.items()
+            if key not in previous or (previous[key] is not value and previous[key] != value)
+        }
+        removed = [key for key in previous if key not in state]
+        
+        if not changed and not removed:
+            return None
+        
+        sync.seq += 1
+        sync.snapshot = dict(state)
+        sync.since_keyframe += 1
+        
+        if sync.since_keyframe >= settings.STATE_KEYFRAME_INTERVAL:
+            sync.since_keyframe = 0
+            return self.keyframe(room_code, state, player_id)
+        
+        return {
+            "type": WSMessageType.GAME_STATE_DELTA,
+            "data": {
+                "player_id": player_id,
+                "seq": sync.seq,
+                "changed": changed,
+                "removed": removed
+            }
+        }
+
+
+STATE_MESSAGE_TYPES = (WSMessageType.GAME_STATE_UPDATE, WSMessageType.GAME_STATE_DELTA)
+
+
+def coalesce(older: dict, newer: dict) -> dict:
+    """Combine two queued state messages into one equivalent message.
+
+    A keyframe supersedes anything before it; a delta applied to a keyframe
+    yields a keyframe. Two deltas combine into one delta whose ``base_seq``
+    is the last sequence number the client must already have.
+    """
+    if newer["type"] == WSMessageType.GAME_STATE_UPDATE:
+        return newer
+    
+    old_data, new_data = older["data"], newer["data"]
+    removed = set(new_data["removed"])
+    
+    if older["type"] == WSMessageType.GAME_STATE_UPDATE:
+        state = {key: value for key, value in old_data["state"].items() if key not in removed}
+        state.update(new_data["changed"])
+        return {
+            "type": WSMessageType.GAME_STATE_UPDATE,
+            "data": {
+                "player_id": new_data["player_id"],
+                "seq": new_data["seq"],
+                "keyframe": True,
+                "state": state
+            }
+        }
+    
+    changed = {key: value for key, value in old_data["changed"].items() if key not in removed}
+    changed.update(new_data["changed"])
+    return {
+        "type": WSMessageType.GAME_STATE_DELTA,
+        "data": {
+            "player_id": new_data["player_id"],
+            "seq": new_data["seq"],
+            "base_seq": old_data.get("base_seq", old_data["seq"] - 1),
+            "changed": changed,
+            "removed": [key for key in removed.union(old_data["removed"]) if key not in changed]
+        }
+    }
+
+
+# Global state sync instance
+state_sync = StateSync()
@@ -0,0 +1,242 @@
+import asyncio
+import base64
+import zlib
+from typing import Dict, Any, List, Optional, Tuple
+from app.models import WSMessageType, GameType
+from app.database import db
+from app.memory_store import MemoryStore
+from app.services.connection_manager import manager
+from app.config import settings
+from app.utils import serialization
+
+# ============================================
+# Storage layout
+# ============================================
+# room:{code}:strokes     stream (memory store: list) of flushed batches, field
+#                         "segments" = JSON list of segments; entry id "<seq>-1"
+# room:{code}:stroke_seq  last batch sequence number handed out
+#
+# The stream holds the current round only (reset when a round starts) and at
+# most STROKE_LOG_MAX_ENTRIES batches. Both keys expire ROOM_TTL seconds after
+# their last write.
+
+QUANTUM = 0.1  # coordinates are sent as multiples of this (field is 0-100)
+MAX_QUANTIZED = round(100 / QUANTUM)
+
+# KEYS: log, seq; ARGV: ttl, max entries, segments JSON, 1 to empty the log first
+# Returns the batch's seq
+_APPEND_BATCH = """
+if ARGV[4] == '1' then redis.call('DEL', KEYS[1]) end
+local seq = redis.call('INCR', KEYS[2])
+redis.call('XADD', KEYS[1], 'MAXLEN', ARGV[2], seq .. '-1', 'segments', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return seq
+"""
+
+# KEYS: log, seq; returns {last seq, segments JSON of every batch, oldest first}
+_READ_LOG = """
+local batches = {redis.call('GET', KEYS[2]) or '0'}
+for _, entry in ipairs(redis.call('XRANGE', KEYS[1], '-', '+')) do
+    table.insert(batches, entry[2][2])
+end
+return batches
+"""
+
+
+def _append_batch_fallback(store: MemoryStore, keys: list, args: list):
+    if args[3] == "1":
+        store.pop(keys[0], None)
+    seq = int(store.get(keys[1], 0)) + 1
+    store[keys[1]] = str(seq)
+    batches = store.setdefault(keys[0], [])
+    batches.append(args[2])
+    del batches[:-int(args[1])]
+    store.expire(keys[0], int(args[0]))
+    store.expire(keys[1], int(args[0]))
+    return seq
+
+
+def _read_log_fallback(store: MemoryStore, keys: list, args: list):
+    return [store.get(keys[1], "0")] + list(store.get(keys[0], ()))
+
+
+_append_batch_script = db.register_script(_APPEND_BATCH, _append_batch_fallback)
+_read_log_script = db.register_script(_READ_LOG, _read_log_fallback)
+
+
+def _quantize(points: List[List[float]]) -> List[Tuple[int, int]]:
+    """Points on the QUANTUM grid, clamped to the field, without repeats"""
+    quantized = []
+    last = None
+    for x, y in points:
+        point = (min(max(round(x / QUANTUM), 0), MAX_QUANTIZED), min(max(round(y / QUANTUM), 0), MAX_QUANTIZED))
+        if point != last:
+            quantized.append(point)
+            last = point
+    return quantized
+
+
+def _delta_encode(points: List[Tuple[int, int]]) -> List[int]:
+    """[x0, y0, dx1, dy1, ...]: small integers, short in JSON and MessagePack"""
+    flat = [points[0][0], points[0][1]]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        flat += (x1 - x0, y1 - y0)
+    return flat
+
+
+def _delta_decode(flat: List[int]) -> List[Tuple[int, int]]:
+    points = [(flat[0], flat[1])]
+    for i in range(2, len(flat), 2):
+        x, y = points[-1]
+        points.append((x + flat[i], y + flat[i + 1]))
+    return points
+
+
+class _PendingStroke:
+    __slots__ = ("color", "width", "points")
+    
+    def __init__(self, color: str, width: float):
+        self.color = color
+        self.width = width
+        self.points: List[Tuple[int, int]] = []
+
+
+class StrokeStream:
+    """
+    Pictionary drawing, off the game state path.
+
+    The drawer sends DRAW_STROKE messages (``{"stroke": id, "points": [[x, y],
+    ...], "color", "width"}`` or ``{"clear": true}``) at whatever rate it
+    draws. Points are quantized to QUANTUM and buffered per room; once per
+    Pictionary tick each room's buffer becomes one batch of segments (a
+    segment is one stroke's new points, delta-encoded), which is appended to
+    the room's log and broadcast as a DRAW_STROKE with an increasing ``seq``.
+    Segments of the same stroke continue each other. Players who join late or
+    miss a ``seq`` get a DRAW_SNAPSHOT: the round's drawing since the last
+    clear, one segment per stroke, zlib-compressed.
+    """
+    
+    def __init__(self):
+        self._pending: Dict[str, Dict[Any, Any]] = {}  # room -> stroke id (or "clear") -> points
+        self._drawers: Dict[str, str] = {}  # room -> player who drew the pending points
+        self._snapshots: Dict[str, Tuple[int, dict]] = {}  # room -> (seq, snapshot message)
+        self._task: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def _keys(room_code: str) -> List[str]:
+        return [f"room:{room_code}:strokes", f"room:{room_code}:stroke_seq"]
+    
+    def add(self, room_code: str, player_id: str, data: Dict[str, Any]):
+        """Buffer a validated DRAW_STROKE from the room's drawer"""
+        pending = self._pending.setdefault(room_code, {})
+        self._drawers[room_code] = player_id
+        if data.get("clear"):
+            # Everything drawn before the clear is gone, pending points included
+            pending.clear()
+            pending["clear"] = True
+        else:
+            stroke = pending.get(data["stroke"])
+            if stroke is None:
+                stroke = pending[data["stroke"]] = _PendingStroke(data.get("color", "#000000"), data.get("width", 3))
+            points = _quantize(data["points"])
+            if stroke.points and points and points[0] == stroke.points[-1]:
+                points = points[1:]
+            stroke.points += points
+        
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+    
+    async def reset(self, room_code: str):
+        """Start an empty drawing, e.g. for a new round; clients are sent a clear"""
+        self._pending.pop(room_code, None)
+        await self._flush(room_code, {"clear": True}, None, reset=True)
+    
+    def discard(self, room_code: str):
+        """Forget buffered points of a room this worker no longer runs"""
+        self._pending.pop(room_code, None)
+        self._drawers.pop(room_code, None)
+        self._snapshots.pop(room_code, None)
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._pending.clear()
+    
+    async def _flush_loop(self):
+        rate = settings.TICK_RATES.get(GameType.PICTIONARY.value, settings.DEFAULT_TICK_RATE)
+        while True:
+            await asyncio.sleep(1 / rate)
+            rooms, self._pending = self._pending, {}
+            for room_code, pending in rooms.items():
+                try:
+                    await self._flush(room_code, pending, self._drawers.get(room_code))
+                except Exception as e:
+                    print(f"❌ Stroke flush error in room {room_code}: {e}")
+    
+    async def _flush(self, room_code: str, pending: Dict[Any, Any], player_id: Optional[str], reset: bool = False):
+        segments = []
+        for stroke_id, stroke in pending.items():
+            if stroke_id == "clear":
+                segments.append({"clear": True})
+            elif stroke.points:
+                segments.append({
+                    "stroke": stroke_id, "color": stroke.color, "width": stroke.width,
+                    "points": _delta_encode(stroke.points)
+                })
+        if not segments:
+            return
+        
+        seq = await _append_batch_script(
+            self._keys(room_code),
+            [settings.ROOM_TTL, settings.STROKE_LOG_MAX_ENTRIES, serialization.dumps(segments), "1" if reset else "0"]
+        )
+        await manager.broadcast_to_room({
+            "type": WSMessageType.DRAW_STROKE,
+            "data": {"seq": seq, "player_id": player_id, "segments": segments}
+        }, room_code)
+    
+    async def snapshot(self, room_code: str) -> dict:
+        """DRAW_SNAPSHOT of the round so far; clients continue from its ``seq``"""
+        seq, *batches = await _read_log_script(self._keys(room_code), [])
+        seq = int(seq)
+        cached = self._snapshots.get(room_code)
+        if cached and cached[0] == seq:
+            return cached[1]
+        
+        # Merge every stroke's segments into one, dropping what a clear wiped
+        strokes: Dict[Any, dict] = {}
+        for batch in batches:
+            for segment in serialization.loads(batch):
+                if segment.get("clear"):
+                    strokes.clear()
+                    continue
+                points = _delta_decode(segment["points"])
+                stroke = strokes.get(segment["stroke"])
+                if stroke is None:
+                    strokes[segment["stroke"]] = {**segment, "points": points}
+                else:
+                    stroke["points"] += points[1:] if points[0] == stroke["points"][-1] else points
+        for stroke in strokes.values():
+            stroke["points"] = _delta_encode(stroke["points"])
+        
+        compressed = zlib.compress(serialization.dumps(list(strokes.values())).encode(), 6)
+        message = {
+            "type": WSMessageType.DRAW_SNAPSHOT,
+            "data": {
+                "seq": seq,
+                "encoding": "zlib+base64",
+                "segments": base64.b64encode(compressed).decode()
+            }
+        }
+        self._snapshots[room_code] = (seq, message)
+        return message
+
+
+# Global Pictionary stroke stream
+stroke_stream = StrokeStream()
@@ -0,0 +1,152 @@
+import asyncio
+from typing import Dict, Any, List
+from app.models import GameType, WSMessageType
+from app.services.game_service import GameService
+from app.services.room_cache import room_cache
+from app.services.state_sync import state_sync
+from app.services.connection_manager import manager
+from app.services.game_clock import game_clock
+from app.simulation import Simulation
+from app.config import settings
+
+
+class PendingUpdate:
+    def __init__(self):
+        self.state: Dict[str, Any] = {}  # updates merged since the last tick
+        self.player_id: str = None  # last player to contribute
+
+
+class TickScheduler:
+    """
+    Coalesces game state updates and emits them on a fixed server tick.
+
+    Validated updates are merged into a per-room pending dict instead of being
+    applied and broadcast one by one. Each tick rate (TICK_RATES, per game
+    type) has a single loop that, every tick, applies each room's pending
+    update to the cached room and broadcasts one combined delta. Broadcasts
+    and Redis writes therefore follow the tick rate, not the client frame rate.
+    Server-side simulations registered for a game type are stepped first on
+    every tick of that game's rate and their output is merged like any update.
+    """
+    
+    def __init__(self):
+        self._pending: Dict[int, Dict[str, PendingUpdate]] = {}  # tick rate -> room_code -> update
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._simulations: Dict[int, List[Simulation]] = {}  # tick rate -> simulations
+    
+    @staticmethod
+    def tick_rate(game_type: GameType) -> int:
+        return settings.TICK_RATES.get(game_type.value, settings.DEFAULT_TICK_RATE)
+    
+    def submit(self, room_code: str, game_type: GameType, player_id: str, state_update: Dict[str, Any]):
+        """Queue a validated state update for the room's next tick"""
+        rate = self.tick_rate(game_type)
+        self._merge_pending(rate, room_code, player_id, state_update)
+        self._ensure_loop(rate)
+    
+    def add_simulation(self, game_type: GameType, simulation: Simulation):
+        """Step ``simulation`` on every tick of the game's rate"""
+        rate = self.tick_rate(game_type)
+        simulations = self._simulations.setdefault(rate, [])
+        if simulation not in simulations:
+            simulations.append(simulation)
+        self._ensure_loop(rate)
+    
+    def discard(self, room_code: str):
+        """Drop a room's pending update, simulated matches and clock, e.g. when a new game is selected"""
+        game_clock.cancel(room_code)
+        for rooms in self._pending.values():
+            rooms.pop(room_code, None)
+        for simulations in self._simulations.values():
+            for simulation in simulations:
+                simulation.remove_match(room_code)
+    
+    async def apply_now(self, room_code: str, game_type: GameType, state_update: Dict[str, Any]) -> bool:
+        """Apply an update (with anything pending for the room) and broadcast it
+        without waiting for the next tick; returns whether the game ended"""
+        pending = self._pending.get(self.tick_rate(game_type), {}).pop(room_code, None) or PendingUpdate()
+        pending.state.update(state_update)
+        return await self._emit(room_code, pending)
+    
+    def _merge_pending(self, rate: int, room_code: str, player_id: str, state_update: Dict[str, Any]):
+        rooms = self._pending.setdefault(rate, {})
+        pending = rooms.get(room_code)
+        if pending is None:
+            pending = rooms[room_code] = PendingUpdate()
+        pending.state.update(state_update)
+        if player_id:
+            pending.player_id = player_id
+    
+    def _ensure_loop(self, rate: int):
+        if rate not in self._tasks:
+            self._tasks[rate] = asyncio.create_task(self._tick_loop(rate))
+    
+    async def stop(self):
+        """Cancel all tick loops"""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+        self._pending.clear()
+        self._simulations.clear()
+    
+    async def _tick_loop(self, rate: int):
+        loop = asyncio.get_running_loop()
+        interval = 1 / rate
+        next_tick = loop.time() + interval
+        
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            # Fixed schedule, skipping ticks we fell too far behind on
+            next_tick = max(next_tick + interval, loop.time())
+            
+            for simulation in self._simulations.get(rate, ()):
+                try:
+                    for room_code, update in simulation.step(interval).items():
+                        self._merge_pending(rate, room_code, None, update)
+                except Exception as e:
+                    print(f"❌ Simulation error: {e}")
+            
+            rooms = self._pending.get(rate)
+            if not rooms:
+                continue
+            self._pending[rate] = {}
+            
+            for room_code, pending in rooms.items():
+                try:
+                    await self._emit(room_code, pending)
+                except Exception as e:
+                    print(f"❌ Tick error in room {room_code}: {e}")
+    
+    async def _emit(self, room_code: str, pending: PendingUpdate) -> bool:
+        """Apply one tick's worth of updates and broadcast the result; returns whether the game ended"""
+        room = room_cache.merge_game_state(room_code, pending.state)
+        if not room or not room.current_game:
+            return False
+        new_state = room.game_state
+        
+        # Check if game ended
+        game_ended, winner = GameService.check_game_end(room.current_game, new_state)
+        
+        if game_ended:
+            self.discard(room_code)
+            await room_cache.flush(room_code)
+            state_sync.discard(room_code)
+            await manager.broadcast_to_room({
+                "type": WSMessageType.GAME_END,
+                "data": {
+                    "winner": winner,
+                    "final_state": new_state
+                }
+            }, room_code)
+        else:
+            # Broadcast only what changed, to contributors too so every
+            # client sees a gap-free sequence
+            update_message = state_sync.next_message(room_code, new_state, pending.player_id)
+            if update_message:
+                await manager.broadcast_to_room(update_message, room_code)
+        return game_ended
+
+
+# Global tick scheduler instance
+tick_scheduler = TickScheduler()
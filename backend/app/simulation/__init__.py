@@ -0,0 +1,14 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any
+
+
+class Simulation(ABC):
+    """Interface for server-side game simulations stepped by the TickScheduler"""
+    
+    @abstractmethod
+    def step(self, dt: float) -> Dict[str, Dict[str, Any]]:
+        """Advance all matches; return state updates keyed by room code"""
+    
+    @abstractmethod
+    def remove_match(self, room_code: str):
+        """Stop simulating a room's match"""
@@ -0,0 +1,196 @@
+import math
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+from app.simulation import Simulation
+
+# Table coordinates match the client's puck_position: 0-100 on both axes.
+# Player 1 defends the bottom goal (y = 100), player 2 the top goal (y = 0).
+TABLE_SIZE = 100.0
+PUCK_RADIUS = 2.5
+PADDLE_RADIUS = 4.0
+GOAL_HALF_WIDTH = 15.0
+MAX_PUCK_SPEED = 150.0  # table units per second
+MIN_PUCK_SPEED = 0.5  # below this the puck stops
+FRICTION = 0.6  # fraction of speed kept after one second
+WALL_RESTITUTION = 0.9
+PADDLE_RESTITUTION = 1.0
+
+# State keys only the simulation may write while a match is authoritative
+SERVER_OWNED_KEYS = frozenset({
+    "puck_position", "player1_paddle", "player2_paddle",
+    "player1_score", "player2_score", "winner",
+})
+
+
+class AirHockeyWorld(Simulation):
+    """
+    Authoritative Air Hockey physics for every match on this worker.
+
+    Matches live in fixed slots of struct-of-arrays NumPy buffers, so one
+    ``step`` advances all of them with a handful of vectorised operations.
+    Clients only send paddle targets; puck position and scores are produced
+    here. Buffers double when full and are otherwise reused.
+    """
+    
+    def __init__(self, capacity: int = 64):
+        self._rooms: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._players: Dict[str, Tuple[str, str]] = {}
+        self._free: List[int] = []
+        self._allocate(capacity)
+    
+    def _allocate(self, capacity: int):
+        old = len(self._rooms)
+        arrays = {
+            "pos": np.zeros((capacity, 2)),
+            "vel": np.zeros((capacity, 2)),
+            "paddle": np.zeros((capacity, 2, 2)),
+            "paddle_target": np.zeros((capacity, 2, 2)),
+            "paddle_vel": np.zeros((capacity, 2, 2)),
+            "scores": np.zeros((capacity, 2), dtype=np.int64),
+            "active": np.zeros(capacity, dtype=bool),
+        }
+        for name, array in arrays.items():
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+        
+        self._rooms.extend([None] * (capacity - old))
+        self._free.extend(range(capacity - 1, old - 1, -1))
+    
+    def has_match(self, room_code: str) -> bool:
+        return room_code in self._slots
+    
+    def add_match(self, room_code: str, player1_id: str, player2_id: str):
+        """Start a match with the puck at centre and paddles on their goal lines"""
+        self.remove_match(room_code)
+        if not self._free:
+            self._allocate(len(self._rooms) * 2)
+        
+        slot = self._free.pop()
+        self._rooms[slot] = room_code
+        self._slots[room_code] = slot
+        self._players[room_code] = (player1_id, player2_id)
+        
+        self.pos[slot] = TABLE_SIZE / 2
+        self.vel[slot] = 0
+        self.paddle[slot] = self.paddle_target[slot] = [
+            [TABLE_SIZE / 2, TABLE_SIZE - 10], [TABLE_SIZE / 2, 10]
+        ]
+        self.paddle_vel[slot] = 0
+        self.scores[slot] = 0
+        self.active[slot] = True
+    
+    def remove_match(self, room_code: str):
+        slot = self._slots.pop(room_code, None)
+        if slot is None:
+            return
+        self._players.pop(room_code, None)
+        self._rooms[slot] = None
+        self.active[slot] = False
+        self.vel[slot] = 0
+        self._free.append(slot)
+    
+    def set_paddle(self, room_code: str, player_id: str, x: float, y: float) -> bool:
+        """Set where a player's paddle should be on the next step (clamped to their half)"""
+        slot = self._slots.get(room_code)
+        if slot is None or player_id not in self._players[room_code]:
+            return False
+        if not (math.isfinite(x) and math.isfinite(y)):
+            return False
+        
+        index = self._players[room_code].index(player_id)
+        low, high = (TABLE_SIZE / 2, TABLE_SIZE) if index == 0 else (0.0, TABLE_SIZE / 2)
+        self.paddle_target[slot, index, 0] = min(max(float(x), PADDLE_RADIUS), TABLE_SIZE - PADDLE_RADIUS)
+        self.paddle_target[slot, index, 1] = min(max(float(y), low + PADDLE_RADIUS), high - PADDLE_RADIUS)
+        return True
+    
+    def step(self, dt: float) -> Dict[str, Dict[str, Any]]:
+        """Advance every match by ``dt`` seconds; returns state updates for rooms that changed"""
+        if not self._slots:
+            return {}
+        
+        pos, vel = self.pos, self.vel
+        x, y, vx, vy = pos[:, 0], pos[:, 1], vel[:, 0], vel[:, 1]
+        
+        # Paddles jump to their targets; their velocity drives the hit impulse
+        np.subtract(self.paddle_target, self.paddle, out=self.paddle_vel)
+        self.paddle_vel /= dt
+        paddles_moved = np.any(self.paddle_vel != 0, axis=(1, 2))
+        self.paddle[:] = self.paddle_target
+        
+        # Integrate with friction
+        pos += vel * dt
+        vel *= FRICTION ** dt
+        
+        # Side walls
+        hit = x < PUCK_RADIUS
+        x[hit] = 2 * PUCK_RADIUS - x[hit]
+        vx[hit] = np.abs(vx[hit]) * WALL_RESTITUTION
+        hit = x > TABLE_SIZE - PUCK_RADIUS
+        x[hit] = 2 * (TABLE_SIZE - PUCK_RADIUS) - x[hit]
+        vx[hit] = -np.abs(vx[hit]) * WALL_RESTITUTION
+        
+        # End walls, except across the goal mouth
+        in_mouth = np.abs(x - TABLE_SIZE / 2) < GOAL_HALF_WIDTH
+        hit = (y < PUCK_RADIUS) & ~in_mouth
+        y[hit] = 2 * PUCK_RADIUS - y[hit]
+        vy[hit] = np.abs(vy[hit]) * WALL_RESTITUTION
+        hit = (y > TABLE_SIZE - PUCK_RADIUS) & ~in_mouth
+        y[hit] = 2 * (TABLE_SIZE - PUCK_RADIUS) - y[hit]
+        vy[hit] = -np.abs(vy[hit]) * WALL_RESTITUTION
+        
+        # Paddle collisions: push the puck out and reflect its velocity relative to the paddle
+        reach = PUCK_RADIUS + PADDLE_RADIUS
+        pushed = np.zeros_like(self.active)
+        for index in range(2):
+            offset = pos - self.paddle[:, index]
+            distance = np.maximum(np.hypot(offset[:, 0], offset[:, 1]), 1e-9)
+            touching = (distance < reach) & self.active
+            if not touching.any():
+                continue
+            normal = offset / distance[:, None]
+            pos[touching] = self.paddle[touching, index] + normal[touching] * reach
+            pushed |= touching
+            approach = np.einsum("ij,ij->i", vel - self.paddle_vel[:, index], normal)
+            impulse = np.where(touching & (approach < 0), (1 + PADDLE_RESTITUTION) * approach, 0.0)
+            vel -= impulse[:, None] * normal
+        
+        # Speed limits
+        speed = np.hypot(vx, vy)
+        too_fast = speed > MAX_PUCK_SPEED
+        vel[too_fast] *= (MAX_PUCK_SPEED / speed[too_fast])[:, None]
+        vel[speed < MIN_PUCK_SPEED] = 0
+        
+        # Goals: player 1 scores in the top goal, player 2 in the bottom one
+        scored_top = self.active & (y < 0)
+        scored_bottom = self.active & (y > TABLE_SIZE)
+        self.scores[scored_top, 0] += 1
+        self.scores[scored_bottom, 1] += 1
+        scored = scored_top | scored_bottom
+        pos[scored] = TABLE_SIZE / 2
+        vel[scored] = 0
+        
+        moving = self.active & ((vx != 0) | (vy != 0) | paddles_moved | pushed | scored)
+        return self._updates(np.flatnonzero(moving), scored)
+    
+    def _updates(self, slots: np.ndarray, scored: np.ndarray) -> Dict[str, Dict[str, Any]]:
+        """Build the per-room state updates for the given slots"""
+        positions = np.round(self.pos[slots], 2).tolist()
+        paddles = np.round(self.paddle[slots], 2).tolist()
+        updates = {}
+        for slot, (px, py), ((p1x, p1y), (p2x, p2y)) in zip(slots.tolist(), positions, paddles):
+            update = {
+                "puck_position": {"x": px, "y": py},
+                "player1_paddle": {"x": p1x, "y": p1y},
+                "player2_paddle": {"x": p2x, "y": p2y},
+            }
+            if scored[slot]:
+                update["player1_score"] = int(self.scores[slot, 0])
+                update["player2_score"] = int(self.scores[slot, 1])
+            updates[self._rooms[slot]] = update
+        return updates
+
+
+# Global Air Hockey simulation
+air_hockey_world = AirHockeyWorld()
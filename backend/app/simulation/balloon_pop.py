@@ -0,0 +1,257 @@
+import math
+import secrets
+import time
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence
+from app.simulation import Simulation
+
+# Field coordinates: 0-100 on both axes. Balloons rise from below the bottom edge.
+FIELD_SIZE = 100.0
+MAX_PLAYERS = 8
+MAX_BALLOONS = 32  # balloon slots per match; at most this many are in the air at once
+SPAWN_INTERVAL = 0.8  # seconds between balloons
+BALLOON_RADIUS = (4.0, 9.0)
+BALLOON_SPEED = (8.0, 20.0)  # field units per second
+COLORS = ("red", "blue", "green", "yellow", "purple", "orange")
+# How far from a balloon's centre (beyond its radius) a pop may land, for client lag
+POP_TOLERANCE = 6.0
+# Claims name a balloon number below this (fits the int64 balloon arrays)
+MAX_BALLOON_ID = 2 ** 62
+
+# State keys only the simulation may write while a match is authoritative
+SERVER_OWNED_KEYS = frozenset({
+    "balloons", "scores", "pops", "winner",
+})
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_FIELDS = 4  # random draws per balloon: x, radius, speed, colour
+
+
+def _uniform(seeds: np.ndarray, counters: np.ndarray, field: int) -> np.ndarray:
+    """Uniform [0, 1) draws keyed by (seed, counter, field) - splitmix64.
+
+    Counter-based, so balloon k of a match always gets the same values for
+    that match's seed, whatever else the world is simulating.
+    """
+    with np.errstate(over="ignore"):
+        z = seeds + (counters.astype(np.uint64) * np.uint64(_FIELDS) + np.uint64(field + 1)) * _GOLDEN
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+class BalloonPopWorld(Simulation):
+    """
+    Authoritative Balloon Pop for every match on this worker.
+
+    Each match has a seed; balloon k's position, size, speed and colour are
+    a pure function of (seed, k), and one spawns every SPAWN_INTERVAL
+    seconds of match time, so a match's balloons can be replayed from its
+    seed. Clients claim pops with PLAYER_INPUT (``{"pop": id, "x", "y"}``,
+    the hand's position); claims are buffered and resolved once per step
+    for all matches at once: a claim counts if the balloon is still in the
+    air and the hand is on it, and of several claims on one balloon the
+    earliest received wins.
+    """
+    
+    def __init__(self, capacity: int = 64):
+        self._rooms: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._players: Dict[str, List[str]] = {}
+        self._free: List[int] = []
+        self._claims: List[tuple] = []  # (received, match slot, player index, balloon, x, y)
+        self._allocate(capacity)
+    
+    def _allocate(self, capacity: int):
+        old = len(self._rooms)
+        arrays = {
+            "active": np.zeros(capacity, dtype=bool),
+            "seed": np.zeros(capacity, dtype=np.uint64),
+            "clock": np.zeros(capacity),  # match time in seconds
+            "spawned": np.zeros(capacity, dtype=np.int64),  # balloons spawned so far
+            "scores": np.zeros(capacity * MAX_PLAYERS, dtype=np.int64),
+            "balloon": np.full(capacity * MAX_BALLOONS, -1, dtype=np.int64),  # number k, -1 when free
+            "balloon_x": np.zeros(capacity * MAX_BALLOONS),
+            "balloon_y": np.zeros(capacity * MAX_BALLOONS),  # at spawn
+            "balloon_born": np.zeros(capacity * MAX_BALLOONS),  # match time at spawn
+            "balloon_radius": np.zeros(capacity * MAX_BALLOONS),
+            "balloon_speed": np.zeros(capacity * MAX_BALLOONS),
+            "balloon_color": np.zeros(capacity * MAX_BALLOONS, dtype=np.int64),
+        }
+        for name, array in arrays.items():
+            if old:
+                array[:len(getattr(self, name))] = getattr(self, name)
+            setattr(self, name, array)
+        
+        self._rooms.extend([None] * (capacity - old))
+        self._free.extend(range(capacity - 1, old - 1, -1))
+    
+    def has_match(self, room_code: str) -> bool:
+        return room_code in self._slots
+    
+    def add_match(self, room_code: str, player_ids: Sequence[str], seed: Optional[int] = None) -> int:
+        """Start a match with no balloons and zero scores; returns the match's seed"""
+        self.remove_match(room_code)
+        if not self._free:
+            self._allocate(len(self._rooms) * 2)
+        seed = secrets.randbits(64) if seed is None else seed
+        
+        slot = self._free.pop()
+        self._rooms[slot] = room_code
+        self._slots[room_code] = slot
+        self._players[room_code] = list(player_ids[:MAX_PLAYERS])
+        
+        self.seed[slot] = seed
+        self.clock[slot] = 0.0
+        self.spawned[slot] = 0
+        self.scores[slot * MAX_PLAYERS:(slot + 1) * MAX_PLAYERS] = 0
+        self.balloon[slot * MAX_BALLOONS:(slot + 1) * MAX_BALLOONS] = -1
+        self.active[slot] = True
+        return seed
+    
+    def remove_match(self, room_code: str):
+        slot = self._slots.pop(room_code, None)
+        if slot is None:
+            return
+        self._players.pop(room_code, None)
+        self._rooms[slot] = None
+        self.active[slot] = False
+        self._free.append(slot)
+    
+    def claim(self, room_code: str, player_id: str, balloon_id: Any, x: float, y: float) -> bool:
+        """Queue a pop claim; resolved on the next step"""
+        slot = self._slots.get(room_code)
+        if slot is None or player_id not in self._players[room_code]:
+            return False
+        if type(balloon_id) is int:
+            balloon = balloon_id
+        elif type(balloon_id) is str and balloon_id.isascii() and balloon_id.isdigit() and len(balloon_id) <= 19:
+            balloon = int(balloon_id)
+        else:
+            return False
+        if not (0 <= balloon < MAX_BALLOON_ID and math.isfinite(x) and math.isfinite(y)):
+            return False
+        player = self._players[room_code].index(player_id)
+        self._claims.append((time.monotonic(), slot, player, balloon, x, y))
+        return True
+    
+    def step(self, dt: float) -> Dict[str, Dict[str, Any]]:
+        """Advance every match by ``dt`` seconds; returns state updates for rooms that changed"""
+        if not self._slots:
+            self._claims.clear()
+            return {}
+        changed = np.zeros(len(self._rooms), dtype=bool)
+        self.clock[self.active] += dt
+        
+        self._spawn(changed)
+        self._escape(changed)
+        pops = self._resolve_claims()
+        changed[pops[0] // MAX_BALLOONS] = True
+        return self._updates(changed, pops)
+    
+    def _positions(self, balloons: np.ndarray) -> np.ndarray:
+        """Current y of balloon slots"""
+        age = self.clock[balloons // MAX_BALLOONS] - self.balloon_born[balloons]
+        return self.balloon_y[balloons] - self.balloon_speed[balloons] * age
+    
+    def _spawn(self, changed: np.ndarray):
+        """Spawn balloon number ``spawned`` in matches whose time for it has come"""
+        matches = np.flatnonzero(self.active & (self.spawned * SPAWN_INTERVAL <= self.clock))
+        if not len(matches):
+            return
+        numbers = self.spawned[matches]
+        self.spawned[matches] += 1
+        slots = matches * MAX_BALLOONS + numbers % MAX_BALLOONS
+        # A slot still taken means too many balloons in the air; that balloon is skipped
+        free = self.balloon[slots] < 0
+        matches, numbers, slots = matches[free], numbers[free], slots[free]
+        
+        seeds = self.seed[matches]
+        radius = BALLOON_RADIUS[0] + _uniform(seeds, numbers, 1) * (BALLOON_RADIUS[1] - BALLOON_RADIUS[0])
+        self.balloon[slots] = numbers
+        self.balloon_radius[slots] = radius
+        self.balloon_x[slots] = radius + _uniform(seeds, numbers, 0) * (FIELD_SIZE - 2 * radius)
+        self.balloon_y[slots] = FIELD_SIZE + radius
+        self.balloon_born[slots] = self.clock[matches]
+        self.balloon_speed[slots] = BALLOON_SPEED[0] + _uniform(seeds, numbers, 2) * (BALLOON_SPEED[1] - BALLOON_SPEED[0])
+        self.balloon_color[slots] = (_uniform(seeds, numbers, 3) * len(COLORS)).astype(np.int64)
+        changed[matches] = True
+    
+    def _escape(self, changed: np.ndarray):
+        """Free balloons that floated off the top"""
+        balloons = np.flatnonzero(self.balloon >= 0)
+        gone = balloons[self._positions(balloons) < -self.balloon_radius[balloons]]
+        self.balloon[gone] = -1
+        changed[gone // MAX_BALLOONS] = True
+    
+    def _resolve_claims(self):
+        """Apply this step's pop claims; returns the popped balloon slots, numbers and players"""
+        if not self._claims:
+            return (np.zeros(0, dtype=np.int64),) * 3
+        claims, self._claims = self._claims, []
+        columns = zip(*claims)
+        received, matches, players, numbers, x, y = (
+            np.fromiter(column, dtype=dtype, count=len(claims))
+            for column, dtype in zip(columns, (np.float64, np.int64, np.int64, np.int64, np.float64, np.float64))
+        )
+        
+        # Valid: match still running, balloon still in the air, hand on it
+        slots = matches * MAX_BALLOONS + numbers % MAX_BALLOONS
+        valid = self.active[matches] & (self.balloon[slots] == numbers)
+        reach = self.balloon_radius[slots] + POP_TOLERANCE
+        valid &= np.hypot(x - self.balloon_x[slots], y - self._positions(slots)) <= reach
+        slots, players, received = slots[valid], players[valid], received[valid]
+        
+        # First claim per balloon: sort by balloon, then time received; keep the first of each run
+        order = np.lexsort((received, slots))
+        slots, players = slots[order], players[order]
+        slots, first = np.unique(slots, return_index=True)
+        players = players[first]
+        
+        numbers = self.balloon[slots]
+        self.balloon[slots] = -1
+        np.add.at(self.scores, slots // MAX_BALLOONS * MAX_PLAYERS + players, 1)
+        return slots, numbers, players
+    
+    def _balloon_list(self, match: int) -> List[Dict[str, Any]]:
+        balloons = match * MAX_BALLOONS + np.flatnonzero(self.balloon[match * MAX_BALLOONS:(match + 1) * MAX_BALLOONS] >= 0)
+        balloons = balloons[np.argsort(self.balloon[balloons])]
+        return [
+            {"id": str(k), "x": x, "y": y, "radius": r, "speed": s, "color": COLORS[c], "popped": False}
+            for k, x, y, r, s, c in zip(
+                self.balloon[balloons].tolist(),
+                np.round(self.balloon_x[balloons], 2).tolist(),
+                np.round(self._positions(balloons), 2).tolist(),
+                np.round(self.balloon_radius[balloons], 2).tolist(),
+                np.round(self.balloon_speed[balloons], 2).tolist(),
+                self.balloon_color[balloons].tolist(),
+            )
+        ]
+    
+    def _updates(self, changed: np.ndarray, pops) -> Dict[str, Dict[str, Any]]:
+        """Per-room state updates: the balloons in the air when one spawned, popped or
+        escaped (clients move them up at ``speed`` in between), scores and this step's
+        pops when someone popped one (the countdown is the game clock's)"""
+        updates: Dict[str, Dict[str, Any]] = {}
+        for match in np.flatnonzero(changed & self.active).tolist():
+            updates[self._rooms[match]] = {"balloons": self._balloon_list(match)}
+        
+        popped_slots, popped_numbers, popped_by = pops
+        for match in np.unique(popped_slots // MAX_BALLOONS).tolist():
+            room_code = self._rooms[match]
+            player_ids = self._players[room_code]
+            mine = popped_slots // MAX_BALLOONS == match
+            update = updates.setdefault(room_code, {})
+            update["scores"] = {
+                player_id: int(self.scores[match * MAX_PLAYERS + index]) for index, player_id in enumerate(player_ids)
+            }
+            update["pops"] = [
+                {"id": str(number), "player_id": player_ids[player]}
+                for number, player in zip(popped_numbers[mine].tolist(), popped_by[mine].tolist())
+            ]
+        return updates
+
+
+# Global Balloon Pop simulation
+balloon_pop_world = BalloonPopWorld()
@@ -0,0 +1,371 @@
+import math
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence
+from app.simulation import Simulation
+
+# Field coordinates: 0-100 on both axes, like the other games.
+FIELD_SIZE = 100.0
+GRID_CELLS = 8  # uniform grid of GRID_CELLS x GRID_CELLS cells per room
+CELL_SIZE = FIELD_SIZE / GRID_CELLS
+MAX_PLAYERS = 8  # player slots per room (bits of a laser's hit mask)
+MAX_LASERS = 64  # lasers alive per room, the size the state schema allows
+MAX_POINTS = 64  # landmarks a client may send per input
+POINT_HALF_SIZE = 3.0  # half size of the hitbox around a single input point
+HITBOX_PADDING = 1.0  # added around the landmarks' bounding box
+LASER_DAMAGE = 25.0  # health a laser takes from each player it touches (once per laser)
+SPAWN_INTERVAL = 1.5  # seconds between lasers at game speed 1
+SPEEDUP = 0.02  # game speed gained per second
+MAX_GAME_SPEED = 4.0
+LASER_SPEED = (10.0, 25.0)  # field units per second at game speed 1
+LASER_LENGTH = (30.0, 100.0)
+LASER_WIDTH = (1.0, 3.0)
+
+# State keys only the simulation may write while a match is authoritative
+SERVER_OWNED_KEYS = frozenset({
+    "lasers", "player_health", "alive_players", "game_speed", "winner",
+})
+
+
+def segment_box_hits(start: np.ndarray, direction: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """Which segments ``start + t * direction`` (t in [0, 1]) touch their box.
+
+    ``start`` and ``direction`` are (n, 2), ``boxes`` is (n, 4) as
+    (x_min, y_min, x_max, y_max). Slab clipping (Liang-Barsky), one row per
+    segment-box pair.
+    """
+    t_enter = np.zeros(len(start))
+    t_exit = np.ones(len(start))
+    inside = np.ones(len(start), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for axis in range(2):
+            origin, delta = start[:, axis], direction[:, axis]
+            low, high = boxes[:, axis], boxes[:, axis + 2]
+            parallel = delta == 0
+            # A segment parallel to the slab must start inside it
+            inside &= ~parallel | ((origin >= low) & (origin <= high))
+            t1 = (low - origin) / delta
+            t2 = (high - origin) / delta
+            t_enter = np.where(parallel, t_enter, np.maximum(t_enter, np.minimum(t1, t2)))
+            t_exit = np.where(parallel, t_exit, np.minimum(t_exit, np.maximum(t1, t2)))
+    return inside & (t_enter <= t_exit)
+
+
+def _cell_range(low: np.ndarray, high: np.ndarray):
+    """Grid cells overlapped along one axis, clipped to the field"""
+    first = np.clip(np.floor(low / CELL_SIZE), 0, GRID_CELLS - 1).astype(np.int64)
+    last = np.clip(np.floor(high / CELL_SIZE), 0, GRID_CELLS - 1).astype(np.int64)
+    return first, last
+
+
+def _cells(slots: np.ndarray, boxes: np.ndarray):
+    """Expand boxes into (box index, cell id) pairs for every grid cell they overlap"""
+    x0, x1 = _cell_range(boxes[:, 0], boxes[:, 2])
+    y0, y1 = _cell_range(boxes[:, 1], boxes[:, 3])
+    width = x1 - x0 + 1
+    counts = width * (y1 - y0 + 1)
+    index = np.repeat(np.arange(len(boxes)), counts)
+    # Position of each pair within its box's run of cells
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cell = (slots[index] * GRID_CELLS + y0[index] + k // width[index]) * GRID_CELLS + x0[index] + k % width[index]
+    return index, cell
+
+
+class LaserDodgerWorld(Simulation):
+    """
+    Authoritative Laser Dodger for every match on this worker.
+
+    The server spawns the lasers (segments sweeping across the field) and
+    works out who they hit; clients send the landmark positions of the
+    player's body as PLAYER_INPUT (``{"points": [[x, y], ...]}`` or a single
+    ``{"x", "y"}``), which become a hitbox. Lasers and players of every
+    match live in struct-of-arrays NumPy buffers. Each step moves all
+    lasers at once, finds candidate laser-player pairs through a uniform
+    grid per room (pairs sharing a cell) and tests only those, vectorised.
+    A laser damages each player once; players at zero health are out.
+    """
+    
+    def __init__(self, capacity: int = 64, max_lasers: int = MAX_LASERS, seed: Optional[int] = None):
+        self.max_lasers = max_lasers
+        self._rng = np.random.default_rng(seed)
+        self._rooms: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._players: Dict[str, List[str]] = {}  # room -> player ids by player slot
+        self._free: List[int] = []
+        self._allocate_rooms(capacity)
+        self._allocate_lasers(capacity * 8)
+        self.pairs_tested = 0  # narrow phase tests, for benchmarks
+    
+    def _allocate_rooms(self, capacity: int):
+        old = len(self._rooms)
+        arrays = {
+            "active": np.zeros(capacity, dtype=bool),
+            "game_speed": np.ones(capacity),
+            "next_spawn": np.zeros(capacity),
+            "laser_count": np.zeros(capacity, dtype=np.int64),
+            "box": np.zeros((capacity * MAX_PLAYERS, 4)),
+            "has_box": np.zeros(capacity * MAX_PLAYERS, dtype=bool),
+            "alive": np.zeros(capacity * MAX_PLAYERS, dtype=bool),
+            "health": np.zeros(capacity * MAX_PLAYERS),
+        }
+        for name, array in arrays.items():
+            if old:
+                array[:len(getattr(self, name))] = getattr(self, name)
+            setattr(self, name, array)
+        
+        self._rooms.extend([None] * (capacity - old))
+        self._free.extend(range(capacity - 1, old - 1, -1))
+    
+    def _allocate_lasers(self, capacity: int):
+        old = len(getattr(self, "laser_active", ()))
+        arrays = {
+            "laser_active": np.zeros(capacity, dtype=bool),
+            "laser_room": np.zeros(capacity, dtype=np.int64),
+            "laser_start": np.zeros((capacity, 2)),
+            "laser_direction": np.zeros((capacity, 2)),  # start to end
+            "laser_velocity": np.zeros((capacity, 2)),
+            "laser_half_width": np.zeros(capacity),
+            "laser_travel": np.zeros(capacity),  # distance left before it leaves the field
+            "laser_hit": np.zeros(capacity, dtype=np.uint16),  # player slots already damaged
+        }
+        for name, array in arrays.items():
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+        self._free_lasers = list(range(capacity - 1, old - 1, -1)) + getattr(self, "_free_lasers", [])
+    
+    def has_match(self, room_code: str) -> bool:
+        return room_code in self._slots
+    
+    def add_match(self, room_code: str, player_ids: Sequence[str]):
+        """Start a match with every player alive at full health and no lasers"""
+        self.remove_match(room_code)
+        if not self._free:
+            self._allocate_rooms(len(self._rooms) * 2)
+        
+        slot = self._free.pop()
+        self._rooms[slot] = room_code
+        self._slots[room_code] = slot
+        self._players[room_code] = list(player_ids[:MAX_PLAYERS])
+        
+        players = slice(slot * MAX_PLAYERS, (slot + 1) * MAX_PLAYERS)
+        count = len(self._players[room_code])
+        self.has_box[players] = False
+        self.alive[players] = np.arange(MAX_PLAYERS) < count
+        self.health[players] = np.where(self.alive[players], 100.0, 0.0)
+        self.game_speed[slot] = 1.0
+        self.next_spawn[slot] = SPAWN_INTERVAL
+        self.laser_count[slot] = 0
+        self.active[slot] = True
+    
+    def remove_match(self, room_code: str):
+        slot = self._slots.pop(room_code, None)
+        if slot is None:
+            return
+        self._players.pop(room_code, None)
+        self._rooms[slot] = None
+        self.active[slot] = False
+        self.alive[slot * MAX_PLAYERS:(slot + 1) * MAX_PLAYERS] = False
+        self._remove_lasers(np.flatnonzero(self.laser_active & (self.laser_room == slot)))
+        self._free.append(slot)
+    
+    def set_hitbox(self, room_code: str, player_id: str, points: Any) -> bool:
+        """Set a player's hitbox from landmark points ``[[x, y], ...]`` or a single ``{"x", "y"}``"""
+        slot = self._slots.get(room_code)
+        if slot is None or player_id not in self._players[room_code]:
+            return False
+        
+        if isinstance(points, dict):
+            try:
+                x, y = float(points["x"]), float(points["y"])
+            except (KeyError, TypeError, ValueError):
+                return False
+            padding = POINT_HALF_SIZE
+            low, high = np.array([x, y]), np.array([x, y])
+        else:
+            try:
+                coordinates = np.asarray(points, dtype=float)
+            except (TypeError, ValueError):
+                return False
+            if coordinates.ndim != 2 or coordinates.shape[1] != 2 or not 0 < len(coordinates) <= MAX_POINTS:
+                return False
+            padding = HITBOX_PADDING
+            low, high = coordinates.min(axis=0), coordinates.max(axis=0)
+        if not (np.isfinite(low).all() and np.isfinite(high).all()):
+            return False
+        
+        player = slot * MAX_PLAYERS + self._players[room_code].index(player_id)
+        self.box[player, :2] = np.clip(low - padding, 0, FIELD_SIZE)
+        self.box[player, 2:] = np.clip(high + padding, 0, FIELD_SIZE)
+        self.has_box[player] = True
+        return True
+    
+    def spawn_laser(self, room_code: str, x: float, y: float, angle: float,
+                    length: float, width: float, speed: float) -> bool:
+        """Add a laser from (x, y) along ``angle`` (degrees) moving at ``speed`` along its normal"""
+        slot = self._slots.get(room_code)
+        if slot is None or self.laser_count[slot] >= self.max_lasers:
+            return False
+        self._spawn(slot, x, y, angle, length, width, speed)
+        return True
+    
+    def _spawn(self, slot: int, x: float, y: float, angle: float, length: float, width: float, speed: float):
+        if not self._free_lasers:
+            self._allocate_lasers(len(self.laser_active) * 2)
+        laser = self._free_lasers.pop()
+        radians = math.radians(angle)
+        direction = np.array([math.cos(radians), math.sin(radians)])
+        self.laser_active[laser] = True
+        self.laser_room[laser] = slot
+        self.laser_start[laser] = (x, y)
+        self.laser_direction[laser] = direction * length
+        self.laser_velocity[laser] = np.array([-direction[1], direction[0]]) * speed
+        self.laser_half_width[laser] = width / 2
+        self.laser_travel[laser] = FIELD_SIZE + 2 * length
+        self.laser_hit[laser] = 0
+        self.laser_count[slot] += 1
+    
+    def _spawn_random(self, slot: int):
+        """A laser entering across one edge of the field, sweeping to the opposite one"""
+        rng = self._rng
+        speed = rng.uniform(*LASER_SPEED) * self.game_speed[slot]
+        length = rng.uniform(*LASER_LENGTH)
+        width = rng.uniform(*LASER_WIDTH)
+        along = rng.uniform(0, FIELD_SIZE - length) if length < FIELD_SIZE else 0.0
+        tilt = rng.uniform(-20, 20)
+        # Moving along the normal (angle + 90 degrees): pick the entry edge by direction
+        edge = int(rng.integers(4))
+        if edge == 0:  # from the top, moving down
+            x, y, angle = along, -length, tilt
+        elif edge == 1:  # from the bottom, moving up
+            x, y, angle = along + length, FIELD_SIZE + length, 180 + tilt
+        elif edge == 2:  # from the left, moving right
+            x, y, angle = -length, along + length, -90 + tilt
+        else:  # from the right, moving left
+            x, y, angle = FIELD_SIZE + length, along, 90 + tilt
+        self._spawn(slot, x, y, angle, length, width, speed)
+    
+    def _remove_lasers(self, lasers: np.ndarray):
+        if not len(lasers):
+            return
+        self.laser_active[lasers] = False
+        np.subtract.at(self.laser_count, self.laser_room[lasers], 1)
+        self._free_lasers.extend(lasers.tolist())
+    
+    def step(self, dt: float) -> Dict[str, Dict[str, Any]]:
+        """Advance every match by ``dt`` seconds; returns state updates for rooms that changed"""
+        if not self._slots:
+            return {}
+        changed_lasers = np.zeros(len(self._rooms), dtype=bool)
+        
+        # Difficulty ramps up; lasers spawn faster as the game speeds up
+        self.game_speed[self.active] = np.minimum(self.game_speed[self.active] + SPEEDUP * dt, MAX_GAME_SPEED)
+        self.next_spawn[self.active] -= dt * self.game_speed[self.active]
+        for slot in np.flatnonzero(self.active & (self.next_spawn <= 0)).tolist():
+            self.next_spawn[slot] += SPAWN_INTERVAL
+            if self.laser_count[slot] < self.max_lasers:
+                self._spawn_random(slot)
+                changed_lasers[slot] = True
+        
+        # Move lasers; drop those that crossed the field
+        active = np.flatnonzero(self.laser_active)
+        self.laser_start[active] += self.laser_velocity[active] * dt
+        self.laser_travel[active] -= np.hypot(*self.laser_velocity[active].T) * dt
+        gone = active[self.laser_travel[active] <= 0]
+        changed_lasers[self.laser_room[gone]] = True
+        self._remove_lasers(gone)
+        
+        hit_players = self._collide()
+        return self._updates(changed_lasers, hit_players)
+    
+    def _collide(self) -> np.ndarray:
+        """Damage players touched by lasers; returns the player slots hit this step"""
+        players = np.flatnonzero(self.alive & self.has_box)
+        lasers = np.flatnonzero(self.laser_active)
+        if not len(players) or not len(lasers):
+            return players[:0]
+        
+        # Broad phase: laser and player boxes into grid cells, keyed by room and cell
+        start = self.laser_start[lasers]
+        end = start + self.laser_direction[lasers]
+        half_width = self.laser_half_width[lasers][:, None]
+        laser_boxes = np.hstack([np.minimum(start, end) - half_width, np.maximum(start, end) + half_width])
+        on_field = ((laser_boxes[:, 2] >= 0) & (laser_boxes[:, 0] <= FIELD_SIZE)
+                    & (laser_boxes[:, 3] >= 0) & (laser_boxes[:, 1] <= FIELD_SIZE))
+        lasers, laser_boxes = lasers[on_field], laser_boxes[on_field]
+        if not len(lasers):
+            return players[:0]
+        
+        laser_index, laser_cells = _cells(self.laser_room[lasers], laser_boxes)
+        player_index, player_cells = _cells(players // MAX_PLAYERS, self.box[players])
+        order = np.argsort(player_cells, kind="stable")
+        player_cells, player_index = player_cells[order], player_index[order]
+        
+        # Every (laser, player) pair sharing a cell, once
+        first = np.searchsorted(player_cells, laser_cells, side="left")
+        counts = np.searchsorted(player_cells, laser_cells, side="right") - first
+        pair_laser = np.repeat(laser_index, counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_player = player_index[np.repeat(first, counts) + k]
+        pairs = np.unique(pair_laser * len(players) + pair_player)
+        pair_laser, pair_player = lasers[pairs // len(players)], players[pairs % len(players)]
+        
+        # Skip players each laser already damaged
+        bit = (1 << (pair_player % MAX_PLAYERS)).astype(np.uint16)
+        fresh = (self.laser_hit[pair_laser] & bit) == 0
+        pair_laser, pair_player, bit = pair_laser[fresh], pair_player[fresh], bit[fresh]
+        self.pairs_tested += len(pair_laser)
+        
+        # Narrow phase: the segment against the player's box grown by the laser's half width
+        grow = self.laser_half_width[pair_laser][:, None]
+        boxes = np.hstack([self.box[pair_player, :2] - grow, self.box[pair_player, 2:] + grow])
+        hits = segment_box_hits(self.laser_start[pair_laser], self.laser_direction[pair_laser], boxes)
+        if not hits.any():
+            return players[:0]
+        
+        pair_laser, pair_player = pair_laser[hits], pair_player[hits]
+        np.bitwise_or.at(self.laser_hit, pair_laser, bit[hits])
+        np.subtract.at(self.health, pair_player, LASER_DAMAGE)
+        np.maximum(self.health, 0, out=self.health)
+        hit = np.unique(pair_player)
+        self.alive[hit] = self.health[hit] > 0
+        return hit
+    
+    def _laser_list(self, slot: int) -> List[Dict[str, float]]:
+        lasers = np.flatnonzero(self.laser_active & (self.laser_room == slot))
+        start = np.round(self.laser_start[lasers], 2).tolist()
+        direction = self.laser_direction[lasers]
+        length = np.hypot(direction[:, 0], direction[:, 1])
+        angle = np.round(np.degrees(np.arctan2(direction[:, 1], direction[:, 0])), 2).tolist()
+        speed = np.round(np.hypot(*self.laser_velocity[lasers].T), 2).tolist()
+        width = np.round(self.laser_half_width[lasers] * 2, 2).tolist()
+        return [
+            {"x": x, "y": y, "angle": a, "speed": s, "width": w, "length": l}
+            for (x, y), a, s, w, l in zip(start, angle, speed, width, np.round(length, 2).tolist())
+        ]
+    
+    def _updates(self, changed_lasers: np.ndarray, hit_players: np.ndarray) -> Dict[str, Dict[str, Any]]:
+        """Per-room state updates: lasers when some spawned or left (clients move them
+        in between from ``speed`` along angle + 90 degrees), health when someone was hit"""
+        updates: Dict[str, Dict[str, Any]] = {}
+        for slot in np.flatnonzero(changed_lasers & self.active).tolist():
+            updates[self._rooms[slot]] = {
+                "lasers": self._laser_list(slot),
+                "game_speed": round(float(self.game_speed[slot]), 2),
+            }
+        
+        for slot in np.unique(hit_players // MAX_PLAYERS).tolist():
+            room_code = self._rooms[slot]
+            player_ids = self._players[room_code]
+            base = slot * MAX_PLAYERS
+            update = updates.setdefault(room_code, {})
+            update["player_health"] = {
+                player_id: int(self.health[base + index]) for index, player_id in enumerate(player_ids)
+            }
+            update["alive_players"] = [
+                player_id for index, player_id in enumerate(player_ids) if self.alive[base + index]
+            ]
+        return updates
+
+
+# Global Laser Dodger simulation
+laser_dodger_world = LaserDodgerWorld()
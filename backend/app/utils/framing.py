@@ -0,0 +1,153 @@
+"""
+Binary WebSocket framing, negotiated per connection.
+
+JSON text frames stay the default. A client that offers the
+``gamifyou.msgpack`` subprotocol exchanges binary frames instead: a tag byte
+followed by either a MessagePack-encoded message or, for the highest-rate
+messages, a fixed struct layout:
+
+    TAG_MSGPACK    any message                         msgpack({type, data})
+    TAG_INPUT      PLAYER_INPUT {x, y}                 <ff   x, y
+    TAG_POSITION   GAME_STATE_UPDATE {state: {key: {x, y}}}
+                                                       <ff   x, y, then the key in UTF-8
+    TAG_POSITIONS  GAME_STATE_DELTA of POSITION_KEYS   <IIB  seq, base_seq, key mask,
+                                                       then <ff per key in the mask
+
+Positions travel as float32 and are rounded to 2 decimals when decoded,
+the precision the simulations broadcast with. ``encode`` uses a struct
+layout whenever a message fits one and MessagePack otherwise; clients may
+mix binary and JSON text frames. Uses msgpack when it is installed; without it
+the subprotocol is never accepted and every client speaks JSON.
+"""
+import struct
+from typing import Any, Iterable, Optional
+
+from app.models import WSMessageType
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+MSGPACK_SUBPROTOCOL = "gamifyou.msgpack"
+
+TAG_MSGPACK = 0
+TAG_INPUT = 1
+TAG_POSITION = 2
+TAG_POSITIONS = 16
+
+# Keys a TAG_POSITIONS frame can carry, in mask bit order
+POSITION_KEYS = ("puck_position", "player1_paddle", "player2_paddle")
+
+_POINT = struct.Struct("<ff")
+_TAGGED_POINT = struct.Struct("<Bff")
+_POSITIONS_HEADER = struct.Struct("<BIIB")
+_POSITIONS = [struct.Struct("<BIIB" + "ff" * count) for count in range(len(POSITION_KEYS) + 1)]
+
+
+def negotiate(offered: Iterable[str]) -> Optional[str]:
+    """Subprotocol to accept from the ones a client offered (None: JSON)"""
+    if msgpack is not None and MSGPACK_SUBPROTOCOL in offered:
+        return MSGPACK_SUBPROTOCOL
+    return None
+
+
+def _point(value: Any) -> Optional[tuple]:
+    if type(value) is dict and len(value) == 2 and "x" in value and "y" in value:
+        return value["x"], value["y"]
+    return None
+
+
+def _encode_struct(message: dict) -> Optional[bytes]:
+    message_type, data = message.get("type"), message.get("data")
+    if type(data) is not dict:
+        return None
+    
+    if message_type == WSMessageType.PLAYER_INPUT:
+        point = _point(data)
+        if point:
+            return _TAGGED_POINT.pack(TAG_INPUT, *point)
+    
+    elif message_type == WSMessageType.GAME_STATE_UPDATE:
+        state = data.get("state")
+        if len(data) == 1 and type(state) is dict and len(state) == 1:
+            key, value = next(iter(state.items()))
+            point = _point(value)
+            if point:
+                return _TAGGED_POINT.pack(TAG_POSITION, *point) + key.encode()
+    
+    elif message_type == WSMessageType.GAME_STATE_DELTA:
+        changed = data.get("changed")
+        if data.get("player_id") is not None or data.get("removed") or not changed:
+            return None
+        mask, coordinates = 0, []
+        for bit, key in enumerate(POSITION_KEYS):
+            if key in changed:
+                point = _point(changed[key])
+                if not point:
+                    return None
+                mask |= 1 << bit
+                coordinates.extend(point)
+        if len(coordinates) != 2 * len(changed):
+            return None  # other keys changed too
+        seq = data["seq"]
+        return _POSITIONS[len(changed)].pack(TAG_POSITIONS, seq, data.get("base_seq", seq - 1), mask, *coordinates)
+    
+    return None
+
+
+def encode(message: dict) -> bytes:
+    """Encode a message as a binary frame"""
+    try:
+        frame = _encode_struct(message)
+    except (struct.error, TypeError, KeyError):
+        frame = None  # values that do not fit the layout
+    if frame is None:
+        frame = bytes([TAG_MSGPACK]) + msgpack.packb(message)
+    return frame
+
+
+def _decoded_point(frame: bytes, offset: int) -> dict:
+    x, y = _POINT.unpack_from(frame, offset)
+    return {"x": round(x, 2), "y": round(y, 2)}
+
+
+def decode(frame: bytes) -> dict:
+    """Decode a binary frame into the message it carries; raises ValueError if malformed"""
+    if not frame or msgpack is None:
+        raise ValueError("Binary frames are not supported" if frame else "Empty frame")
+    tag = frame[0]
+    try:
+        if tag == TAG_MSGPACK:
+            message = msgpack.unpackb(frame[1:])
+            if type(message) is not dict:
+                raise ValueError("Frame is not a message")
+            return message
+        
+        if tag == TAG_INPUT:
+            return {"type": WSMessageType.PLAYER_INPUT.value, "data": _decoded_point(frame, 1)}
+        
+        if tag == TAG_POSITION:
+            key = frame[_TAGGED_POINT.size:].decode()
+            return {
+                "type": WSMessageType.GAME_STATE_UPDATE.value,
+                "data": {"state": {key: _decoded_point(frame, 1)}}
+            }
+        
+        if tag == TAG_POSITIONS:
+            _, seq, base_seq, mask = _POSITIONS_HEADER.unpack_from(frame)
+            changed, offset = {}, _POSITIONS_HEADER.size
+            for bit, key in enumerate(POSITION_KEYS):
+                if mask & (1 << bit):
+                    changed[key] = _decoded_point(frame, offset)
+                    offset += _POINT.size
+            data = {"player_id": None, "seq": seq}
+            if base_seq != seq - 1:
+                data["base_seq"] = base_seq
+            data["changed"], data["removed"] = changed, []
+            return {"type": WSMessageType.GAME_STATE_DELTA.value, "data": data}
+    
+    except (struct.error, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed frame: {e}") from e
+    
+    raise ValueError(f"Unknown frame tag {tag}")
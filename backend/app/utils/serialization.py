@@ -0,0 +1,41 @@
+"""
+JSON encoding used on the hot paths (WebSocket frames, Redis values).
+
+Uses orjson when it is installed and falls back to the standard library,
+so both backends produce compact JSON text and accept str or bytes.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so this catches both
+JSONDecodeError = json.JSONDecodeError
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+
+    def dumps(value: Any) -> str:
+        """Encode a value as compact JSON text"""
+        return orjson.dumps(value).decode()
+
+    def loads(data) -> Any:
+        """Decode JSON text or bytes"""
+        return orjson.loads(data)
+
+else:
+    BACKEND = "json"
+
+    _encoder = json.JSONEncoder(separators=(",", ":"))
+
+    def dumps(value: Any) -> str:
+        """Encode a value as compact JSON text"""
+        return _encoder.encode(value)
+
+    def loads(data) -> Any:
+        """Decode JSON text or bytes"""
+        return json.loads(data)
@@ -0,0 +1,100 @@
+"""
+Hierarchical timer wheel.
+
+Timers are bucketed by expiry tick into ``levels`` wheels of ``slots``
+buckets each: level 0 holds timers due within ``slots`` ticks, level 1
+within ``slots ** 2`` ticks, and so on. Advancing one tick empties one
+level-0 bucket; whenever a level's index wraps, the next level's current
+bucket is redistributed ("cascaded") into the finer levels. Scheduling and
+cancelling are O(1) and a tick touches only the timers due in it, however
+many are pending. Times are plain floats (e.g. ``loop.time()``); nothing
+here sleeps, the owner calls ``advance``.
+"""
+import math
+from typing import Any, Dict, List, Optional
+
+
+class Timer:
+    __slots__ = ("expires", "item", "bucket")
+    
+    def __init__(self, expires: int, item: Any):
+        self.expires = expires  # tick
+        self.item = item
+        self.bucket: Optional[Dict[int, "Timer"]] = None
+
+
+class TimerWheel:
+    def __init__(self, resolution: float = 0.1, slot_bits: int = 6, levels: int = 4, now: float = 0.0):
+        self.resolution = resolution
+        self._bits = slot_bits
+        self._mask = (1 << slot_bits) - 1
+        self._levels = levels
+        self._wheels: List[List[Dict[int, Timer]]] = [
+            [{} for _ in range(1 << slot_bits)] for _ in range(levels)
+        ]
+        self._tick = int(now / resolution)  # next tick to process
+        self._count = 0
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    @property
+    def next_tick_time(self) -> float:
+        """When the next tick is due"""
+        return self._tick * self.resolution
+    
+    def schedule(self, when: float, item: Any) -> Timer:
+        """Fire ``item`` from the first ``advance`` at or after time ``when``"""
+        timer = Timer(max(math.ceil(when / self.resolution), self._tick), item)
+        self._place(timer)
+        self._count += 1
+        return timer
+    
+    def cancel(self, timer: Timer):
+        if timer.bucket is not None:
+            del timer.bucket[id(timer)]
+            timer.bucket = None
+            self._count -= 1
+    
+    def advance(self, now: float) -> List[Any]:
+        """Process every tick up to ``now``; returns the items of timers that expired, in order"""
+        target = int(now / self.resolution)
+        if not self._count:
+            self._tick = max(self._tick, target + 1)
+            return []
+        
+        expired = []
+        while self._tick <= target and self._count:
+            tick = self._tick
+            # Cascade coarser levels whose index wrapped at this tick
+            for level in range(1, self._levels):
+                if tick & ((1 << (self._bits * level)) - 1):
+                    break
+                bucket = self._wheels[level][(tick >> (self._bits * level)) & self._mask]
+                timers = list(bucket.values())
+                bucket.clear()
+                for timer in timers:
+                    self._place(timer)
+            
+            bucket = self._wheels[0][tick & self._mask]
+            for timer in list(bucket.values()):
+                if timer.expires <= tick:
+                    del bucket[id(timer)]
+                    timer.bucket = None
+                    self._count -= 1
+                    expired.append(timer.item)
+            self._tick += 1
+        self._tick = max(self._tick, target + 1)
+        return expired
+    
+    def _place(self, timer: Timer):
+        delta = max(timer.expires - self._tick, 0)
+        level = 0
+        while level < self._levels - 1 and delta >> (self._bits * (level + 1)):
+            level += 1
+        # Beyond the last level's range: park in its furthest bucket, re-placed on cascade
+        expires = min(timer.expires, self._tick + (1 << (self._bits * self._levels)) - 1)
+        expires = max(expires, self._tick)
+        bucket = self._wheels[level][(expires >> (self._bits * level)) & self._mask]
+        bucket[id(timer)] = timer
+        timer.bucket = bucket
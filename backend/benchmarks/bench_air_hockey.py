@@ -0,0 +1,68 @@
+"""
+Benchmark the authoritative Air Hockey simulation.
+
+Steps N concurrent matches with paddles moving every tick (worst case: every
+match produces an update) and reports how many matches one core can keep at
+the configured tick rate.
+
+    python -m benchmarks.bench_air_hockey --matches 100 500 1000 --tick-rate 30
+"""
+import argparse
+import time
+import numpy as np
+
+from app.simulation.air_hockey import AirHockeyWorld
+
+
+def run(matches: int, steps: int, tick_rate: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    world = AirHockeyWorld()
+    rooms = [f"R{i:05d}" for i in range(matches)]
+    for room_code in rooms:
+        world.add_match(room_code, "p1", "p2")
+
+    # Pre-generate paddle inputs so the timed loop only measures the server work
+    inputs = rng.uniform(0, 100, size=(steps, matches, 2, 2)).tolist()
+    dt = 1 / tick_rate
+
+    physics_time = 0.0
+    total_start = time.perf_counter()
+    for step in range(steps):
+        for room_code, ((x1, y1), (x2, y2)) in zip(rooms, inputs[step]):
+            world.set_paddle(room_code, "p1", x1, y1)
+            world.set_paddle(room_code, "p2", x2, y2)
+        start = time.perf_counter()
+        world.step(dt)
+        physics_time += time.perf_counter() - start
+    total_time = time.perf_counter() - total_start
+
+    step_time = total_time / steps
+    return {
+        "matches": matches,
+        "tick_rate": tick_rate,
+        "step_ms": round(step_time * 1000, 3),
+        "physics_step_ms": round(physics_time / steps * 1000, 3),
+        "match_steps_per_sec": round(matches / step_time),
+        # Matches one core sustains at the tick rate, inputs included
+        "matches_per_core": int(matches / (step_time * tick_rate)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, nargs="+", default=[100, 500, 1000, 2000])
+    parser.add_argument("--steps", type=int, default=300)
+    parser.add_argument("--tick-rate", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'matches':>8} {'step ms':>9} {'physics ms':>11} {'match-steps/s':>14} {'matches/core':>13}")
+    for matches in args.matches:
+        result = run(matches, args.steps, args.tick_rate)
+        print(
+            f"{result['matches']:>8} {result['step_ms']:>9} {result['physics_step_ms']:>11} "
+            f"{result['match_steps_per_sec']:>14} {result['matches_per_core']:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark the authoritative Laser Dodger collision detection.
+
+Fills N matches with L lasers each (scattered over the field) and six
+players whose hitboxes move every tick, then steps the world. Health and
+each laser's hit mask are reset before every step so every laser-player
+pair stays eligible (worst case). Reports how many laser-player pairs are
+resolved per second, how many of them the grid lets through to the exact
+segment-vs-box test, and how many matches one core keeps at the tick rate.
+
+    python -m benchmarks.bench_laser_dodger --matches 100 500 --lasers 64 256 --tick-rate 20
+"""
+import argparse
+import copy
+import time
+import numpy as np
+
+from app.simulation.laser_dodger import LaserDodgerWorld, MAX_PLAYERS, FIELD_SIZE, segment_box_hits
+
+PLAYERS = 6
+
+
+def brute_force_hits(world: LaserDodgerWorld) -> set:
+    """Every eligible (laser, player) pair tested exactly, no grid"""
+    lasers = np.flatnonzero(world.laser_active)
+    players = np.flatnonzero(world.alive & world.has_box)
+    laser, player = np.meshgrid(lasers, players, indexing="ij")
+    laser, player = laser.ravel(), player.ravel()
+    same_room = world.laser_room[laser] == player // MAX_PLAYERS
+    laser, player = laser[same_room], player[same_room]
+    grow = world.laser_half_width[laser][:, None]
+    boxes = np.hstack([world.box[player, :2] - grow, world.box[player, 2:] + grow])
+    hits = segment_box_hits(world.laser_start[laser], world.laser_direction[laser], boxes)
+    return set(zip(laser[hits].tolist(), player[hits].tolist()))
+
+
+def grid_hits(world: LaserDodgerWorld) -> set:
+    """The pairs the world's grid-based step marks as hit"""
+    world = copy.deepcopy(world)
+    world._collide()
+    lasers = np.flatnonzero(world.laser_hit)
+    return {
+        (laser, int(world.laser_room[laser]) * MAX_PLAYERS + index)
+        for laser in lasers.tolist() for index in range(MAX_PLAYERS)
+        if world.laser_hit[laser] & (1 << index)
+    }
+
+
+def run(matches: int, lasers: int, steps: int, tick_rate: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    world = LaserDodgerWorld(max_lasers=lasers, seed=seed)
+    rooms = [f"R{i:05d}" for i in range(matches)]
+    for room_code in rooms:
+        world.add_match(room_code, [f"p{i}" for i in range(PLAYERS)])
+        for x, y, angle, length, width in zip(
+            *rng.uniform([0, 0, -180, 5, 1], [FIELD_SIZE, FIELD_SIZE, 180, 60, 3], size=(lasers, 5)).T
+        ):
+            world.spawn_laser(room_code, x, y, angle, length, width, speed=0)
+    # No random spawns: the laser population stays fixed
+    world.next_spawn[:] = np.inf
+    
+    # Pre-generate hitboxes (a few landmarks each) so the timed loop only measures the server work
+    centres = rng.uniform(10, 90, size=(steps, matches, PLAYERS, 1, 2))
+    landmarks = (centres + rng.uniform(-6, 6, size=(steps, matches, PLAYERS, 5, 2))).tolist()
+    player_ids = [f"p{i}" for i in range(PLAYERS)]
+    dt = 1 / tick_rate
+    
+    for room_code, room_landmarks in zip(rooms, landmarks[0]):
+        for player_id, points in zip(player_ids, room_landmarks):
+            world.set_hitbox(room_code, player_id, points)
+    assert grid_hits(world) == brute_force_hits(world), "the grid must not miss hits"
+    
+    collide_time = 0.0
+    hits = 0
+    world.pairs_tested = 0
+    total_start = time.perf_counter()
+    for step in range(steps):
+        for room_code, room_landmarks in zip(rooms, landmarks[step]):
+            for player_id, points in zip(player_ids, room_landmarks):
+                world.set_hitbox(room_code, player_id, points)
+        world.health[world.has_box] = 100
+        world.alive[world.has_box] = True
+        world.laser_hit[:] = 0
+        start = time.perf_counter()
+        world.step(dt)
+        collide_time += time.perf_counter() - start
+        hits += int(np.count_nonzero(world.laser_hit))
+    total_time = time.perf_counter() - total_start
+    
+    pairs = matches * lasers * PLAYERS
+    step_time = total_time / steps
+    return {
+        "matches": matches,
+        "lasers": lasers,
+        "step_ms": round(step_time * 1000, 3),
+        "collide_step_ms": round(collide_time / steps * 1000, 3),
+        # Laser-player pairs resolved per second of simulation step
+        "pairs_per_sec": round(pairs * steps / collide_time),
+        "tested_pct": round(world.pairs_tested / (pairs * steps) * 100, 1),
+        "lasers_hitting": hits // steps,
+        # Matches one core sustains at the tick rate, inputs included
+        "matches_per_core": int(matches / (step_time * tick_rate)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--lasers", type=int, nargs="+", default=[64, 256])
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--tick-rate", type=int, default=20)
+    args = parser.parse_args()
+    
+    print(f"{'matches':>8} {'lasers':>7} {'step ms':>9} {'collide ms':>11} {'pairs/s':>12} "
+          f"{'tested %':>9} {'hitting':>8} {'matches/core':>13}")
+    for matches in args.matches:
+        for lasers in args.lasers:
+            r = run(matches, lasers, args.steps, args.tick_rate)
+            print(
+                f"{r['matches']:>8} {r['lasers']:>7} {r['step_ms']:>9} {r['collide_step_ms']:>11} "
+                f"{r['pairs_per_sec']:>12} {r['tested_pct']:>9} {r['lasers_hitting']:>8} "
+                f"{r['matches_per_core']:>13}"
+            )
+
+
+if __name__ == "__main__":
+    main()
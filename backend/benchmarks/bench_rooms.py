@@ -0,0 +1,92 @@
+"""
+Benchmark the per-operation CPU cost of the room representation.
+
+Compares the Pydantic models (how rooms were built before) with the slotted
+records the service layer uses now, on the work every room mutation and
+many WebSocket messages do: build the room from its Redis hashes, then dump
+it to JSON-ready dicts for a broadcast.
+
+    python -m benchmarks.bench_rooms --players 2 6 --state-keys 10 40
+"""
+import argparse
+import time
+from datetime import datetime
+
+from app.models import Room, Player, GameType
+from app.records import RoomRecord, PlayerRecord
+from app.services.room_service import RoomService
+from app.utils import serialization
+
+
+def snapshot(players: int, state_keys: int) -> tuple:
+    """A room's three hashes as a script returns them (flat field/value lists of JSON)"""
+    room = RoomRecord(room_code="ABC123", host_id="p0", max_players=6, current_game=GameType.AIR_HOCKEY)
+    meta = RoomService._encode_fields(room.meta())
+    player_fields = RoomService._encode_fields({
+        f"p{i}": PlayerRecord(player_id=f"p{i}", username=f"player {i}").to_dict() for i in range(players)
+    })
+    state = RoomService._encode_fields({
+        f"key_{i}": {"x": i * 1.5, "y": i * 2.5} for i in range(state_keys)
+    })
+    return meta, player_fields, state
+
+
+def build_pydantic(meta, players, state) -> Room:
+    """How RoomService built rooms before the records"""
+    decode = RoomService._decode_fields
+    room = Room(**decode(meta), game_state=decode(state))
+    room.players = sorted((Player(**p) for p in decode(players).values()), key=lambda p: p.joined_at)
+    return room
+
+
+def timed(operation, iterations: int) -> float:
+    """Microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def run(players: int, state_keys: int, iterations: int) -> dict:
+    fields = snapshot(players, state_keys)
+    model = build_pydantic(*fields)
+    record = RoomService._build_room(*fields)
+    assert serialization.loads(Room.model_validate(record.to_dict()).model_dump_json()) == \
+        model.model_dump(mode="json"), "records must dump what the models dump"
+
+    results = {
+        "pydantic_build": timed(lambda: build_pydantic(*fields), iterations),
+        "record_build": timed(lambda: RoomService._build_room(*fields), iterations),
+        "pydantic_dump": timed(lambda: model.model_dump(mode="json"), iterations),
+        "record_dump": timed(record.to_dict, iterations),
+    }
+    # A mutation followed by a broadcast of the room
+    results["pydantic_total"] = results["pydantic_build"] + results["pydantic_dump"]
+    results["record_total"] = results["record_build"] + results["record_dump"]
+    return {"players": players, "state_keys": state_keys,
+            **{key: round(value, 2) for key, value in results.items()},
+            "speedup": round(results["pydantic_total"] / results["record_total"], 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 6])
+    parser.add_argument("--state-keys", type=int, nargs="+", default=[10, 40])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'players':>8} {'keys':>5} {'build µs':>17} {'dump µs':>17} {'total µs':>17} {'speedup':>8}")
+    print(f"{'':>14} {'pydantic/record':>17} {'pydantic/record':>17} {'pydantic/record':>17}")
+    for players in args.players:
+        for state_keys in args.state_keys:
+            r = run(players, state_keys, args.iterations)
+            print(
+                f"{r['players']:>8} {r['state_keys']:>5} "
+                f"{r['pydantic_build']:>8}/{r['record_build']:<8} "
+                f"{r['pydantic_dump']:>8}/{r['record_dump']:<8} "
+                f"{r['pydantic_total']:>8}/{r['record_total']:<8} {r['speedup']:>7}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
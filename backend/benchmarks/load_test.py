@@ -0,0 +1,466 @@
+"""
+Load test the REST and WebSocket endpoints.
+
+Creates rooms through /api/rooms/create and /api/rooms/join, connects every
+player to /ws/{room_code}/{player_id} and replays game traffic for each
+GameType: state updates at the game's frame rate, chat and WebRTC
+signaling. Reports broadcast latency percentiles, message rates and the
+server's CPU and RSS; ``--output`` saves the report as JSON (with the git
+commit) so runs can be compared between commits.
+
+    # Start a server on the in-memory store (or --backend redis) and load it
+    python -m benchmarks.load_test --rooms 50 --players 4 --duration 30 --output results.json
+    # Load a server that is already running; pass its pid to sample CPU/RSS
+    python -m benchmarks.load_test --url http://localhost:8000 --server-pid 1234
+
+Needs the packages in benchmarks/requirements.txt. The clients run in this
+process, so on a single machine they compete with the server for CPU.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import psutil
+import websockets
+
+from app.models import GameType, WSMessageType
+from app.utils import framing
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+# ============================================
+# Traffic profiles
+# ============================================
+# Each player sends a state update every frame; ``None`` means it sends
+# nothing that frame (e.g. only the drawer draws in Pictionary).
+
+def _air_hockey(index: int, player_id: str, frame: int, rng: random.Random) -> Optional[dict]:
+    return {f"player{index % 2 + 1}_paddle": {"x": round(rng.uniform(0, 100), 2), "y": round(rng.uniform(0, 100), 2)}}
+
+
+def _pictionary(index: int, player_id: str, frame: int, rng: random.Random) -> Optional[dict]:
+    if index != 0:
+        return None
+    points = [[round(rng.uniform(0, 800), 1), round(rng.uniform(0, 600), 1)] for _ in range(4)]
+    return {"strokes": [{"points": points, "color": "#222222", "width": 4}]}
+
+
+def _laser_dodger(index: int, player_id: str, frame: int, rng: random.Random) -> Optional[dict]:
+    if index == 0:
+        lasers = [{"x": rng.uniform(0, 100), "y": rng.uniform(0, 100), "angle": rng.uniform(0, 360)} for _ in range(6)]
+        return {"lasers": lasers, "game_speed": 1 + frame / 1000}
+    return {f"position_{player_id}": {"x": round(rng.uniform(0, 100), 2), "y": round(rng.uniform(0, 100), 2)}}
+
+
+def _balloon_pop(index: int, player_id: str, frame: int, rng: random.Random) -> Optional[dict]:
+    return {"scores": {player_id: frame // 10}}
+
+
+PROFILES: Dict[GameType, Dict[str, Any]] = {
+    GameType.AIR_HOCKEY: {"fps": 60, "update": _air_hockey},
+    GameType.PICTIONARY: {"fps": 30, "update": _pictionary},
+    GameType.LASER_DODGER: {"fps": 30, "update": _laser_dodger},
+    GameType.BALLOON_POP: {"fps": 20, "update": _balloon_pop},
+}
+
+
+# ============================================
+# Measurement
+# ============================================
+
+def percentiles(samples: List[float]) -> Dict[str, Any]:
+    if not samples:
+        return {"count": 0, "p50": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+
+    def pick(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+    return {"count": len(ordered), "p50": pick(0.50), "p99": pick(0.99), "max": round(ordered[-1] * 1000, 3)}
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {"state": [], "chat": [], "signaling": []}
+        self.rest: Dict[str, List[float]] = {"create": [], "join": []}
+        self.sent = 0
+        self.received = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.errors = 0
+        self.recording = False
+
+
+class ServerProbe:
+    """Samples CPU time and RSS of the server process"""
+
+    def __init__(self, pid: Optional[int]):
+        self.process = psutil.Process(pid) if pid else None
+        self.peak_rss = 0
+        self._cpu_start = 0.0
+        self._wall_start = 0.0
+
+    def _cpu(self) -> float:
+        processes = [self.process] + self.process.children(recursive=True)
+        return sum(sum(p.cpu_times()[:2]) for p in processes)
+
+    def _rss(self) -> int:
+        processes = [self.process] + self.process.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes)
+
+    def start(self):
+        if self.process:
+            self._cpu_start, self._wall_start = self._cpu(), time.perf_counter()
+
+    def sample(self):
+        if self.process:
+            self.peak_rss = max(self.peak_rss, self._rss())
+
+    def report(self) -> Dict[str, Any]:
+        if not self.process:
+            return {"cpu_percent": None, "rss_mb": None, "peak_rss_mb": None}
+        elapsed = time.perf_counter() - self._wall_start
+        rss = self._rss()
+        return {
+            "cpu_percent": round((self._cpu() - self._cpu_start) / elapsed * 100, 1),
+            "rss_mb": round(rss / 2 ** 20, 1),
+            "peak_rss_mb": round(max(rss, self.peak_rss) / 2 ** 20, 1),
+        }
+
+
+# ============================================
+# Clients
+# ============================================
+
+class BenchRoom:
+    def __init__(self, room_code: str, game_type: GameType):
+        self.room_code = room_code
+        self.game_type = game_type
+        self.player_ids: List[str] = []
+        self.selected = asyncio.Event()
+
+
+class BenchClient:
+    """One player: a socket, a receive loop that records latency and a send loop"""
+
+    def __init__(self, room: BenchRoom, index: int, stats: Stats, args: argparse.Namespace):
+        self.room = room
+        self.index = index
+        self.player_id = room.player_ids[index]
+        self.stats = stats
+        self.args = args
+        self.rng = random.Random(f"{room.room_code}:{index}")
+        self.ws = None
+        self.connected = asyncio.Event()
+
+    async def send(self, message_type: str, data: dict):
+        message = {"type": message_type, "data": data}
+        frame = framing.encode(message) if self.args.protocol == "msgpack" else json.dumps(message)
+        await self.ws.send(frame)
+        if self.stats.recording:
+            self.stats.sent += 1
+            self.stats.bytes_sent += len(frame)
+
+    async def connect(self, ws_url: str):
+        subprotocols = [framing.MSGPACK_SUBPROTOCOL] if self.args.protocol == "msgpack" else None
+        self.ws = await websockets.connect(
+            f"{ws_url}/ws/{self.room.room_code}/{self.player_id}",
+            subprotocols=subprotocols, max_size=None, open_timeout=30
+        )
+
+    async def receive_loop(self):
+        stats = self.stats
+        try:
+            async for raw in self.ws:
+                now = time.perf_counter()
+                message = framing.decode(raw) if isinstance(raw, bytes) else json.loads(raw)
+                message_type, data = message.get("type"), message.get("data") or {}
+                if stats.recording:
+                    stats.received += 1
+                    stats.bytes_received += len(raw)
+
+                if message_type == WSMessageType.PING:
+                    await self.send(WSMessageType.PONG, data)
+                elif message_type == WSMessageType.CONNECT:
+                    self.connected.set()
+                elif message_type == WSMessageType.GAME_SELECTED:
+                    self.room.selected.set()
+                elif not stats.recording:
+                    continue
+                elif message_type == WSMessageType.GAME_STATE_DELTA:
+                    sent_at = data.get("changed", {}).get("sent_at")
+                    if sent_at:
+                        stats.latencies["state"].append(now - sent_at)
+                elif message_type == WSMessageType.GAME_STATE_UPDATE:
+                    sent_at = data.get("state", {}).get("sent_at")
+                    if sent_at and not data.get("keyframe"):
+                        stats.latencies["state"].append(now - sent_at)
+                elif message_type == WSMessageType.CHAT_MESSAGE:
+                    text = data.get("message", "")
+                    if text.startswith("bench "):
+                        stats.latencies["chat"].append(now - float(text[6:]))
+                elif message_type in (WSMessageType.WEBRTC_OFFER, WSMessageType.WEBRTC_ANSWER,
+                                      WSMessageType.WEBRTC_ICE_CANDIDATE):
+                    payload = data.get("offer") or data.get("answer") or data.get("candidate") or {}
+                    if "ts" in payload:
+                        stats.latencies["signaling"].append(now - payload["ts"])
+                    if message_type == WSMessageType.WEBRTC_OFFER:
+                        await self.send(WSMessageType.WEBRTC_ANSWER, {
+                            "target_player_id": data["from_player_id"],
+                            "answer": {"type": "answer", "sdp": "v=0 bench", "ts": time.perf_counter()},
+                        })
+        except websockets.ConnectionClosed:
+            pass
+
+    async def traffic_loop(self, stop_at: float):
+        profile = PROFILES[self.room.game_type]
+        interval = 1 / (self.args.fps or profile["fps"])
+        chat_every = int(1 / (self.args.chat_rate * interval)) if self.args.chat_rate else 0
+
+        # WebRTC: every guest calls the host, then trickles a few ICE candidates
+        host_id = self.room.player_ids[0]
+        if self.index != 0:
+            await self.send(WSMessageType.WEBRTC_OFFER, {
+                "target_player_id": host_id,
+                "offer": {"type": "offer", "sdp": "v=0 bench", "ts": time.perf_counter()},
+            })
+            for n in range(3):
+                await self.send(WSMessageType.WEBRTC_ICE_CANDIDATE, {
+                    "target_player_id": host_id,
+                    "candidate": {"candidate": f"candidate:{n} 1 udp 1 10.0.0.{n} 9 typ host", "ts": time.perf_counter()},
+                })
+
+        loop = asyncio.get_running_loop()
+        next_frame = loop.time() + self.rng.uniform(0, interval)
+        frame = 0
+        while loop.time() < stop_at:
+            await asyncio.sleep(max(0.0, next_frame - loop.time()))
+            next_frame += interval
+            frame += 1
+
+            update = profile["update"](self.index, self.player_id, frame, self.rng)
+            if update is not None:
+                update["sent_at"] = time.perf_counter()
+                await self.send(WSMessageType.GAME_STATE_UPDATE, {"state": update})
+            if chat_every and frame % chat_every == 0:
+                await self.send(WSMessageType.CHAT_MESSAGE, {
+                    "message": f"bench {time.perf_counter()}", "username": f"bot{self.index}"
+                })
+
+
+# ============================================
+# Scenario
+# ============================================
+
+async def _timed(samples: List[float], request) -> httpx.Response:
+    start = time.perf_counter()
+    response = await request
+    samples.append(time.perf_counter() - start)
+    response.raise_for_status()
+    return response
+
+
+async def create_rooms(http: httpx.AsyncClient, args: argparse.Namespace, stats: Stats) -> List[BenchRoom]:
+    """Create the rooms over REST and fill them with players"""
+    games = [GameType(game) for game in args.games]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def make_room(number: int) -> BenchRoom:
+        async with semaphore:
+            response = await _timed(stats.rest["create"], http.post(
+                "/api/rooms/create", json={"username": "host", "max_players": max(args.players, 2)}
+            ))
+            created = response.json()
+            room = BenchRoom(created["room_code"], games[number % len(games)])
+            room.player_ids.append(created["host_id"])
+
+            for index in range(1, args.players):
+                response = await _timed(stats.rest["join"], http.post(
+                    "/api/rooms/join", json={"room_code": room.room_code, "username": f"bot{index}"}
+                ))
+                known = set(room.player_ids)
+                room.player_ids += [p["player_id"] for p in response.json()["players"] if p["player_id"] not in known]
+            return room
+
+    return await asyncio.gather(*(make_room(number) for number in range(args.rooms)))
+
+
+async def run_scenario(args: argparse.Namespace, base_url: str, probe: ServerProbe) -> Dict[str, Any]:
+    stats = Stats()
+    ws_url = base_url.replace("http", "ws", 1)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as http:
+        rooms = await create_rooms(http, args, stats)
+
+    clients = [BenchClient(room, index, stats, args) for room in rooms for index in range(len(room.player_ids))]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def connect(client: BenchClient):
+        async with semaphore:
+            await client.connect(ws_url)
+
+    await asyncio.gather(*(connect(client) for client in clients))
+    receivers = [asyncio.create_task(client.receive_loop()) for client in clients]
+    await asyncio.wait_for(asyncio.gather(*(client.connected.wait() for client in clients)), 30)
+
+    # Hosts pick each room's game; everyone gets ready
+    for client in clients:
+        if client.index == 0:
+            await client.send(WSMessageType.GAME_SELECTED, {"game_type": client.room.game_type.value})
+        await client.send(WSMessageType.PLAYER_READY, {"ready": True})
+    await asyncio.wait_for(asyncio.gather(*(room.selected.wait() for room in rooms)), 30)
+
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + args.duration
+    stats.recording = True
+    probe.start()
+    started = time.perf_counter()
+    senders = [asyncio.create_task(client.traffic_loop(stop_at)) for client in clients]
+
+    while loop.time() < stop_at:
+        await asyncio.sleep(min(1.0, max(0.0, stop_at - loop.time())))
+        probe.sample()
+    results = await asyncio.gather(*senders, return_exceptions=True)
+    stats.errors += sum(isinstance(result, Exception) for result in results)
+
+    # Let in-flight broadcasts arrive before closing
+    await asyncio.sleep(0.5)
+    stats.recording = False
+    elapsed = time.perf_counter() - started
+    server = probe.report()
+
+    await asyncio.gather(*(client.ws.close() for client in clients), return_exceptions=True)
+    for task in receivers:
+        task.cancel()
+
+    return {
+        "rest_ms": {name: percentiles(samples) for name, samples in stats.rest.items()},
+        "broadcast_latency_ms": {name: percentiles(samples) for name, samples in stats.latencies.items()},
+        "messages": {
+            "sent": stats.sent,
+            "received": stats.received,
+            "sent_per_sec": round(stats.sent / elapsed, 1),
+            "received_per_sec": round(stats.received / elapsed, 1),
+            "bytes_sent": stats.bytes_sent,
+            "bytes_received": stats.bytes_received,
+        },
+        "server": server,
+        "errors": stats.errors,
+    }
+
+
+def start_server(args: argparse.Namespace) -> subprocess.Popen:
+    env = dict(os.environ, REDIS_ENABLED="false" if args.backend == "memory" else "true", DEBUG="false")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+
+
+async def wait_until_up(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as http:
+        while True:
+            try:
+                if (await http.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+            await asyncio.sleep(0.2)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    server = None
+    if args.url:
+        base_url, pid = args.url.rstrip("/"), args.server_pid
+    else:
+        server = start_server(args)
+        base_url, pid = f"http://127.0.0.1:{args.port}", server.pid
+
+    try:
+        await wait_until_up(base_url)
+        results = await run_scenario(args, base_url, ServerProbe(pid))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(10)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "rooms": args.rooms,
+            "players": args.players,
+            "games": args.games,
+            "duration": args.duration,
+            "fps": args.fps or {game: PROFILES[GameType(game)]["fps"] for game in args.games},
+            "chat_rate": args.chat_rate,
+            "backend": None if args.url else args.backend,
+            "protocol": args.protocol,
+        },
+        **results,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n{report['config']['rooms']} rooms x {report['config']['players']} players, "
+          f"{report['config']['duration']}s ({', '.join(report['config']['games'])})")
+    print(f"{'':>12} {'count':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for section in ("rest_ms", "broadcast_latency_ms"):
+        for name, result in report[section].items():
+            print(f"{name:>12} {result['count']:>8} {str(result['p50']):>9} {str(result['p99']):>9} {str(result['max']):>9}")
+    messages, server = report["messages"], report["server"]
+    print(f"messages/s: {messages['sent_per_sec']} sent, {messages['received_per_sec']} received")
+    print(f"bytes: {messages['bytes_sent']} sent, {messages['bytes_received']} received")
+    print(f"server: {server['cpu_percent']}% CPU, {server['rss_mb']} MB RSS (peak {server['peak_rss_mb']} MB)")
+    if report["errors"]:
+        print(f"errors: {report['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--players", type=int, default=4, help="players per room (at least 2)")
+    parser.add_argument("--games", nargs="+", default=[game.value for game in GameType],
+                        choices=[game.value for game in GameType], help="games, assigned to rooms round-robin")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of traffic")
+    parser.add_argument("--fps", type=float, default=None, help="override every game's update rate")
+    parser.add_argument("--chat-rate", type=float, default=0.2, help="chat messages per player per second")
+    parser.add_argument("--concurrency", type=int, default=50, help="parallel REST requests / connects")
+    parser.add_argument("--protocol", choices=["json", "msgpack"], default="json", help="WebSocket framing")
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="pid of the --url server, for CPU/RSS")
+    parser.add_argument("--backend", choices=["memory", "redis"], default="memory", help="store for the started server")
+    parser.add_argument("--port", type=int, default=8765, help="port for the started server")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+    args.players = max(args.players, 2)
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
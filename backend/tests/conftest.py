@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from app.database import db
+from app.config import settings
+
+
+@pytest.fixture(autouse=True)
+def memory_db():
+    """Every test runs on an empty in-memory store (the sweep task is not started)"""
+    db.use_memory_fallback = True
+    db.redis = None
+    db._memory_store.clear()
+    yield db
+    db._memory_store.clear()
+
+
+@pytest.fixture
+def no_resume_grace(monkeypatch):
+    """Players leave as soon as their socket closes"""
+    monkeypatch.setattr(settings, "WS_RESUME_GRACE", 0)
+
+
+class QueryParams(dict):
+    pass
+
+
+class FakeWebSocket:
+    """
+    Enough of a Starlette WebSocket for the endpoint and connection manager.
+
+    ``incoming`` feeds ``receive``; closing the socket (from either side)
+    ends it with a disconnect frame, as the ASGI server would.
+    """
+    
+    def __init__(self, query: dict = None, fail_sends: bool = False):
+        self.scope = {"subprotocols": []}
+        self.query_params = QueryParams(query or {})
+        self.fail_sends = fail_sends
+        self.sent = []
+        self.close_code = None
+        self.incoming: asyncio.Queue = asyncio.Queue()
+    
+    async def accept(self, subprotocol=None):
+        pass
+    
+    async def receive(self) -> dict:
+        return await self.incoming.get()
+    
+    def send_json_frame(self, text: str):
+        self.incoming.put_nowait({"type": "websocket.receive", "text": text})
+    
+    def disconnect(self, code: int = 1000):
+        self.incoming.put_nowait({"type": "websocket.disconnect", "code": code})
+    
+    async def send_text(self, text: str):
+        if self.fail_sends:
+            raise ConnectionResetError("peer went away")
+        self.sent.append(text)
+    
+    async def send_bytes(self, data: bytes):
+        if self.fail_sends:
+            raise ConnectionResetError("peer went away")
+        self.sent.append(data)
+    
+    async def close(self, code: int = 1000):
+        if self.close_code is None:
+            self.close_code = code
+            self.disconnect(code)
+
+
+async def settle(rounds: int = 10):
+    """Let queued tasks (writers, broadcasts) run"""
+    for _ in range(rounds):
+        await asyncio.sleep(0)
+
+
+async def eventually(predicate, timeout: float = 1.0):
+    """Wait until ``predicate()`` holds, e.g. for a message to cross the bus"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "timed out waiting"
+        await asyncio.sleep(0.01)
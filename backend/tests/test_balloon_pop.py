@@ -0,0 +1,36 @@
+import pytest
+from app.simulation.balloon_pop import BalloonPopWorld, MAX_BALLOON_ID
+
+
+def _world_with_balloon():
+    world = BalloonPopWorld(capacity=2)
+    world.add_match("ROOM1", ["p1", "p2"], seed=42)
+    balloons = world.step(0.01)["ROOM1"]["balloons"]
+    return world, balloons[0]
+
+
+@pytest.mark.parametrize("balloon_id", [
+    "9" * 30, MAX_BALLOON_ID, 2 ** 70, -1, "-1", "1e3", "٣", 1.0, True, None, [0],
+])
+def test_claim_rejects_ids_outside_the_balloon_range(balloon_id):
+    world, balloon = _world_with_balloon()
+    assert not world.claim("ROOM1", "p1", balloon_id, balloon["x"], balloon["y"])
+
+
+def test_oversized_claim_does_not_break_the_step():
+    world, balloon = _world_with_balloon()
+    world.claim("ROOM1", "p1", "9" * 30, balloon["x"], balloon["y"])
+    assert world.claim("ROOM1", "p2", balloon["id"], balloon["x"], balloon["y"])
+    
+    update = world.step(0.01)["ROOM1"]
+    assert update["pops"] == [{"id": balloon["id"], "player_id": "p2"}]
+    assert update["scores"] == {"p1": 0, "p2": 1}
+
+
+def test_first_claim_wins():
+    world, balloon = _world_with_balloon()
+    assert world.claim("ROOM1", "p1", int(balloon["id"]), balloon["x"], balloon["y"])
+    assert world.claim("ROOM1", "p2", balloon["id"], balloon["x"], balloon["y"])
+    
+    update = world.step(0.01)["ROOM1"]
+    assert update["pops"] == [{"id": balloon["id"], "player_id": "p1"}]
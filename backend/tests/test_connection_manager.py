@@ -0,0 +1,41 @@
+import asyncio
+from app.models import WSMessageType
+from app.services.connection_manager import manager, OutboundMessage
+from app.services.room_service import RoomService
+from app.routers.websocket import websocket_endpoint
+from tests.conftest import FakeWebSocket, settle
+
+
+def test_failed_send_leaves_disconnect_handling_to_receive_loop(no_resume_grace):
+    async def run():
+        room = await RoomService.create_room("h", "host")
+        await RoomService.join_room(room.room_code, "p2", "guest")
+        
+        socket = FakeWebSocket(fail_sends=True)
+        endpoint = asyncio.create_task(websocket_endpoint(socket, room.room_code, "p2"))
+        await settle()
+        
+        # The first write (CONNECT) fails: the writer only closes the socket,
+        # the receive loop then unregisters it and the player leaves
+        await asyncio.wait_for(endpoint, 1)
+        assert socket.close_code == 1011
+        assert "p2" not in manager.active_connections.get(room.room_code, {})
+        room = await RoomService.get_room(room.room_code)
+        assert [player.player_id for player in room.players] == ["h"]
+    
+    asyncio.run(run())
+
+
+def test_failed_send_keeps_connection_registered_until_dropped():
+    async def run():
+        socket = FakeWebSocket(fail_sends=True)
+        connection = await manager.connect(socket, "WRITE1", "p1")
+        connection.start()
+        connection.enqueue(OutboundMessage({"type": WSMessageType.CHAT_MESSAGE, "data": {}}))
+        await settle()
+        
+        assert connection.closed and socket.close_code == 1011
+        assert manager.drop(connection)  # so the receive loop still runs the leave
+        assert "WRITE1" not in manager.active_connections
+    
+    asyncio.run(run())
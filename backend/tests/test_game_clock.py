@@ -0,0 +1,39 @@
+import asyncio
+import time
+from app.models import GameType
+from app.services.game_clock import GameClock
+from app.utils.timer_wheel import TimerWheel
+
+
+def test_idle_wheel_skips_to_now_in_one_step():
+    wheel = TimerWheel(0.1, now=0.0)
+    day = 24 * 3600.0
+    
+    start = time.perf_counter()
+    assert wheel.advance(day) == []
+    wheel.schedule(day + 0.25, "due")
+    assert wheel.advance(day + 0.2) == []
+    assert wheel.advance(day + 0.3) == ["due"]
+    assert time.perf_counter() - start < 0.05
+
+
+def test_clock_started_after_a_long_idle_does_not_walk_the_idle_ticks():
+    async def run():
+        loop = asyncio.get_running_loop()
+        clock = GameClock()
+        ticks = []
+        clock.tick_handler = lambda room_code, game_type, seconds_left: ticks.append(seconds_left)
+        # A wheel last advanced a day ago, as after a day with no game running
+        clock._wheel = TimerWheel(0.1, now=loop.time() - 24 * 3600)
+        try:
+            clock.start("ROOM1", GameType.BALLOON_POP, 3)
+            assert clock._wheel.next_tick_time > loop.time() - 0.2
+            
+            start = time.perf_counter()
+            await asyncio.sleep(1.1)
+            assert ticks == [2]
+            assert time.perf_counter() - start < 1.3
+        finally:
+            await clock.stop()
+    
+    asyncio.run(run())
@@ -0,0 +1,31 @@
+from app.models import GameType
+from app.services.game_service import GameService
+
+
+def test_updates_may_raise_scores_but_not_lower_them():
+    state = GameService.initialize_game_state(GameType.PICTIONARY, ["p1", "p2"])
+    state["scores"] = {"p1": 3, "p2": 1}
+    state["round"] = 2
+    
+    assert GameService.validate_game_update(GameType.PICTIONARY, state, {"scores": {"p1": 4, "p2": 1}})
+    assert GameService.validate_game_update(GameType.PICTIONARY, state, {"round": 3})
+    assert not GameService.validate_game_update(GameType.PICTIONARY, state, {"scores": {"p1": 2, "p2": 5}})
+    assert not GameService.validate_game_update(GameType.PICTIONARY, state, {"round": 1})
+    
+    state = GameService.initialize_game_state(GameType.AIR_HOCKEY, ["p1", "p2"])
+    state["player1_score"] = 4
+    assert GameService.validate_game_update(GameType.AIR_HOCKEY, state, {"player1_score": 5, "player2_score": 1})
+    assert not GameService.validate_game_update(GameType.AIR_HOCKEY, state, {"player1_score": 0})
+
+
+def test_updates_must_match_the_schema():
+    state = GameService.initialize_game_state(GameType.BALLOON_POP, ["p1"])
+    assert not GameService.validate_game_update(GameType.BALLOON_POP, state, {"scores": {"p1": "lots"}})
+    assert not GameService.validate_game_update(GameType.BALLOON_POP, state, {"unknown_key": 1})
+
+
+def test_stroke_points_must_be_x_y_pairs():
+    state = GameService.initialize_game_state(GameType.PICTIONARY, ["p1"])
+    assert GameService.validate_game_update(GameType.PICTIONARY, state, {"strokes": [{"points": [[1, 2], [3.5, 4]]}]})
+    assert not GameService.validate_game_update(GameType.PICTIONARY, state, {"strokes": [{"points": [[], [1]]}]})
+    assert not GameService.validate_game_update(GameType.PICTIONARY, state, {"strokes": [{"points": [[1, 2, 3]]}]})
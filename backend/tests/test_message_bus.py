@@ -0,0 +1,138 @@
+import asyncio
+import pytest
+from app.config import settings
+from app.database import RedisDB
+from app.memory_store import InMemoryPubSub
+from app.routers.websocket import _reset_room
+from app.services.message_bus import MessageBus, OWNER_KEY
+from app.services.room_cache import room_cache
+from app.services.room_service import RoomService
+from tests.conftest import eventually
+
+
+class Worker:
+    """One worker process: its own database client and bus, on a shared store and hub"""
+    
+    def __init__(self, shared: RedisDB, hub: InMemoryPubSub):
+        self.db = RedisDB()
+        self.db.use_memory_fallback = True
+        self.db._memory_store = shared._memory_store
+        self.db._memory_pubsub = hub
+        self.bus = MessageBus(self.db)
+        self.delivered = []
+        self.forwarded = []
+        self.ownership = []
+        self.bus.room_handler = lambda *message: self.delivered.append(message)
+        self.bus.ownership_handler = self.ownership.append
+        
+        async def forwarded(*frame):
+            self.forwarded.append(frame)
+        
+        self.bus.forward_handler = forwarded
+
+
+@pytest.fixture
+def workers(memory_db, monkeypatch):
+    # Short leases: owners are re-resolved every 1/3 s and leases renewed as often
+    monkeypatch.setattr(settings, "ROOM_OWNER_TTL", 1)
+    hub = InMemoryPubSub()
+    return Worker(memory_db, hub), Worker(memory_db, hub)
+
+
+def _run(workers, scenario):
+    async def run():
+        for worker in workers:
+            await worker.bus.start()
+        try:
+            await scenario(*workers)
+        finally:
+            for worker in workers:
+                await worker.bus.stop()
+    
+    asyncio.run(run())
+
+
+def test_broadcasts_reach_the_other_workers_sockets(workers):
+    async def scenario(a, b):
+        b.bus.watch_room("ROOM1")
+        await asyncio.sleep(0)  # subscription
+        
+        a.bus.publish("ROOM1", "chat_message", '{"type":"chat_message"}', exclude="p1")
+        a.bus.publish("ROOM1", "webrtc_offer", '{"type":"webrtc_offer"}', target="p2")
+        a.bus.publish("ROOM2", "chat_message", '{"type":"chat_message"}')  # nobody on b
+        await eventually(lambda: len(b.delivered) == 2)
+        assert b.delivered == [
+            ("ROOM1", "chat_message", '{"type":"chat_message"}', "p1", None),
+            ("ROOM1", "webrtc_offer", '{"type":"webrtc_offer"}', None, "p2"),
+        ]
+        assert a.delivered == []  # already delivered locally by the sender
+        
+        # Once b has no sockets left for the room it stops receiving it
+        b.bus.unwatch_room("ROOM1")
+        await asyncio.sleep(0)
+        a.bus.publish("ROOM1", "chat_message", "{}")
+        await asyncio.sleep(0.05)
+        assert len(b.delivered) == 2
+    
+    _run(workers, scenario)
+
+
+def test_client_frames_are_forwarded_to_the_owner(workers):
+    async def scenario(a, b):
+        assert await a.bus.owner("ROOM1") == a.bus.worker_id
+        owner = await b.bus.owner("ROOM1")
+        assert owner == a.bus.worker_id
+        
+        b.bus.forward(owner, "ROOM1", "p2", "message", '{"type":"player_ready"}')
+        b.bus.forward(owner, "ROOM1", "p2", "disconnect")
+        await eventually(lambda: len(a.forwarded) == 2)
+        assert a.forwarded == [
+            ("ROOM1", "p2", "message", '{"type":"player_ready"}'),
+            ("ROOM1", "p2", "disconnect", ""),
+        ]
+        assert b.forwarded == []
+    
+    _run(workers, scenario)
+
+
+def test_ownership_moves_when_the_owner_releases_the_room(workers):
+    async def scenario(a, b):
+        assert await a.bus.owner("ROOM1") == a.bus.worker_id
+        assert await b.bus.owner("ROOM1") == a.bus.worker_id
+        assert await b.bus.owner("ROOM1", claim=False) == a.bus.worker_id
+        assert await b.bus.owner("ROOM2", claim=False) is None
+        assert not b.bus.owns("ROOM2")
+        
+        await a.bus.release("ROOM1")
+        # b trusts its cached answer for a third of the lease, then claims the room
+        await asyncio.sleep(settings.ROOM_OWNER_TTL / 3 + 0.05)
+        assert await b.bus.owner("ROOM1") == b.bus.worker_id
+        assert b.ownership == ["ROOM1"] and b.bus.owns("ROOM1")
+        assert await a.bus.owner("ROOM1") == b.bus.worker_id
+    
+    _run(workers, scenario)
+
+
+def test_lapsed_lease_is_taken_over_and_the_old_owner_resets(workers):
+    async def scenario(a, b):
+        room = await RoomService.create_room("h", "host")
+        code = room.room_code
+        a.bus.ownership_handler = lambda room_code: (a.ownership.append(room_code), _reset_room(room_code))
+        assert await a.bus.owner(code) == a.bus.worker_id
+        assert a.ownership == [code]
+        await room_cache.get(code)
+        
+        # The lease lapses (say a stalled worker) and b takes the room over
+        del a.db._memory_store[OWNER_KEY.format(code)]
+        await asyncio.sleep(settings.ROOM_OWNER_TTL / 3 + 0.05)
+        assert await b.bus.owner(code) == b.bus.worker_id
+        
+        # a finds out on its next renewal, gives the room up and drops its local state
+        await eventually(lambda: len(a.ownership) == 2)
+        assert a.ownership == [code, code]
+        assert not a.bus.owns(code)
+        assert room_cache.peek(code) is None
+        await asyncio.sleep(settings.ROOM_OWNER_TTL / 3 + 0.05)
+        assert await a.bus.owner(code) == b.bus.worker_id
+    
+    _run(workers, scenario)
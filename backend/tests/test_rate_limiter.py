@@ -0,0 +1,53 @@
+import asyncio
+from app.services.game_schemas import MAX_UPDATE_KEYS
+from app.services.rate_limiter import ConnectionRateLimiter, MAX_HELD_KEYS
+
+
+def _update(*keys: str) -> dict:
+    return {"type": "game_state_update", "data": {"state": {key: 1 for key in keys}}}
+
+
+def test_held_state_is_capped_near_one_valid_update():
+    async def run():
+        limiter = ConnectionRateLimiter("ROOM1", "p1")
+        released = []
+        
+        async def release(message):
+            released.append(message)
+        
+        while limiter.admit_state(_update("round"), release) is not None:
+            pass  # use up the burst; the last update is now held
+        
+        # A full-size update always fits next to what is held...
+        keys = [f"position_p{i}" for i in range(MAX_UPDATE_KEYS)]
+        assert limiter.admit_state(_update(*keys), release) is None
+        assert len(limiter._held) == MAX_UPDATE_KEYS + 1
+        
+        # ...but a connection cannot pile up more than MAX_HELD_KEYS distinct keys
+        extra = [f"position_q{i}" for i in range(MAX_HELD_KEYS)]
+        assert limiter.admit_state(_update(*extra), release) is None
+        assert len(limiter._held) == MAX_UPDATE_KEYS + 1
+        limiter.close()
+    
+    asyncio.run(run())
+
+
+def test_repeated_full_size_updates_are_merged_while_throttled():
+    async def run():
+        limiter = ConnectionRateLimiter("ROOM1", "p1")
+        
+        async def release(message):
+            pass
+        
+        while limiter.admit_state(_update("round"), release) is not None:
+            pass
+        
+        keys = [f"position_p{i}" for i in range(MAX_UPDATE_KEYS)]
+        first, latest = _update(*keys), _update(*keys)
+        latest["data"]["state"] = {key: 2 for key in keys}
+        assert limiter.admit_state(first, release) is None
+        assert limiter.admit_state(latest, release) is None
+        assert all(limiter._held[key] == 2 for key in keys)  # the latest state, not dropped
+        limiter.close()
+    
+    asyncio.run(run())
@@ -0,0 +1,65 @@
+import asyncio
+from app.models import JoinRoomRequest
+from app.routers import rooms
+from app.services.message_bus import MessageBus, message_bus
+from app.services.room_cache import room_cache
+from app.services.room_service import RoomService
+from tests.conftest import eventually
+
+
+def test_rest_calls_on_a_non_owner_bypass_its_room_cache(memory_db):
+    async def run():
+        owner = MessageBus(memory_db)
+        reloads = []
+        
+        async def forwarded(room_code, player_id, kind, data):
+            reloads.append((room_code, kind))
+        
+        owner.forward_handler = forwarded
+        await owner.start()
+        await message_bus.start()
+        try:
+            room = await RoomService.create_room("h", "host")
+            code = room.room_code
+            assert await owner.owner(code) == owner.worker_id
+            
+            # A stale copy left in this worker's cache is never served
+            await room_cache.get(code)
+            await RoomService.join_room(code, "p2", "guest")
+            fetched = await rooms.get_room(code)
+            assert [player["player_id"] for player in fetched["players"]] == ["h", "p2"]
+            room_cache.discard(code)
+            
+            # Joins and leaves go to Redis and the owner is told to reload
+            joined = await rooms.join_room(JoinRoomRequest(room_code=code, username="late"))
+            assert len(joined["players"]) == 3
+            assert room_cache.peek(code) is None
+            await rooms.leave_room(code, "p2")
+            await eventually(lambda: len(reloads) == 2)
+            assert reloads == [(code, "reload"), (code, "reload")]
+            assert room_cache.peek(code) is None
+            assert not message_bus.owns(code)
+        finally:
+            await message_bus.stop()
+            await owner.stop()
+    
+    asyncio.run(run())
+
+
+def test_rest_calls_on_the_owner_go_through_its_room_cache(memory_db):
+    async def run():
+        await message_bus.start()
+        try:
+            room = await RoomService.create_room("h", "host")
+            code = room.room_code
+            assert await message_bus.owner(code) == message_bus.worker_id
+            
+            await rooms.join_room(JoinRoomRequest(room_code=code, username="guest"))
+            assert len(room_cache.peek(code).players) == 2
+            room_cache.merge_game_state(code, {"round": 2})  # not flushed yet
+            assert (await rooms.get_room(code))["game_state"] == {"round": 2}
+        finally:
+            room_cache.discard(code)
+            await message_bus.stop()
+    
+    asyncio.run(run())
@@ -0,0 +1,104 @@
+import asyncio
+from app.models import WSMessageType
+from app.routers.websocket import websocket_endpoint
+from app.services.connection_manager import manager
+from app.services.room_service import RoomService
+from app.services.session_service import SessionService
+from app.utils import serialization
+from tests.conftest import FakeWebSocket, settle
+
+
+def _received(socket: FakeWebSocket) -> list:
+    return [serialization.loads(text) for text in socket.sent]
+
+
+def _chat(text: str) -> dict:
+    return {"type": WSMessageType.CHAT_MESSAGE, "data": {"message": text}}
+
+
+def test_concurrent_broadcasts_are_sent_in_event_seq_order(monkeypatch):
+    record_events = SessionService.record_events
+    round_trips = []
+    
+    async def slow_record_events(room_code, messages):
+        round_trips.append(len(messages))
+        await asyncio.sleep(0.01)
+        return await record_events(room_code, messages)
+    
+    monkeypatch.setattr(SessionService, "record_events", slow_record_events)
+    
+    async def run():
+        socket = FakeWebSocket()
+        connection = await manager.connect(socket, "ORDER1", "p1")
+        connection.start()
+        
+        await asyncio.gather(*(manager.broadcast_to_room(_chat(str(i)), "ORDER1") for i in range(5)))
+        first = asyncio.create_task(manager.broadcast_to_room(_chat("5"), "ORDER1"))
+        await asyncio.sleep(0.005)  # its round trip is in flight
+        await asyncio.gather(manager.broadcast_to_room(_chat("6"), "ORDER1"),
+                             manager.broadcast_to_room(_chat("7"), "ORDER1"))
+        await first
+        await settle()
+        
+        received = _received(socket)
+        assert [m["event_seq"] for m in received] == list(range(1, 9))
+        assert [m["data"]["message"] for m in received] == [str(i) for i in range(8)]
+        assert round_trips == [5, 1, 2]  # events queued together share one round trip
+        manager.drop(connection)
+    
+    asyncio.run(run())
+
+
+def test_reconnecting_client_gets_only_the_events_it_missed():
+    async def run():
+        room = await RoomService.create_room("h", "host")
+        code = room.room_code
+        await RoomService.join_room(code, "p2", "guest")
+        host = FakeWebSocket()
+        asyncio.create_task(websocket_endpoint(host, code, "h"))
+        await settle()
+        
+        socket = FakeWebSocket()
+        endpoint = asyncio.create_task(websocket_endpoint(socket, code, "p2"))
+        await settle()
+        connect, *events = _received(socket)
+        assert connect["type"] == WSMessageType.CONNECT and not connect["data"]["resumed"]
+        token = connect["data"]["session_token"]
+        
+        await manager.broadcast_to_room(_chat("seen"), code)
+        await settle()
+        last_seq = _received(socket)[-1]["event_seq"]
+        
+        # The socket drops; the player keeps their place while the room moves on
+        socket.disconnect(1006)
+        await endpoint
+        await manager.broadcast_to_room(_chat("missed 1"), code)
+        await manager.broadcast_to_room(_chat("missed 2"), code)
+        host_seen = len(host.sent)
+        
+        resumed = FakeWebSocket({"session_token": token, "last_event_seq": str(last_seq)})
+        asyncio.create_task(websocket_endpoint(resumed, code, "p2"))
+        await settle()
+        connect, *replayed = _received(resumed)
+        assert connect["data"]["resumed"] and connect["data"]["session_token"] == token
+        assert [(m["event_seq"], m["data"]["message"]) for m in replayed] == [
+            (last_seq + 1, "missed 1"), (last_seq + 2, "missed 2")
+        ]
+        assert len(host.sent) == host_seen  # a resumed player never left, so no PLAYER_JOINED
+        
+        # Live events continue the sequence
+        await manager.broadcast_to_room(_chat("live"), code)
+        await settle()
+        assert _received(resumed)[-1]["event_seq"] == last_seq + 3
+        
+        # A token from another session starts over
+        stranger = FakeWebSocket({"session_token": "not-the-token", "last_event_seq": "1"})
+        asyncio.create_task(websocket_endpoint(stranger, code, "p2"))
+        await settle()
+        connect = _received(stranger)[0]
+        assert not connect["data"]["resumed"] and connect["data"]["session_token"] != token
+        
+        for connection in list(manager.active_connections.get(code, {}).values()):
+            manager.drop(connection)
+    
+    asyncio.run(run())
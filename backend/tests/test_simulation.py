@@ -0,0 +1,19 @@
+import pytest
+from app.simulation import Simulation
+from app.simulation.air_hockey import air_hockey_world
+from app.simulation.balloon_pop import balloon_pop_world
+from app.simulation.laser_dodger import laser_dodger_world
+
+
+def test_worlds_implement_the_simulation_interface():
+    for world in (air_hockey_world, laser_dodger_world, balloon_pop_world):
+        assert isinstance(world, Simulation)
+
+
+def test_incomplete_simulation_fails_when_created():
+    class StepOnly(Simulation):
+        def step(self, dt):
+            return {}
+    
+    with pytest.raises(TypeError):
+        StepOnly()
@@ -9,6 +9,11 @@ interface UseWebSocketProps {
 export const useWebSocket = ({ roomCode, playerId, onMessage }: UseWebSocketProps) => {
     const [isConnected, setIsConnected] = useState(false);
     const wsRef = useRef<WebSocket | null>(null);
+    // Resume state: a dropped socket reconnects with these and only gets the events it missed
+    const sessionTokenRef = useRef<string | null>(null);
+    const lastEventSeqRef = useRef<number | null>(null);
+    const closingRef = useRef(false);
+    const reconnectTimerRef = useRef<number | null>(null);
 
     const connect = useCallback(() => {
         if (wsRef.current?.readyState === WebSocket.OPEN) {
@@ -16,7 +21,11 @@ export const useWebSocket = ({ roomCode, playerId, onMessage }: UseWebSocketProp
         }
 
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        const wsUrl = `${protocol}//${window.location.host}/ws/${roomCode}/${playerId}`;
+        let wsUrl = `${protocol}//${window.location.host}/ws/${roomCode}/${playerId}`;
+        if (sessionTokenRef.current && lastEventSeqRef.current !== null) {
+            wsUrl += `?session_token=${encodeURIComponent(sessionTokenRef.current)}&last_event_seq=${lastEventSeqRef.current}`;
+        }
+        closingRef.current = false;
 
         const ws = new WebSocket(wsUrl);
 
@@ -28,6 +37,20 @@ export const useWebSocket = ({ roomCode, playerId, onMessage }: UseWebSocketProp
         ws.onmessage = (event) => {
             try {
                 const data = JSON.parse(event.data);
+                if (data.type === 'ping') {
+                    // Heartbeat: answer so the server keeps this socket
+                    ws.send(JSON.stringify({ type: 'pong', data: data.data }));
+                    return;
+                }
+                if (data.type === 'connect') {
+                    sessionTokenRef.current = data.data.session_token;
+                    if (!data.data.resumed) {
+                        lastEventSeqRef.current = 0;
+                    }
+                }
+                if (typeof data.event_seq === 'number') {
+                    lastEventSeqRef.current = Math.max(lastEventSeqRef.current ?? 0, data.event_seq);
+                }
                 onMessage?.(data);
             } catch (error) {
                 console.error('Error parsing WebSocket message:', error);
@@ -41,6 +64,10 @@ export const useWebSocket = ({ roomCode, playerId, onMessage }: UseWebSocketProp
         ws.onclose = () => {
             console.log('🔌 WebSocket disconnected');
             setIsConnected(false);
+            if (!closingRef.current) {
+                // Dropped, not closed by us: resume before the server's grace period runs out
+                reconnectTimerRef.current = window.setTimeout(connect, 1000);
+            }
         };
 
         wsRef.current = ws;
@@ -55,6 +82,11 @@ export const useWebSocket = ({ roomCode, playerId, onMessage }: UseWebSocketProp
     }, []);
 
     const disconnect = useCallback(() => {
+        closingRef.current = true;
+        if (reconnectTimerRef.current !== null) {
+            window.clearTimeout(reconnectTimerRef.current);
+            reconnectTimerRef.current = null;
+        }
         if (wsRef.current) {
             wsRef.current.close();
             wsRef.current = null;
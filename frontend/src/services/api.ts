@@ -19,6 +19,26 @@ export interface Room {
     is_active: boolean;
 }
 
+export interface RoomSummary {
+    room_code: string;
+    player_count: number;
+    max_players: number;
+    current_game: string | null;
+    last_activity: string;
+}
+
+export interface RoomListPage {
+    rooms: RoomSummary[];
+    next_cursor: string | null;
+}
+
+export interface RoomListParams {
+    cursor?: string;
+    limit?: number;
+    has_free_slots?: boolean;
+    current_game?: string;
+}
+
 export interface Player {
     player_id: string;
     username: string;
@@ -44,8 +64,8 @@ export const roomAPI = {
         return response.data;
     },
 
-    getActiveRooms: async (): Promise<string[]> => {
-        const response = await api.get('/api/rooms/');
+    getActiveRooms: async (params: RoomListParams = {}): Promise<RoomListPage> => {
+        const response = await api.get('/api/rooms/', { params });
         return response.data;
     },
 